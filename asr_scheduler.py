@@ -0,0 +1,157 @@
+"""
+Planificador ASR por lotes
+==========================
+Un único modelo Whisper compartido por varios streams. Cada stream llama a
+transcribe(audio, idioma) desde su etapa ASR y espera; el planificador junta
+las frases pendientes de todos los streams y las pasa por el encoder en UNA
+pasada (lote de espectrogramas mel rellenados a 30 s) con whisper.decode.
+
+Un lote sale cuando se llena (`max_batch`), cuando todos los streams
+registrados ya esperan (cada etapa ASR tiene como mucho una frase en vuelo,
+así que no puede llegar nada más) o cuando la frase más antigua agota su
+plazo (`deadline_ms` desde que llegó). Las frases de idiomas
+distintos van en lotes distintos (DecodingOptions fija el idioma del lote).
+
+Whisper instala los hooks de la kv-cache (y de las marcas de tiempo por
+palabra) en los módulos del decoder en cada decodificación: dos
+decodificaciones a la vez sobre el mismo modelo se pisan la caché. Todo uso
+del modelo compartido fuera del planificador (p.ej. el ASR en streaming)
+debe tomar `model_lock`, el mismo que toma cada lote.
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from cpu_inference import pin_current_thread
+from live_decoder import is_no_speech, log_mel
+
+
+class ASRRequest:
+    def __init__(self, audio, language, deadline):
+        self.audio = audio
+        self.language = language
+        self.deadline = deadline
+        self.submitted = time.monotonic()
+        self.future = Future()
+
+
+class BatchedASRScheduler:
+    def __init__(self, model, max_batch=8, deadline_ms=250, fp16=False, cores=None):
+        self.model = model
+        self.cores = cores          # Núcleos para el hilo que decodifica (ver cpu_inference.py)
+        self.max_batch = max(1, int(max_batch))
+        self.deadline_s = deadline_ms / 1000.0
+        self.fp16 = fp16
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self.model_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.deadline_misses = 0      # Lotes que empezaron después del plazo de su frase más antigua
+        self.busy_seconds = 0.0
+        self.batch_sizes = collections.Counter()
+        self.streams = 0
+        self.thread = threading.Thread(target=self._run, name="asr-scheduler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for request in self._pending:
+            request.future.cancel()
+
+    def register_stream(self):
+        with self._cond:
+            self.streams += 1
+
+    def unregister_stream(self):
+        with self._cond:
+            self.streams = max(self.streams - 1, 0)
+            self._cond.notify()
+
+    def submit(self, audio, language='en', deadline_ms=None):
+        """Encola una frase; devuelve un Future con el texto"""
+        deadline_s = self.deadline_s if deadline_ms is None else deadline_ms / 1000.0
+        request = ASRRequest(audio, language, time.monotonic() + deadline_s)
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        return request.future
+
+    def transcribe(self, audio, language='en', deadline_ms=None):
+        """Bloquea hasta tener el texto (para la etapa ASR de cada stream)"""
+        return self.submit(audio, language, deadline_ms).result()
+
+    def _take_batch(self):
+        """Espera a que un lote esté listo y lo saca de la cola (con el lock tomado)"""
+        while self._running:
+            if self._pending:
+                oldest = min(self._pending, key=lambda r: r.deadline)
+                same_language = [r for r in self._pending if r.language == oldest.language]
+                now = time.monotonic()
+                everyone_waiting = self.streams and len(self._pending) >= self.streams
+                if len(same_language) >= self.max_batch or everyone_waiting or now >= oldest.deadline:
+                    batch = same_language[:self.max_batch]
+                    for request in batch:
+                        self._pending.remove(request)
+                    if now > oldest.deadline + 0.05:
+                        self.deadline_misses += 1
+                    return batch
+                self._cond.wait(oldest.deadline - now)
+            else:
+                self._cond.wait()
+        return None
+
+    def _run(self):
+        import torch
+        import whisper
+        if self.cores:
+            pin_current_thread(self.cores)
+        n_mels = self.model.dims.n_mels
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if batch is None:
+                return
+
+            started = time.monotonic()
+            try:
+                # Mel de 30 s por frase (relleno en el dominio mel) → un solo tensor (B, n_mels, 3000)
+                mels = torch.stack([log_mel(r.audio, n_mels) for r in batch]).to(self.model.device)
+                options = whisper.DecodingOptions(language=batch[0].language, fp16=self.fp16,
+                                                  without_timestamps=True)
+                with self.model_lock, torch.no_grad():
+                    results = whisper.decode(self.model, mels, options)
+                for request, result in zip(batch, results):
+                    request.future.set_result("" if is_no_speech(result) else result.text)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+            self.busy_seconds += time.monotonic() - started
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch': self.items / self.batches if self.batches else 0.0,
+            'deadline_misses': self.deadline_misses,
+            'avg_batch_ms': self.busy_seconds / self.batches * 1000.0 if self.batches else 0.0,
+            'pending': len(self._pending),
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"   📊 asr-lote lotes={s['batches']} frases={s['items']} media={s['avg_batch']:.1f}/lote "
+                f"{s['avg_batch_ms']:.0f}ms/lote fuera de plazo={s['deadline_misses']} pendientes={s['pending']}")
@@ -0,0 +1,157 @@
+"""
+Buffers de audio preasignados
+=============================
+Estructuras de tamaño fijo para el camino de captura, pensadas para sesiones
+largas: no crean arrays nuevos por bloque ni por corte.
+"""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Buffer circular float32 de capacidad fija.
+
+    - append() copia el bloque dentro del buffer (sin asignar memoria).
+    - len() es O(1).
+    - view() entrega el contenido como vista sin copia cuando los datos son
+      contiguos, o con UNA sola copia a un array de trabajo preasignado
+      cuando dan la vuelta al final del buffer.
+    - consume(keep) descarta lo leído conservando opcionalmente una "cola"
+      de solapamiento para el siguiente corte.
+
+    Si se escribe más de la capacidad se pierden las muestras más antiguas
+    (se cuentan en `dropped_samples`).
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._scratch = np.empty(capacity, dtype=dtype)
+        self._start = 0
+        self._length = 0
+        self.dropped_samples = 0
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def __len__(self):
+        return self._length
+
+    def clear(self):
+        self._start = 0
+        self._length = 0
+
+    def append(self, samples):
+        """Añade un bloque (mono, cualquier forma) al final del buffer"""
+        samples = np.ravel(samples)
+        n = len(samples)
+        if n == 0:
+            return
+
+        capacity = self.capacity
+        if n >= capacity:
+            # El bloque solo ya llena el buffer: nos quedamos con lo más reciente
+            self.dropped_samples += self._length + n - capacity
+            self._data[:] = samples[-capacity:]
+            self._start = 0
+            self._length = capacity
+            return
+
+        overflow = self._length + n - capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % capacity
+            self._length -= overflow
+            self.dropped_samples += overflow
+
+        end = (self._start + self._length) % capacity
+        first = min(n, capacity - end)
+        self._data[end:end + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        self._length += n
+
+    def view(self):
+        """
+        Contenido actual en orden cronológico.
+        La vista es válida solo hasta la siguiente llamada a append/consume;
+        si otro hilo la va a usar más tarde, usar copy().
+        """
+        end = self._start + self._length
+        if end <= self.capacity:
+            return self._data[self._start:end]
+
+        first = self.capacity - self._start
+        out = self._scratch[:self._length]
+        out[:first] = self._data[self._start:]
+        out[first:] = self._data[:self._length - first]
+        return out
+
+    def copy(self):
+        """Copia independiente del contenido (segura para pasar a otro hilo)"""
+        end = self._start + self._length
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def consume(self, keep=0):
+        """Vacía el buffer conservando las últimas `keep` muestras"""
+        keep = max(0, min(int(keep), self._length))
+        self._start = (self._start + self._length - keep) % self.capacity
+        self._length = keep
+
+
+class SPSCSampleRing:
+    """
+    Anillo de muestras de un solo productor y un solo consumidor, sin locks.
+
+    Los índices de escritura/lectura son contadores que solo crecen y cada
+    uno lo modifica un único hilo (el productor escribe los datos ANTES de
+    publicar write_pos; el consumidor lee ANTES de publicar read_pos), así
+    que bajo el GIL no hace falta ningún lock. read_into() no asigna memoria:
+    está pensado para el callback de audio.
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.write_pos = 0
+        self.read_pos = 0
+        # El productor lo activa mientras una frase se está escribiendo:
+        # una lectura incompleta en ese estado es un underrun real
+        self.active = False
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def free(self):
+        return self.capacity - (self.write_pos - self.read_pos)
+
+    def write(self, samples):
+        """(Productor) Escribe lo que quepa y devuelve cuántas muestras entraron"""
+        n = min(len(samples), self.free())
+        if n <= 0:
+            return 0
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:n]
+        self.write_pos += n
+        return n
+
+    def read_into(self, out):
+        """(Consumidor) Copia hasta len(out) muestras en `out`, rellena con ceros y devuelve las leídas"""
+        n = min(len(out), self.write_pos - self.read_pos)
+        start = self.read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < n:
+            out[first:n] = self._data[:n - first]
+        out[n:] = 0
+        self.read_pos += n
+        return n
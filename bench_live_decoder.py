@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark del decodificador en vivo
+===================================
+Corta frases de 0.5–5 s (semilla fija) de unos clips locales y mide la
+latencia por frase de:
+  - model.transcribe (el camino anterior)
+  - LiveDecoder.transcribe (whisper.decode directo, ver live_decoder.py)
+con el mismo modelo e hilos. Informa p50/p95, aceleración, frases que el
+decodificador descarta (sin voz / alucinación) y el WER de su texto frente
+al de model.transcribe.
+
+Uso: python bench_live_decoder.py clips/*.wav [--model tiny] [--utterances 40] [--threads 4]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from bench_quantization import wer
+from cpu_inference import configure_threads
+from live_decoder import LiveDecoder
+from replay import load_wav
+
+SAMPLE_RATE = 16000
+
+
+def make_utterances(clips, n, min_s, max_s, seed):
+    rng = random.Random(seed)
+    utterances = []
+    for _ in range(n):
+        audio = clips[rng.randrange(len(clips))]
+        length = int(rng.uniform(min_s, max_s) * SAMPLE_RATE)
+        if len(audio) <= length:
+            utterances.append(audio)
+            continue
+        start = rng.randrange(len(audio) - length)
+        utterances.append(audio[start:start + length])
+    return utterances
+
+
+def measure(transcribe, utterances):
+    texts, times = [], []
+    for audio in utterances:
+        started = time.perf_counter()
+        texts.append(transcribe(audio))
+        times.append(time.perf_counter() - started)
+    return texts, np.asarray(times)
+
+
+def summary(name, times):
+    p50, p95 = np.percentile(times, [50, 95])
+    return f"   📊 {name:<12} media={times.mean() * 1000:6.0f}ms p50={p50 * 1000:6.0f}ms p95={p95 * 1000:6.0f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="WAV de los que se cortan las frases")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--utterances", type=int, default=40)
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--max-seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=None, help="Hilos de torch por operación")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    intra, _ = configure_threads(args.threads)
+    clips = [load_wav(path, SAMPLE_RATE) for path in args.clips]
+    utterances = make_utterances(clips, args.utterances, args.min_seconds, args.max_seconds, args.seed)
+    audio_s = sum(len(u) for u in utterances) / SAMPLE_RATE
+    print(f"🔄 {len(utterances)} frases ({audio_s:.1f}s) | modelo '{args.model}' | {intra} hilos")
+
+    import whisper
+    model = whisper.load_model(args.model)
+    decoder = LiveDecoder(model, args.language)
+    # Calentamiento de los dos caminos
+    model.transcribe(utterances[0], language=args.language, fp16=False)
+    decoder.transcribe(utterances[0])
+    decoder = LiveDecoder(model, args.language)
+
+    old_texts, old_times = measure(
+        lambda audio: model.transcribe(audio, language=args.language, fp16=False)["text"].strip(), utterances)
+    new_texts, new_times = measure(decoder.transcribe, utterances)
+
+    print("=" * 70)
+    print(summary("transcribe", old_times))
+    print(summary("live", new_times))
+    print(f"   📊 aceleración x{old_times.sum() / max(new_times.sum(), 1e-9):.2f} "
+          f"(p50 x{np.median(old_times) / max(np.median(new_times), 1e-9):.2f})")
+    print(decoder.format())
+    kept = [i for i, text in enumerate(new_texts) if text]
+    print(f"   📊 WER live frente a transcribe ({len(kept)} frases no descartadas): "
+          f"{wer([old_texts[i] for i in kept], [new_texts[i] for i in kept]):.2%}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
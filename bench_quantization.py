@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Whisper fp32 vs int8 en CPU
+========================================
+Transcribe un conjunto fijo de clips locales con el modelo fp32 y después
+con el mismo modelo cuantizado (cpu_inference.quantize_whisper), con los
+mismos hilos de torch, y compara:
+  - latencia por clip (mediana de --repeats) y aceleración
+  - tamaño de los pesos
+  - deriva de WER: int8 frente a la salida fp32 y, si junto a un clip hay
+    un .txt con la transcripción de referencia (clip.wav → clip.txt), WER
+    de cada modelo frente a ella
+
+Decodificación determinista (temperatura 0, sin condicionar en el texto
+anterior) para que las diferencias vengan solo de la cuantización.
+
+Uso: python bench_quantization.py clips/*.wav [--model base] [--threads 4] [--repeats 3]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from cpu_inference import configure_threads, model_size_mb, quantize_whisper
+from replay import load_wav
+from stitching import tokenize
+
+SAMPLE_RATE = 16000
+
+
+def words(text):
+    return [token for token, _ in tokenize(text)]
+
+
+def word_errors(reference, hypothesis):
+    """Distancia de edición en palabras (sustituciones + borrados + inserciones)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1]
+
+
+def wer(references, hypotheses):
+    """WER agregado sobre varios clips"""
+    errors = total = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        ref, hyp = words(reference), words(hypothesis)
+        errors += word_errors(ref, hyp)
+        total += len(ref)
+    return errors / total if total else 0.0
+
+
+def load_clips(paths):
+    clips = []
+    for path in paths:
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                reference = f.read()
+        clips.append({'path': path, 'audio': load_wav(path, SAMPLE_RATE), 'reference': reference})
+    return clips
+
+
+def run_model(model, clips, language, repeats):
+    """[(texto, mediana en segundos)] por clip"""
+    options = dict(language=language, fp16=False, temperature=0.0, condition_on_previous_text=False)
+    model.transcribe(clips[0]['audio'][:SAMPLE_RATE], **options)  # Calentamiento
+    results = []
+    for clip in clips:
+        times = []
+        text = ""
+        for _ in range(repeats):
+            started = time.perf_counter()
+            text = model.transcribe(clip['audio'], **options)["text"].strip()
+            times.append(time.perf_counter() - started)
+        results.append((text, statistics.median(times)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="WAV de prueba (con .txt de referencia opcional)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--threads", type=int, default=None, help="Hilos de torch por operación")
+    parser.add_argument("--interop-threads", type=int, default=None, help="Hilos de torch entre operaciones")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    intra, inter = configure_threads(args.threads, args.interop_threads)
+    clips = load_clips(args.clips)
+    audio_s = sum(len(c['audio']) for c in clips) / SAMPLE_RATE
+    print(f"🔄 {len(clips)} clips ({audio_s:.1f}s) | modelo '{args.model}' | {intra} hilos, inter-op {inter}")
+
+    import whisper
+    model = whisper.load_model(args.model, device="cpu")
+    fp32_size = model_size_mb(model)
+    fp32 = run_model(model, clips, args.language, args.repeats)
+
+    started = time.perf_counter()
+    model = quantize_whisper(model)
+    quantize_s = time.perf_counter() - started
+    int8_size = model_size_mb(model)
+    int8 = run_model(model, clips, args.language, args.repeats)
+
+    print("=" * 70)
+    for clip, (_, t32), (_, t8) in zip(clips, fp32, int8):
+        print(f"   {os.path.basename(clip['path']):<30} fp32 {t32 * 1000:7.0f}ms  int8 {t8 * 1000:7.0f}ms  "
+              f"x{t32 / max(t8, 1e-9):.2f}")
+    total32 = sum(t for _, t in fp32)
+    total8 = sum(t for _, t in int8)
+    print("-" * 70)
+    print(f"   📊 fp32  {total32:6.2f}s (RTF {total32 / audio_s:.3f}) | pesos {fp32_size:.0f} MB")
+    print(f"   📊 int8  {total8:6.2f}s (RTF {total8 / audio_s:.3f}) | pesos {int8_size:.0f} MB "
+          f"| cuantización {quantize_s:.1f}s")
+    print(f"   📊 aceleración x{total32 / max(total8, 1e-9):.2f}")
+    print(f"   📊 WER int8 frente a fp32: {wer([t for t, _ in fp32], [t for t, _ in int8]):.2%}")
+
+    referenced = [i for i, c in enumerate(clips) if c['reference'] is not None]
+    if referenced:
+        references = [clips[i]['reference'] for i in referenced]
+        wer32 = wer(references, [fp32[i][0] for i in referenced])
+        wer8 = wer(references, [int8[i][0] for i in referenced])
+        print(f"   📊 WER frente a referencia ({len(referenced)} clips): fp32 {wer32:.2%} | int8 {wer8:.2%} "
+              f"| deriva {wer8 - wer32:+.2%}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
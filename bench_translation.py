@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la caché de traducción (sin red)
+=============================================
+Reproduce una secuencia de frases típica de una reunión (con frases
+recurrentes tipo "can you hear me" / "next slide") contra el StubBackend
+con latencia simulada, y compara:
+  - sin caché
+  - caché LRU en memoria
+  - LRU + SQLite (segunda sesión con la caché persistente ya caliente)
+  - coalescencia en lotes de N frases
+
+Uso: python bench_translation.py [--utterances 500] [--latency-ms 150] [--batch 4]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from translation_backends import CachedTranslator, StubBackend
+
+RECURRING = [
+    "Can you hear me?",
+    "Next slide, please.",
+    "You're on mute.",
+    "Let's get started.",
+    "Any questions so far?",
+    "Thank you everyone.",
+    "Can you see my screen?",
+    "Sorry, go ahead.",
+]
+
+
+def make_utterances(n, recurring_ratio, seed):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        if rng.random() < recurring_ratio:
+            out.append(rng.choice(RECURRING))
+        else:
+            out.append(f"This is unique sentence number {i} about topic {rng.randint(0, 10_000)}.")
+    return out
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def run(label, translator, utterances, batch):
+    latencies = []
+    started = time.monotonic()
+    for i in range(0, len(utterances), batch):
+        group = utterances[i:i + batch]
+        t0 = time.monotonic()
+        translator.translate_batch(group)
+        latencies.extend([(time.monotonic() - t0) * 1000.0] * len(group))
+    total = time.monotonic() - started
+    stats = translator.stats()
+    print(f"{label:<28} total={total:6.2f}s  p50={percentile(latencies, 50):6.1f}ms  "
+          f"p95={percentile(latencies, 95):6.1f}ms  aciertos={stats['hit_rate']:5.1%}  "
+          f"llamadas={stats['backend_calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--recurring", type=float, default=0.3, help="Fracción de frases recurrentes")
+    parser.add_argument("--batch", type=int, default=4, help="Tamaño de lote para la prueba de coalescencia")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    utterances = make_utterances(args.utterances, args.recurring, args.seed)
+    backend = lambda: StubBackend(latency_ms=args.latency_ms)
+
+    run("sin caché", CachedTranslator(backend(), cache_size=0), utterances, 1)
+    run("LRU memoria", CachedTranslator(backend()), utterances, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.sqlite")
+        warm = CachedTranslator(backend(), db_path=db)
+        run("LRU + SQLite (1ª sesión)", warm, utterances, 1)
+        warm.close()
+        second = CachedTranslator(backend(), db_path=db)
+        run("LRU + SQLite (2ª sesión)", second, utterances, 1)
+        second.close()
+
+    run(f"LRU + lotes de {args.batch}", CachedTranslator(backend()), utterances, args.batch)
+
+
+if __name__ == "__main__":
+    main()
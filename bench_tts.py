@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark de síntesis TTS concurrente (sin red)
+===============================================
+Levanta un servidor TTS falso en localhost que, por cada petición, espera
+una latencia de primer byte y después envía PCM a una velocidad fija (más
+rápida que tiempo real), como haría Edge-TTS. Compara:
+  - el diseño anterior: asyncio.run() + una conexión por frase, en serie
+  - OrderedSynthesizer con K síntesis concurrentes sobre un loop persistente
+y comprueba que el audio se libera en el orden original.
+
+Uso: python bench_tts.py [--utterances 30] [--latency-ms 300] [--concurrency 1 2 4 8]
+"""
+
+import argparse
+import asyncio
+import queue
+import threading
+import time
+
+import numpy as np
+
+from tts_stream import AsyncTTSRunner, OrderedSynthesizer
+
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 4096
+
+
+class MockTTSServer:
+    """Servidor TCP: recibe una línea de texto y devuelve PCM int16 en streaming"""
+
+    def __init__(self, latency_ms, speed, seconds_per_char):
+        self.latency_s = latency_ms / 1000.0
+        self.speed = speed
+        self.seconds_per_char = seconds_per_char
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True).start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        text = (await reader.readline()).decode("utf-8").strip()
+        await asyncio.sleep(self.latency_s)
+        samples = int(len(text) * self.seconds_per_char * SAMPLE_RATE)
+        payload = (np.random.default_rng(len(text)).standard_normal(samples) * 1000).astype(np.int16).tobytes()
+        chunk_seconds = CHUNK_BYTES / 2 / SAMPLE_RATE
+        for i in range(0, len(payload), CHUNK_BYTES):
+            writer.write(payload[i:i + CHUNK_BYTES])
+            await writer.drain()
+            await asyncio.sleep(chunk_seconds / self.speed)
+        writer.close()
+
+
+def make_client(port):
+    async def synthesize(text, on_pcm):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(text.encode("utf-8") + b"\n")
+        await writer.drain()
+        pending = b""
+        while True:
+            data = await reader.read(CHUNK_BYTES)
+            if not data:
+                break
+            pending += data
+            usable = len(pending) - len(pending) % 2
+            if usable:
+                on_pcm(np.frombuffer(pending[:usable], dtype=np.int16).astype(np.float32) / 32768.0)
+                pending = pending[usable:]
+        writer.close()
+    return synthesize
+
+
+def bench_serial(synthesize, texts):
+    """Diseño anterior: un event loop nuevo por frase, una frase cada vez"""
+    started = time.monotonic()
+    first_audio = []
+    for text in texts:
+        t0 = time.monotonic()
+        chunks = []
+        asyncio.run(synthesize(text, chunks.append))
+        first_audio.append(time.monotonic() - t0)  # Sin streaming: el audio sale al terminar
+    return time.monotonic() - started, first_audio
+
+
+def bench_ordered(synthesize, texts, concurrency):
+    runner = AsyncTTSRunner(concurrency)
+    out = queue.Queue()
+    synth = OrderedSynthesizer(runner, out, synthesize, SAMPLE_RATE)
+    started = time.monotonic()
+    pending = list(enumerate(texts))
+    done = 0
+    errors = []
+    while done < len(texts):
+        while pending and synth.has_capacity():
+            i, text = pending.pop(0)
+            synth.submit(text, str(i))
+        for job in synth.pump(timeout=0.01):
+            done += 1
+            if job.error is not None:
+                errors.append(job.error)
+    total = time.monotonic() - started
+    runner.stop()
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} síntesis fallaron: {errors[0]!r}")
+
+    labels = []
+    while not out.empty():
+        segment = out.get()
+        if segment['first']:
+            labels.append(int(segment['text']))
+    assert labels == list(range(len(texts))), f"¡El audio salió desordenado! {labels}"
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Latencia hasta el primer byte")
+    parser.add_argument("--speed", type=float, default=8.0, help="Velocidad de síntesis (x tiempo real)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = MockTTSServer(args.latency_ms, args.speed, seconds_per_char=0.06)
+    synthesize = make_client(server.port)
+    texts = [f"Frase de prueba número {i} con algo de contenido para sintetizar." for i in range(args.utterances)]
+
+    serial_total, _ = bench_serial(synthesize, texts)
+    print(f"{'asyncio.run por frase':<26} total={serial_total:6.2f}s  {len(texts) / serial_total:5.2f} frases/s")
+    for k in args.concurrency:
+        total = bench_ordered(synthesize, texts, k)
+        print(f"{f'loop persistente K={k}':<26} total={total:6.2f}s  {len(texts) / total:5.2f} frases/s  "
+              f"x{serial_total / total:4.1f}  (orden OK)")
+
+
+if __name__ == "__main__":
+    main()
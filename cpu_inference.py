@@ -0,0 +1,110 @@
+"""
+Inferencia de Whisper en CPU
+============================
+Opciones para máquinas sin GPU (todas opcionales):
+
+- Cuantización dinámica int8 de las capas lineales (atención y MLP del
+  encoder y del decoder): pesos en int8, activaciones cuantizadas al vuelo.
+  Las convoluciones, embeddings y LayerNorm siguen en fp32.
+- Hilos de torch fijos (intra-op e inter-op): por defecto torch usa todos
+  los núcleos y compite con los hilos de audio, VAD y TTS.
+- Afinidad: fija el hilo que ejecuta Whisper a un conjunto de núcleos
+  (solo Linux; los hilos de OpenMP que crea ese hilo la heredan).
+
+torch se importa dentro de cada función: importar este módulo es gratis.
+"""
+
+import os
+import threading
+
+
+def parse_cores(spec):
+    """"2-5,8" → {2, 3, 4, 5, 8} (None o "" → None)"""
+    if not spec:
+        return None
+    if isinstance(spec, (set, list, tuple)):
+        return set(spec)
+    cores = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cores.update(range(int(first), int(last) + 1))
+        elif part:
+            cores.add(int(part))
+    return cores
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Fija los hilos de torch. Hay que llamarlo antes de la primera inferencia:
+    el número de hilos inter-op no se puede cambiar después.
+    Devuelve (intra, inter) efectivos.
+    """
+    import torch
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            print(f"⚠️ No se pudo fijar inter-op={inter_op}: {e}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+def pin_current_thread(cores):
+    """Fija el hilo actual a `cores` (conjunto de índices). Devuelve True si se pudo."""
+    cores = parse_cores(cores)
+    if not cores:
+        return False
+    if not hasattr(os, "sched_setaffinity"):
+        print("⚠️ Afinidad de núcleos no disponible en este sistema")
+        return False
+    try:
+        # En Linux el id nativo del hilo vale como pid para sched_setaffinity
+        os.sched_setaffinity(threading.get_native_id(), cores)
+        return True
+    except OSError as e:
+        print(f"⚠️ No se pudo fijar el hilo a los núcleos {sorted(cores)}: {e}")
+        return False
+
+
+def quantize_whisper(model):
+    """
+    Cuantización dinámica int8 de las capas lineales de un modelo Whisper.
+    Convierte el modelo en su sitio (sin copiar los pesos fp32) y lo devuelve.
+    """
+    import torch
+    import whisper.model
+
+    model = model.cpu()
+    # whisper.model.Linear solo añade la conversión al dtype de la entrada (fp16 en GPU);
+    # quantize_dynamic solo reconoce nn.Linear exacto, así que se tratan como tal
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def model_size_mb(model):
+    """Tamaño aproximado de los pesos (los int8 empaquetados cuentan vía state_dict)"""
+    import torch
+    total = 0
+    for value in model.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            total += sum(v.numel() * v.element_size() for v in value if isinstance(v, torch.Tensor))
+    return total / 1e6
+
+
+def describe(int8=False, intra_op=None, inter_op=None, cores=None):
+    parts = ["int8" if int8 else "fp32"]
+    if intra_op:
+        parts.append(f"{intra_op} hilos")
+    if inter_op:
+        parts.append(f"inter-op {inter_op}")
+    cores = parse_cores(cores)
+    if cores:
+        parts.append(f"núcleos {','.join(str(c) for c in sorted(cores))}")
+    return ", ".join(parts)
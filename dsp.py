@@ -0,0 +1,285 @@
+"""
+Procesado de señal para la reproducción
+=======================================
+- PolyphaseResampler: cambio de frecuencia de muestreo con un filtro
+  paso bajo (sinc con ventana de Kaiser) descompuesto en fases. Sustituye a
+  la interpolación lineal con np.interp, que no filtra (aliasing) y crea dos
+  arrays de tiempos del tamaño de la señal. Funciona por bloques con estado,
+  así que sirve igual para un archivo entero que para PCM que va llegando.
+- WsolaStretcher / wsola_stretch: acelera (o ralentiza) audio sin cambiar
+  el tono con WSOLA (overlap-add de tramas alineadas por correlación), por
+  bloques con estado o sobre una señal completa.
+- StretchController: elige el factor de aceleración según cuánto audio
+  traducido espera para sonar, para que el retraso no crezca sin límite.
+"""
+
+import math
+
+import numpy as np
+
+
+def _kaiser_sinc(length, cutoff, beta):
+    """Filtro paso bajo de `length` coeficientes; `cutoff` relativo a la frecuencia de muestreo"""
+    n = np.arange(length) - (length - 1) / 2.0
+    return 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * np.kaiser(length, beta)
+
+
+class PolyphaseResampler:
+    """
+    Remuestreo racional up/down (p.ej. 24000 → 16000 = 2/3) por bloques.
+
+    process(bloque) devuelve las muestras de salida que ya se pueden calcular;
+    flush() completa la cola al terminar. La concatenación de todas las
+    salidas es ceil(n_entrada * up / down) muestras, alineadas con la entrada
+    (sin retardo del filtro).
+    """
+
+    def __init__(self, orig_rate, target_rate, zero_crossings=16, beta=8.0, max_block=4096):
+        g = math.gcd(int(orig_rate), int(target_rate))
+        self.up = int(target_rate) // g
+        self.down = int(orig_rate) // g
+        self.max_block = max_block
+        # Muestras de entrada a cada lado que cubre el filtro (más anchas si se diezma)
+        self.half = int(math.ceil(zero_crossings * max(1.0, self.down / self.up)))
+        length = 2 * self.half * self.up + 1
+        h = _kaiser_sinc(length, 0.5 / max(self.up, self.down), beta) * self.up
+
+        # Banco de fases: bank[p, k] multiplica a x[base - k]
+        taps = 2 * self.half + 1
+        padded = np.zeros(taps * self.up)
+        padded[:length] = h
+        self.bank = padded.reshape(taps, self.up).T.copy()
+        self.bank /= self.bank.sum(axis=1, keepdims=True)  # Ganancia exacta en continua por fase
+        self.bank = self.bank.astype(np.float32)
+        self._taps = np.arange(taps)
+
+        # x[-half..-1] = 0 para que la primera salida no tenga retardo
+        self._buf = np.zeros(self.half, dtype=np.float32)
+        self._buf_start = -self.half
+        self._n = 0              # Siguiente muestra de salida
+        self._total = 0          # Muestras de entrada recibidas (incluido el relleno final)
+        self._input_len = 0      # Muestras de entrada reales
+
+    def _compute(self, n_end):
+        out = []
+        for n0 in range(self._n, n_end, self.max_block):
+            n = np.arange(n0, min(n0 + self.max_block, n_end))
+            m = n * self.down
+            base = m // self.up + self.half - self._buf_start
+            idx = base[:, None] - self._taps[None, :]
+            out.append(np.einsum('nk,nk->n', self.bank[m % self.up], self._buf[idx]))
+        self._n = n_end
+        # Solo hace falta lo que usará la siguiente salida
+        keep_from = (n_end * self.down) // self.up - self.half
+        drop = keep_from - self._buf_start
+        if drop > 0:
+            self._buf = self._buf[drop:]
+            self._buf_start = keep_from
+        if not out:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(out).astype(np.float32, copy=False)
+
+    def _available(self, limit=None):
+        # La salida n necesita x[floor(n*down/up) + half]
+        n_end = max(-(-(self._total - self.half) * self.up // self.down), self._n)
+        return n_end if limit is None else min(n_end, limit)
+
+    def process(self, samples):
+        if self.up == self.down:
+            return np.asarray(samples, dtype=np.float32)
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self._buf = np.concatenate((self._buf, samples))
+        self._total += len(samples)
+        self._input_len += len(samples)
+        return self._compute(self._available())
+
+    def flush(self):
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        self._buf = np.concatenate((self._buf, np.zeros(self.half, dtype=np.float32)))
+        self._total += self.half
+        expected = -(-self._input_len * self.up // self.down)
+        return self._compute(self._available(expected))
+
+
+def resample(audio, orig_rate, target_rate):
+    """Remuestrea una señal completa (float32 mono)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if orig_rate == target_rate:
+        return audio
+    resampler = PolyphaseResampler(orig_rate, target_rate)
+    return np.concatenate((resampler.process(audio), resampler.flush()))
+
+
+class WsolaStretcher:
+    """
+    Cambia la duración por 1/rate sin cambiar el tono (rate > 1 = más rápido).
+
+    Tramas con ventana de Hann y salto de media trama a la salida; cada trama
+    se toma de la entrada en la posición nominal ± tolerancia que mejor
+    continúa la forma de onda de la anterior (correlación de todos los
+    desplazamientos candidatos en una sola multiplicación matriz-vector).
+
+    Como PolyphaseResampler, funciona por bloques con estado: process() y
+    flush() sobre los trozos de una frase dan lo mismo que la frase entera, sin
+    reiniciar la alineación ni el solapamiento en cada trozo. Señales de menos
+    de dos tramas se devuelven sin cambios.
+    """
+
+    def __init__(self, rate, sample_rate=16000, frame_ms=40, tolerance_ms=10):
+        self.rate = rate
+        self.frame = int(sample_rate * frame_ms / 1000) & ~1
+        self.hop_out = self.frame // 2
+        self.hop_in = self.hop_out * rate
+        self.tolerance = int(sample_rate * tolerance_ms / 1000)
+        self.passthrough = abs(rate - 1.0) < 1e-3
+        self._window = np.hanning(self.frame).astype(np.float32)
+        self._offsets = np.arange(2 * self.tolerance + 1)
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._buf_start = 0      # Índice de entrada de _buf[0]
+        self._total = 0          # Muestras de entrada recibidas
+        self._k = 0              # Siguiente trama
+        self._previous = 0       # Inicio en la entrada de la trama anterior
+        # Overlap-add pendiente a partir de la siguiente muestra de salida
+        self._acc = np.zeros(self.frame, dtype=np.float32)
+        self._norm = np.zeros(self.frame, dtype=np.float32)
+        self._emitted = 0
+
+    def _segment(self, start, length):
+        """x[start:start + length] con ceros fuera de la señal"""
+        out = np.zeros(length, dtype=np.float32)
+        lo, hi = max(start, 0), min(start + length, self._total)
+        if hi > lo:
+            out[lo - start:hi - start] = self._buf[lo - self._buf_start:hi - self._buf_start]
+        return out
+
+    def _n_frames(self):
+        out_len = int(round(self._total / self.rate))
+        return out_len, max(-(-(out_len - self.frame) // self.hop_out) + 1, 1)
+
+    def _compute(self, final):
+        frame, hop_out, tolerance = self.frame, self.hop_out, self.tolerance
+        out_len, n_frames = self._n_frames()
+        last_start = self._total - frame
+        out = []
+        while self._k < n_frames:
+            nominal = int(round(self._k * self.hop_in))
+            if final:
+                nominal = min(nominal, last_start)
+            elif nominal + frame + tolerance > self._total or self._previous + hop_out + frame > self._total:
+                break
+            if self._k == 0:
+                start = 0
+            else:
+                # Lo que habría seguido a la trama anterior en la entrada
+                template = self._segment(self._previous + hop_out, frame)
+                region = self._segment(nominal - tolerance, frame + 2 * tolerance)
+                candidates = np.lib.stride_tricks.sliding_window_view(region, frame)
+                scores = candidates @ template
+                start = min(max(nominal + int(self._offsets[np.argmax(scores)]) - tolerance, 0), last_start)
+            self._acc += self._segment(start, frame) * self._window
+            self._norm += self._window
+            # La primera media trama ya no recibirá más solapamiento
+            out.append(self._acc[:hop_out] / np.maximum(self._norm[:hop_out], 1e-3))
+            self._acc = np.concatenate((self._acc[hop_out:], np.zeros(hop_out, dtype=np.float32)))
+            self._norm = np.concatenate((self._norm[hop_out:], np.zeros(hop_out, dtype=np.float32)))
+            self._previous = start
+            self._k += 1
+
+        if final:
+            out.append(self._acc[:frame - hop_out] / np.maximum(self._norm[:frame - hop_out], 1e-3))
+        else:
+            # Solo hace falta lo que pueden leer la plantilla y los candidatos siguientes
+            # (al final la posición nominal se limita a la última trama completa)
+            keep_from = min(self._previous + hop_out, int(round(self._k * self.hop_in)) - tolerance,
+                            last_start - tolerance)
+            drop = keep_from - self._buf_start
+            if drop > 0:
+                self._buf = self._buf[drop:]
+                self._buf_start = keep_from
+        result = np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+        result = result[:max(out_len - self._emitted, 0)]
+        self._emitted += len(result)
+        return result.astype(np.float32, copy=False)
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if self.passthrough:
+            return samples
+        self._buf = np.concatenate((self._buf, samples))
+        self._total += len(samples)
+        if self._total < 2 * self.frame:
+            return np.zeros(0, dtype=np.float32)
+        return self._compute(final=False)
+
+    def flush(self):
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        if self._total < 2 * self.frame:
+            # Demasiado corta para estirar: sale tal cual
+            short, self._buf = self._buf, np.zeros(0, dtype=np.float32)
+            return short
+        return self._compute(final=True)
+
+
+def wsola_stretch(audio, rate, sample_rate=16000, frame_ms=40, tolerance_ms=10):
+    """Estira una señal completa con WsolaStretcher (float32 mono)"""
+    stretcher = WsolaStretcher(rate, sample_rate, frame_ms, tolerance_ms)
+    return np.concatenate((stretcher.process(audio), stretcher.flush()))
+
+
+class StretchController:
+    """
+    Factor de aceleración según el audio pendiente de sonar (`backlog_s`).
+
+    Hasta `start_s` se reproduce a velocidad normal; a partir de ahí el
+    factor sube linealmente hasta `max_rate` cuando el retraso alcanza
+    `max_lag_s`. Así las ráfagas cortas suenan igual y un orador rápido no
+    deja la traducción minutos por detrás.
+
+    El factor se elige una vez por frase (en su primer trozo) y todos sus
+    trozos pasan por el mismo WsolaStretcher, que se vacía en el último.
+    """
+
+    def __init__(self, max_lag_s=8.0, start_s=3.0, max_rate=1.5):
+        self.max_lag_s = max_lag_s
+        self.start_s = min(start_s, max_lag_s)
+        self.max_rate = max(1.0, max_rate)
+        self.stretched = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+        self.last_rate = 1.0
+        self.max_backlog_s = 0.0
+        self._stretcher = None   # WsolaStretcher de la frase en curso (None = velocidad normal)
+
+    def rate_for(self, backlog_s):
+        self.max_backlog_s = max(self.max_backlog_s, backlog_s)
+        if backlog_s <= self.start_s:
+            return 1.0
+        if backlog_s >= self.max_lag_s:
+            return self.max_rate
+        fraction = (backlog_s - self.start_s) / max(self.max_lag_s - self.start_s, 1e-9)
+        return 1.0 + fraction * (self.max_rate - 1.0)
+
+    def apply(self, audio, backlog_s, sample_rate, first=True, last=True):
+        """Trozo `audio` de una frase; `backlog_s` solo se mira en el primero"""
+        if first:
+            rate = self.rate_for(backlog_s)
+            self.last_rate = rate
+            self._stretcher = WsolaStretcher(rate, sample_rate) if rate > 1.01 else None
+            if self._stretcher is not None:
+                self.stretched += 1
+        stretcher = self._stretcher
+        if stretcher is None:
+            return audio
+        stretched = stretcher.process(audio)
+        if last:
+            stretched = np.concatenate((stretched, stretcher.flush()))
+            self._stretcher = None
+        self.seconds_in += len(audio) / sample_rate
+        self.seconds_out += len(stretched) / sample_rate
+        return stretched
+
+    def format(self):
+        return (f"   📊 acelerado {self.stretched} frases, {self.seconds_in - self.seconds_out:.1f}s recuperados "
+                f"(factor actual x{self.last_rate:.2f}, retraso máx {self.max_backlog_s:.1f}s)")
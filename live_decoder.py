@@ -0,0 +1,130 @@
+"""
+Decodificación directa para frases cortas en vivo
+=================================================
+model.transcribe está pensado para archivos: rellena el audio con 30 s de
+ceros y calcula el mel de todo, recorre el audio con su bucle de búsqueda,
+calcula marcas de tiempo, condiciona en el texto anterior y reintenta con
+hasta 5 temperaturas. Para una frase de 0.5–5 s cortada por el VAD nada de
+eso hace falta.
+
+LiveDecoder:
+- calcula el log-mel solo del audio real y rellena hasta 30 s (3000 tramas)
+  con el valor que tendría el silencio, en lugar de pasar 30 s de ceros por
+  la STFT;
+- reutiliza unas DecodingOptions construidas una vez (voraz, sin marcas de
+  tiempo, idioma fijo, tokens acotados);
+- como mucho `max_fallbacks` reintentos con temperatura si la salida parece
+  una alucinación repetitiva (ratio de compresión) o muy improbable;
+- descarta sin más trabajo las salidas sin voz o improbables, así no llegan
+  ni a MT ni a TTS.
+
+torch y whisper se importan al usarlo: importar este módulo es gratis.
+"""
+
+import dataclasses
+
+import numpy as np
+
+# Mismos criterios que whisper.transcribe
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+N_FRAMES = 3000              # 30 s de mel: la ventana fija del encoder
+
+
+def log_mel(audio, n_mels=80):
+    """
+    Log-mel (n_mels, 3000) del audio sin rellenarlo antes con ceros.
+    El relleno se añade ya en el dominio mel con el valor del silencio tras
+    la normalización de Whisper (máximo - 2), que es lo que daría la STFT
+    de los ceros.
+    """
+    import torch
+    import whisper
+
+    audio = np.asarray(audio, dtype=np.float32)[:N_FRAMES * whisper.audio.HOP_LENGTH]
+    # Una ventana de ceros tras el audio: las últimas tramas con voz salen como con el relleno completo
+    mel = whisper.log_mel_spectrogram(audio, n_mels, padding=whisper.audio.N_FFT)
+    frames = mel.shape[-1]
+    if frames >= N_FRAMES:
+        return mel[:, :N_FRAMES]
+    silence = mel.max() - 2.0
+    return torch.cat((mel, silence.expand(mel.shape[0], N_FRAMES - frames)), dim=-1)
+
+
+def is_no_speech(result, no_speech_threshold=NO_SPEECH_THRESHOLD, logprob_threshold=LOGPROB_THRESHOLD):
+    """Ventana sin voz según whisper.transcribe (probable silencio y texto poco probable)"""
+    return result.no_speech_prob > no_speech_threshold and result.avg_logprob < logprob_threshold
+
+
+def needs_fallback(result, logprob_threshold=LOGPROB_THRESHOLD,
+                   compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD):
+    """Salida repetitiva o muy improbable: merece otro intento con temperatura"""
+    return result.compression_ratio > compression_ratio_threshold or result.avg_logprob < logprob_threshold
+
+
+class LiveDecoder:
+    def __init__(self, model, language='en', max_tokens=128, max_fallbacks=1, fallback_temperature=0.4):
+        import whisper
+
+        self.model = model
+        self.n_mels = model.dims.n_mels
+        self.options = whisper.DecodingOptions(
+            task="transcribe", language=language, temperature=0.0, sample_len=max_tokens,
+            without_timestamps=True, fp16=False,
+        )
+        step = fallback_temperature / max(max_fallbacks, 1)
+        self.fallbacks = [dataclasses.replace(self.options, temperature=step * (i + 1))
+                          for i in range(max_fallbacks)]
+        self.decoded = 0
+        self.fallback_runs = 0
+        self.discarded_no_speech = 0
+        self.discarded_hallucination = 0
+        self.discarded_low_logprob = 0
+
+    def decode(self, audio):
+        """DecodingResult de la frase (tras los reintentos que hagan falta)"""
+        import torch
+        import whisper
+
+        mel = log_mel(audio, self.n_mels).to(self.model.device)
+        with torch.no_grad():
+            result = whisper.decode(self.model, mel, self.options)
+            for options in self.fallbacks:
+                if is_no_speech(result) or not needs_fallback(result):
+                    break
+                self.fallback_runs += 1
+                result = whisper.decode(self.model, mel, options)
+        self.decoded += 1
+        return result
+
+    def transcribe(self, audio):
+        """Texto de la frase, o "" si no hay voz, es una alucinación o es muy improbable"""
+        result = self.decode(audio)
+        if is_no_speech(result):
+            self.discarded_no_speech += 1
+            return ""
+        if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+            # Sigue repitiéndose tras los reintentos: no vale la pena traducirlo
+            self.discarded_hallucination += 1
+            return ""
+        if result.avg_logprob < LOGPROB_THRESHOLD:
+            # Improbable incluso tras los reintentos: suele ser ruido transcrito como texto
+            self.discarded_low_logprob += 1
+            return ""
+        return result.text.strip()
+
+    def stats(self):
+        return {
+            'decoded': self.decoded,
+            'fallback_runs': self.fallback_runs,
+            'discarded_no_speech': self.discarded_no_speech,
+            'discarded_hallucination': self.discarded_hallucination,
+            'discarded_low_logprob': self.discarded_low_logprob,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"   📊 decodificador {s['decoded']} frases | reintentos {s['fallback_runs']} | "
+                f"descartadas: sin voz {s['discarded_no_speech']}, alucinación {s['discarded_hallucination']}, "
+                f"improbables {s['discarded_low_logprob']}")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para server.py
+=================================
+Abre N conexiones WebSocket a la vez; cada una reproduce un WAV (en turno
+rotatorio si se pasan varios) en bloques de `--block-ms`, a ritmo real o tan
+rápido como el servidor acepte, y al final manda {"type": "end"}.
+
+Informa:
+- rendimiento: segundos de audio procesados por segundo de reloj (agregado)
+  y frases finales por segundo;
+- latencia por etapa (p50/p95/p99) de los eventos "latency" del servidor
+  (vad, asr, mt, tts, e2e = primera voz → primer audio enviado);
+- latencia de cliente: primera respuesta tras mandar el audio y cierre
+  (de {"type": "end"} a "done").
+
+Uso: python load_generator.py prueba.wav otra.wav -n 8 [--pace realtime] [--url ws://127.0.0.1:8765]
+Requiere: pip install websockets (>= 13)
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+
+from replay import PACE_FAST, PACE_REALTIME, load_wav
+
+SAMPLE_RATE = 16000
+
+
+def percentiles(values):
+    if not values:
+        return None
+    p = np.percentile(np.asarray(values, dtype=np.float64), [50, 95, 99])
+    return {'count': len(values), 'p50': float(p[0]), 'p95': float(p[1]), 'p99': float(p[2])}
+
+
+async def run_client(index, url, pcm, pace, block_ms):
+    from websockets.asyncio.client import connect
+
+    result = {'client': index, 'finals': 0, 'audio_out_bytes': 0, 'stages': {}, 'error': None,
+              'first_final_s': None, 'close_s': None, 'done': None}
+    block = int(SAMPLE_RATE * block_ms / 1000) * 2
+    try:
+        async with connect(url, max_size=None) as ws:
+            ready = json.loads(await ws.recv())
+            started = time.monotonic()
+
+            async def receive():
+                async for message in ws:
+                    if isinstance(message, bytes):
+                        result['audio_out_bytes'] += len(message)
+                        continue
+                    event = json.loads(message)
+                    if event['type'] == 'final':
+                        result['finals'] += 1
+                        if result['first_final_s'] is None:
+                            result['first_final_s'] = time.monotonic() - started
+                    elif event['type'] == 'latency':
+                        for stage, seconds in event['stages'].items():
+                            result['stages'].setdefault(stage, []).append(seconds)
+                    elif event['type'] == 'done':
+                        result['done'] = event
+                        return
+
+            receiver = asyncio.create_task(receive())
+            for offset in range(0, len(pcm), block):
+                await ws.send(pcm[offset:offset + block])
+                if pace == PACE_REALTIME:
+                    # Reloj absoluto: los retrasos de un envío no se acumulan
+                    target = started + (offset + block) / 2 / SAMPLE_RATE
+                    await asyncio.sleep(max(target - time.monotonic(), 0))
+            end_sent = time.monotonic()
+            await ws.send(json.dumps({'type': 'end'}))
+            await receiver
+            result['close_s'] = time.monotonic() - end_sent
+            result['session'] = ready.get('session')
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_load(url, files, connections, pace, block_ms):
+    clips = []
+    for path in files:
+        audio = load_wav(path, SAMPLE_RATE)
+        clips.append((audio, (np.clip(audio, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()))
+
+    started = time.monotonic()
+    results = await asyncio.gather(*[
+        run_client(i, url, clips[i % len(clips)][1], pace, block_ms) for i in range(connections)
+    ])
+    wall = time.monotonic() - started
+    audio_s = sum(len(clips[i % len(clips)][0]) for i in range(connections)) / SAMPLE_RATE
+    return results, audio_s, wall
+
+
+def report(results, audio_s, wall):
+    ok = [r for r in results if r['error'] is None and r['done'] is not None]
+    failed = [r for r in results if r not in ok]
+    finals = sum(r['finals'] for r in ok)
+    out_s = sum(r['audio_out_bytes'] for r in ok) / 2 / SAMPLE_RATE
+    dropped = sum(r['done']['dropped_s'] for r in ok)
+
+    print("=" * 70)
+    print(f"   📊 conexiones {len(ok)}/{len(results)} correctas | audio {audio_s:.1f}s en {wall:.1f}s "
+          f"(x{audio_s / max(wall, 1e-9):.1f} tiempo real agregado)")
+    print(f"   📊 frases {finals} ({finals / max(wall, 1e-9):.2f}/s) | audio sintetizado {out_s:.1f}s "
+          f"| descartado por contrapresión {dropped:.1f}s")
+
+    stages = {}
+    for r in ok:
+        for stage, values in r['stages'].items():
+            stages.setdefault(stage, []).extend(values)
+    for stage, values in stages.items():
+        s = percentiles(values)
+        print(f"   📊 lat {stage:<14} p50={s['p50'] * 1000:6.0f}ms p95={s['p95'] * 1000:6.0f}ms "
+              f"p99={s['p99'] * 1000:6.0f}ms (n={s['count']})")
+    for name, key in (('primera frase', 'first_final_s'), ('cierre', 'close_s')):
+        s = percentiles([r[key] for r in ok if r[key] is not None])
+        if s:
+            print(f"   📊 cliente {name:<12} p50={s['p50'] * 1000:6.0f}ms p95={s['p95'] * 1000:6.0f}ms "
+                  f"p99={s['p99'] * 1000:6.0f}ms (n={s['count']})")
+    for r in failed:
+        print(f"   ❌ conexión {r['client']}: {r['error'] or 'sin respuesta final'}")
+    print("=" * 70)
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="WAV que reproduce cada conexión (en turno rotatorio)")
+    parser.add_argument("-n", "--connections", type=int, default=4)
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/?source=en&target=es")
+    parser.add_argument("--pace", choices=[PACE_FAST, PACE_REALTIME], default=PACE_REALTIME)
+    parser.add_argument("--block-ms", type=int, default=100, help="Audio por mensaje")
+    args = parser.parse_args()
+
+    results, audio_s, wall = asyncio.run(run_load(args.url, args.files, args.connections, args.pace, args.block_ms))
+    sys.exit(0 if report(results, audio_s, wall) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Trazas de latencia por frase
+============================
+Cada frase lleva un ID de traza y acumula marcas de tiempo monotónicas:
+
+    captured        primer bloque con voz (llegada al callback de entrada)
+    cut             corte del VAD (la frase entra en la cola ASR)
+    asr_done        Whisper terminó
+    mt_done         traducción terminada
+    tts_ready       primer audio de TTS disponible
+    playback_start  el callback de salida empieza a reproducirla
+    playback_end    terminó de sonar
+
+mark() solo hace un deque.append (atómico bajo el GIL, sin locks), así que
+se puede llamar desde cualquier hilo. collect() procesa las marcas fuera de
+los hilos de audio y calcula la duración de cada etapa; MetricsExporter
+vuelca periódicamente p50/p95/p99 como JSON lines y como archivo de texto
+de Prometheus (para el textfile collector de node_exporter). La cola de
+marcas está acotada: si nadie llama a collect(), se pierden las más
+antiguas (y se cuentan en events_dropped).
+"""
+
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# (etapa, marca inicial, marca final)
+STAGES = (
+    ('vad', 'captured', 'cut'),
+    ('asr', 'cut', 'asr_done'),
+    ('mt', 'asr_done', 'mt_done'),
+    ('tts', 'mt_done', 'tts_ready'),
+    ('playback_wait', 'tts_ready', 'playback_start'),
+    ('playback', 'playback_start', 'playback_end'),
+    ('e2e', 'captured', 'playback_start'),
+)
+TERMINAL_EVENTS = ('playback_end', 'discarded')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyTracker:
+    """Marcas por traza → duraciones por etapa con percentiles"""
+
+    def __init__(self, history=1000, expire_s=300.0, on_finished=None, max_pending=100000):
+        self._ids = itertools.count(1)
+        self._events = collections.deque(maxlen=max_pending)  # (ids, evento, t) sin procesar
+        self.events_dropped = 0             # Marcas perdidas con la cola llena (aprox., sin lock)
+        self._open = {}                     # id → {evento: t}
+        self.expire_s = expire_s
+        self.samples = {name: collections.deque(maxlen=history) for name, _, _ in STAGES}
+        self.totals = {name: [0, 0.0] for name, _, _ in STAGES}  # cuenta y suma desde el inicio
+        self.completed = 0
+        self.discarded = 0
+        self.expired = 0
+        self._finished = collections.deque(maxlen=10000)  # trazas cerradas pendientes de volcar
+        self.on_finished = on_finished      # on_finished(id, {etapa: segundos}) al cerrar cada traza
+        self._lock = threading.Lock()       # Solo entre lectores: mark() no lo toma
+
+    def start(self, captured_at=None):
+        """Abre una traza nueva y devuelve su ID"""
+        trace_id = next(self._ids)
+        self.mark((trace_id,), 'captured', captured_at)
+        return trace_id
+
+    def mark(self, trace_ids, event, t=None):
+        """Anota `event` para todas las trazas de `trace_ids` (barato: un append)"""
+        if trace_ids:
+            if len(self._events) == self._events.maxlen:
+                self.events_dropped += 1
+            self._events.append((trace_ids, event, time.monotonic() if t is None else t))
+
+    def collect(self):
+        """Procesa las marcas pendientes (nunca desde un callback de audio)"""
+        with self._lock:
+            self._collect()
+
+    def _collect(self):
+        while True:
+            try:
+                trace_ids, event, t = self._events.popleft()
+            except IndexError:
+                break
+            for trace_id in trace_ids:
+                marks = self._open.setdefault(trace_id, {})
+                marks.setdefault(event, t)
+                if event in TERMINAL_EVENTS:
+                    self._close(trace_id, marks)
+
+        now = time.monotonic()
+        for trace_id in [i for i, m in self._open.items() if now - min(m.values()) > self.expire_s]:
+            # Perdida por el camino (p.ej. descartada por una cola llena)
+            del self._open[trace_id]
+            self.expired += 1
+
+    def _close(self, trace_id, marks):
+        del self._open[trace_id]
+        if 'discarded' in marks:
+            self.discarded += 1
+        else:
+            self.completed += 1
+        stages = {}
+        for name, begin, end in STAGES:
+            if begin in marks and end in marks:
+                seconds = marks[end] - marks[begin]
+                stages[name] = seconds
+                self.samples[name].append(seconds)
+                self.totals[name][0] += 1
+                self.totals[name][1] += seconds
+        self._finished.append({'trace': trace_id, 'discarded': 'discarded' in marks, 'stages': stages})
+        if self.on_finished is not None:
+            self.on_finished(trace_id, stages)
+
+    def pop_finished(self):
+        with self._lock:
+            finished = list(self._finished)
+            self._finished.clear()
+        return finished
+
+    def percentiles(self):
+        """{etapa: {'count', 'p50', 'p95', 'p99'}} sobre las últimas `history` frases"""
+        out = {}
+        with self._lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        for name, values in samples.items():
+            if not values:
+                continue
+            p = np.percentile(np.asarray(values, dtype=np.float64), [q * 100 for q in QUANTILES])
+            out[name] = {'count': len(values), 'p50': float(p[0]), 'p95': float(p[1]), 'p99': float(p[2])}
+        return out
+
+    def format(self):
+        self.collect()
+        lines = []
+        for name, s in self.percentiles().items():
+            lines.append(f"   📊 lat {name:<14} p50={s['p50'] * 1000:6.0f}ms p95={s['p95'] * 1000:6.0f}ms "
+                         f"p99={s['p99'] * 1000:6.0f}ms (n={s['count']})")
+        return "\n".join(lines)
+
+    def prometheus_text(self, prefix="translator"):
+        lines = [
+            f"# HELP {prefix}_stage_latency_seconds Latencia por etapa de cada frase",
+            f"# TYPE {prefix}_stage_latency_seconds summary",
+        ]
+        percentiles = self.percentiles()
+        for name, _, _ in STAGES:
+            count, total = self.totals[name]
+            for q in QUANTILES:
+                value = percentiles[name][f"p{int(q * 100)}"] if name in percentiles else float("nan")
+                lines.append(f'{prefix}_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{name}"}} {count}')
+        for metric, value in (('completed', self.completed), ('discarded', self.discarded),
+                              ('expired', self.expired)):
+            lines.append(f"# TYPE {prefix}_utterances_{metric}_total counter")
+            lines.append(f"{prefix}_utterances_{metric}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Hilo que cada `interval_s` procesa las marcas y vuelca JSONL y Prometheus"""
+
+    def __init__(self, tracker, interval_s=10.0, jsonl_path=None, prom_path=None, is_running=None):
+        self.tracker = tracker
+        self.interval_s = interval_s
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self._is_running = is_running or (lambda: True)
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        next_export = time.monotonic() + self.interval_s
+        while self._is_running():
+            time.sleep(0.2)
+            if time.monotonic() >= next_export:
+                next_export += self.interval_s
+                self.export()
+
+    def export(self):
+        with self._lock:
+            try:
+                self.tracker.collect()
+                if self.jsonl_path:
+                    self._write_jsonl()
+                if self.prom_path:
+                    # Escritura atómica: el collector nunca lee un archivo a medias
+                    tmp_path = self.prom_path + ".tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(self.tracker.prometheus_text())
+                    os.replace(tmp_path, self.prom_path)
+            except Exception as e:
+                print(f"⚠️ Error exportando métricas: {e}")
+
+    def _write_jsonl(self):
+        now = time.time()
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            for trace in self.tracker.pop_finished():
+                f.write(json.dumps({'type': 'trace', 'time': now, **trace}) + "\n")
+            f.write(json.dumps({
+                'type': 'summary',
+                'time': now,
+                'completed': self.tracker.completed,
+                'discarded': self.tracker.discarded,
+                'expired': self.tracker.expired,
+                'events_dropped': self.tracker.events_dropped,
+                'stages': self.tracker.percentiles(),
+            }) + "\n")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Varios streams en un solo proceso
+=================================
+Cada stream tiene su captura, VAD, par de idiomas, voz y dispositivo de
+salida (un AudioTranslator completo), pero todos comparten UN modelo
+Whisper a través de BatchedASRScheduler: las frases pendientes de todas las
+salas se decodifican juntas en una sola pasada del encoder.
+
+Configuración (JSON), una entrada por stream:
+
+    [
+      {"name": "sala1", "input": 3, "output": 5, "source": "en", "target": "es",
+       "voice": "es-ES-ElviraNeural"},
+      {"name": "sala2", "file": "prueba.wav", "source": "en", "target": "fr",
+       "voice": "fr-FR-DeniseNeural"}
+    ]
+
+"input"/"output" son índices de dispositivo de sounddevice; con "file" el
+stream se alimenta desde un WAV (modo offline, ver replay.py) y la salida
+va a "output_wav" o a un sumidero nulo. Con "targets" (en lugar de
+"target"/"voice") una misma sala se traduce a varios idiomas, cada uno en su
+canal o dispositivo (ver TARGETS en translator.py):
+
+    "targets": [{"lang": "es", "channel": 0}, {"lang": "fr", "channel": 1}]
+
+"deadline_ms" (opcional) fija el plazo de lote de las frases de ese stream
+(por defecto --deadline-ms): una sala interactiva puede pedir menos espera.
+
+Uso: python multi_stream.py streams.json [--max-batch 8] [--deadline-ms 250] [--pace fast]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+import translator as tr
+from asr_scheduler import BatchedASRScheduler
+from replay import PACE_FAST, PACE_REALTIME, NullSink, ReplayClock, WavSink, load_wav
+from startup import StartupProfiler
+
+
+class MultiStreamHost:
+    def __init__(self, configs, max_batch=8, deadline_ms=250, pace=PACE_FAST, profiler=None):
+        self.configs = configs
+        self.pace = pace
+        self.profiler = profiler or StartupProfiler()
+        print(f"🔄 Cargando modelo Whisper '{tr.WHISPER_MODEL}' (compartido por {len(configs)} streams)...")
+        self.model_loader = tr.create_model_loader(self.profiler)
+        self.max_batch = max_batch
+        self.deadline_ms = deadline_ms
+        self.scheduler = None
+        self.streams = []
+        for config in configs:
+            stream = tr.AudioTranslator(
+                self.profiler,
+                name=config['name'],
+                source_lang=config.get('source', 'en'),
+                target_lang=config.get('target', 'es'),
+                voice=config.get('voice'),
+                model_loader=self.model_loader,
+                # Varios idiomas para la misma sala: [{'lang', 'voice', 'channel', 'device'}]
+                targets=config.get('targets'),
+                asr_deadline_ms=config.get('deadline_ms'),
+            )
+            self.streams.append(stream)
+
+    def start(self):
+        """Espera al modelo y conecta todos los streams al planificador compartido"""
+        model = self.model_loader.wait()
+        self.scheduler = BatchedASRScheduler(model, self.max_batch, self.deadline_ms,
+                                             cores=tr.ASR_CPU_CORES).start()
+        for stream in self.streams:
+            self.scheduler.register_stream()
+            stream.asr_scheduler = self.scheduler
+            stream.model = model
+
+    def run(self):
+        try:
+            self.start()
+        except Exception as e:
+            print(f"❌ Error cargando el modelo: {e}")
+            return
+
+        threads = []
+        opened = []
+        clocks = []
+        started = time.monotonic()
+        try:
+            for stream, config in zip(self.streams, self.configs):
+                process_thread = stream._start_workers()
+                threads.append(process_thread)
+                if 'file' in config:
+                    clock = self._replay_clock(stream, config)
+                    clocks.append(clock)
+                    t = threading.Thread(target=clock.run, args=(lambda s=stream: s.is_running,),
+                                         name=f"replay-{config['name']}", daemon=True)
+                    t.start()
+                    clock.thread = t
+                else:
+                    input_stream, output_stream = stream.open_streams(config['input'], config['output'])
+                    streams = [input_stream, output_stream] + stream.open_target_streams()
+                    for s in streams:
+                        s.start()
+                    opened.extend(streams)
+                targets = ", ".join(f"{t.lang} ({t.voice})" for t in stream.targets)
+                print(f"🟢 {config['name']}: {stream.source_lang} → {targets}")
+
+            print("   (Ctrl+C para detener)\n")
+            last_stats = time.monotonic()
+            while True:
+                time.sleep(0.1)
+                if clocks and not opened and all(not c.thread.is_alive() for c in clocks):
+                    break  # Solo archivos y todos terminados
+                if tr.STATS_INTERVAL_S and time.monotonic() - last_stats >= tr.STATS_INTERVAL_S:
+                    last_stats = time.monotonic()
+                    self.print_stats()
+
+        except KeyboardInterrupt:
+            print("\n\n🛑 Deteniendo...")
+        finally:
+            for s in opened:
+                s.stop()
+                s.close()
+            self.print_stats()
+            for clock in clocks:
+                print(ReplayClock.format(clock.summary()))
+            if clocks:
+                audio = sum(c.audio_seconds for c in clocks)
+                wall = time.monotonic() - started
+                print(f"   📊 total {len(clocks)} streams: {audio:.1f}s de audio en {wall:.1f}s "
+                      f"(x{audio / max(wall, 1e-9):.1f} tiempo real agregado)")
+            for stream, process_thread in zip(self.streams, threads):
+                stream._shutdown(process_thread)
+            if self.scheduler is not None:
+                self.scheduler.stop()
+
+    def _replay_clock(self, stream, config):
+        audio = load_wav(config['file'], tr.SAMPLE_RATE)
+        # Sin dispositivos: todos los idiomas van al WAV, cada uno en su canal
+        stream.output_targets = stream.targets
+        channels = stream.output_channels(stream.targets)
+        sink = WavSink(config['output_wav'], tr.SAMPLE_RATE, channels) if config.get('output_wav') else NullSink()
+        return ReplayClock(
+            audio, tr.BLOCK_SIZE, tr.SAMPLE_RATE, stream.input_callback, stream.output_callback,
+            sink=sink, output_channels=channels, pace=self.pace,
+            tail_s=(tr.VAD_HANGOVER_MS + tr.SILENCE_TRIGGER_MS) / 1000.0 + 0.5,
+            can_feed=lambda: (stream.audio_queue.qsize() < stream.audio_queue.maxsize - 1
+                              and stream.asr_queue.qsize() < stream.asr_queue.maxsize),
+            output_ready=stream.output_ready,
+            is_idle=stream.pipeline_idle,
+        )
+
+    def print_stats(self):
+        for stream in self.streams:
+            print(f"   ── {stream.name} ──")
+            stream.print_stats()
+        if self.scheduler is not None:
+            print(self.scheduler.format())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", help="JSON con la lista de streams")
+    parser.add_argument("--max-batch", type=int, default=8, help="Frases por pasada del encoder")
+    parser.add_argument("--deadline-ms", type=float, default=250,
+                        help="Espera máxima de una frase para formar lote")
+    parser.add_argument("--pace", choices=[PACE_FAST, PACE_REALTIME], default=PACE_FAST,
+                        help="Ritmo de los streams alimentados desde archivo")
+    parser.add_argument("--mt", choices=["google", "stub"], default=tr.TRANSLATOR_BACKEND)
+    parser.add_argument("--tts", choices=["edge", "stub"], default=tr.TTS_BACKEND)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    tr.TRANSLATOR_BACKEND = args.mt
+    tr.TTS_BACKEND = args.tts
+    with open(args.config, "r", encoding="utf-8") as f:
+        configs = json.load(f)
+    names = [c.get('name') for c in configs]
+    if not configs or None in names or len(set(names)) != len(names):
+        print("❌ Cada stream necesita un 'name' único")
+        sys.exit(1)
+    if not tr.check_requirements(need_devices=any('file' not in c for c in configs)):
+        sys.exit(1)
+    MultiStreamHost(configs, args.max_batch, args.deadline_ms, args.pace).run()
@@ -0,0 +1,250 @@
+"""
+Etapas del pipeline con colas acotadas
+======================================
+Cada etapa (segmentación, ASR, traducción, TTS) corre en su propio hilo y se
+comunica con la siguiente a través de una BoundedQueue. Si una etapa lenta
+llena su cola de entrada, la política de desbordamiento decide qué pasa:
+
+- "block":       el productor espera a que haya sitio (contrapresión).
+- "drop_oldest": se descarta el elemento más antiguo de la cola.
+- "merge":       el nuevo elemento se fusiona con el último de la cola
+                 (p.ej. dos frases seguidas se traducen de una vez). Si la
+                 función de fusión no puede unirlos, se descarta el más antiguo.
+
+Cada elemento que la cola tira (o que una fusión absorbe) se notifica a
+`on_discard(item, kept)`, con `kept` = el elemento fusionado que lo
+sustituye (None si se perdió del todo), para cerrar su traza de latencia.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_MERGE = "merge"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_MERGE)
+
+
+class StageStats:
+    """Contadores de una etapa: profundidad, entradas, salidas, descartes y tiempo de servicio"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.put_count = 0
+        self.processed = 0
+        self.dropped = 0
+        self.merged = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.busy_seconds = 0.0
+
+    def record_put(self, depth):
+        with self._lock:
+            self.put_count += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def record_merge(self):
+        with self._lock:
+            self.merged += 1
+
+    def record_done(self, seconds, error=False, count=1):
+        with self._lock:
+            self.processed += count
+            self.busy_seconds += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self, depth=0):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                'stage': self.name,
+                'depth': depth,
+                'max_depth': self.max_depth,
+                'in': self.put_count,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'merged': self.merged,
+                'errors': self.errors,
+                'throughput_per_s': self.processed / elapsed,
+                'avg_service_ms': (self.busy_seconds / self.processed * 1000.0) if self.processed else 0.0,
+                'utilization': self.busy_seconds / elapsed,
+            }
+
+
+class BoundedQueue:
+    """
+    Cola acotada con política de desbordamiento configurable.
+    get() lanza queue.Empty igual que queue.Queue para que los workers
+    existentes no cambien su bucle.
+    """
+
+    def __init__(self, name, maxsize, policy=OVERFLOW_BLOCK, merge_fn=None, on_discard=None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento desconocida: {policy}")
+        if policy == OVERFLOW_MERGE and merge_fn is None:
+            raise ValueError("La política 'merge' necesita merge_fn")
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.merge_fn = merge_fn
+        self.on_discard = on_discard
+        self.stats = StageStats(name)
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _discard(self, item, kept=None):
+        if self.on_discard is not None:
+            self.on_discard(item, kept)
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def close(self):
+        """Despierta a todos los que esperan; los put() posteriores se descartan"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def put(self, item, timeout=None):
+        """Encola respetando la política. Devuelve False si el elemento no entró."""
+        with self._cond:
+            if self._closed:
+                self._discard(item)
+                return False
+
+            if len(self._items) >= self.maxsize:
+                if self.policy == OVERFLOW_BLOCK:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.stats.record_drop()
+                            self._discard(item)
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        self._discard(item)
+                        return False
+                elif self.policy == OVERFLOW_MERGE:
+                    previous = self._items[-1]
+                    merged = self.merge_fn(previous, item)
+                    if merged is not None:
+                        self._items[-1] = merged
+                        self.stats.record_merge()
+                        self._discard(previous, merged)
+                        self._discard(item, merged)
+                        self._cond.notify()
+                        return True
+                    self._discard(self._items.popleft())
+                    self.stats.record_drop()
+                else:
+                    self._discard(self._items.popleft())
+                    self.stats.record_drop()
+
+            self._items.append(item)
+            self.stats.record_put(len(self._items))
+            self._cond.notify()
+            return True
+
+    def put_nowait(self, item):
+        """Nunca bloquea (para callbacks de audio): con política 'block' descarta el nuevo"""
+        return self.put(item, timeout=0)
+
+    def get(self, timeout=None):
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if self._closed or (remaining is not None and remaining <= 0):
+                    raise queue.Empty
+                self._cond.wait(remaining)
+            item = self._items.popleft()
+            self._cond.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def snapshot(self):
+        return self.stats.snapshot(depth=self.qsize())
+
+
+class PipelineStage:
+    """
+    Hilo worker: saca de `input_queue`, aplica `handler` y, si devuelve algo
+    distinto de None, lo pone en `output_queue`. El tiempo de servicio se
+    anota en las estadísticas de la cola de entrada.
+
+    Con max_batch > 1, si la cola se ha acumulado se sacan hasta `max_batch`
+    elementos de golpe y `handler` recibe la lista (coalescencia).
+    """
+
+    def __init__(self, name, input_queue, handler, output_queue=None, is_running=None, max_batch=1):
+        self.name = name
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.handler = handler
+        self.max_batch = max(1, int(max_batch))
+        self._is_running = is_running or (lambda: True)
+        self.thread = threading.Thread(target=self._run, name=f"stage-{name}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self._is_running():
+            try:
+                item = self.input_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            count = 1
+            if self.max_batch > 1:
+                item = [item]
+                while len(item) < self.max_batch:
+                    try:
+                        item.append(self.input_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                count = len(item)
+
+            t0 = time.monotonic()
+            error = False
+            try:
+                result = self.handler(item)
+                if result is not None and self.output_queue is not None:
+                    self.output_queue.put(result)
+            except Exception as e:
+                error = True
+                print(f"❌ Error etapa {self.name}: {e}")
+            finally:
+                self.input_queue.stats.record_done(time.monotonic() - t0, error=error, count=count)
+
+
+def format_stats(queues):
+    """Una línea por etapa para imprimir en consola"""
+    lines = []
+    for q in queues:
+        s = q.snapshot()
+        lines.append(
+            f"   📊 {s['stage']:<8} cola={s['depth']}/{q.maxsize} (máx {s['max_depth']}) "
+            f"hechos={s['processed']} {s['throughput_per_s']:.2f}/s "
+            f"servicio={s['avg_service_ms']:.0f}ms descartes={s['dropped']} fusiones={s['merged']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,157 @@
+"""
+Etapa de reproducción
+=====================
+PlaybackFeeder corre en su propio hilo: saca los segmentos de TTS de la cola,
+los copia al anillo SPSC que lee el callback de salida y se encarga de todo
+lo que el callback no debe hacer (esperar, imprimir, llevar la cuenta de
+qué frase está sonando, y las marcas tts_ready/playback_start/playback_end
+de las trazas de latencia). PlaybackStats publica los contadores del callback.
+
+Con un StretchController, cada frase que sale de la cola se acelera (sin
+cambiar el tono) según el audio que aún espera para sonar; sus trozos se
+estiran como una sola señal.
+"""
+
+import collections
+import queue
+import time
+
+
+class PlaybackStats:
+    """Contadores escritos solo desde el callback de audio (sin locks)"""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.callbacks = 0
+        self.underruns = 0
+        self.overruns = 0          # Esperas del productor por anillo lleno
+        self.errors = 0
+        self.status_flags = 0      # Avisos de PortAudio (xruns del dispositivo)
+        self.over_budget = 0       # Callbacks que tardaron más que la duración del bloque
+        self.total_callback_s = 0.0
+        self.max_callback_s = 0.0
+        self._dry = False
+
+    def record_read(self, read, frames, active):
+        """Underrun: el anillo de una frase en curso se queda sin muestras (uno por hueco, no por callback)"""
+        dry = active and read < frames
+        if dry and not self._dry:
+            self.underruns += 1
+        self._dry = dry
+
+    def record_callback(self, seconds, frames):
+        self.callbacks += 1
+        self.total_callback_s += seconds
+        if seconds > self.max_callback_s:
+            self.max_callback_s = seconds
+        if seconds > frames / self.sample_rate:
+            self.over_budget += 1
+
+    def snapshot(self):
+        return {
+            'callbacks': self.callbacks,
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'status_flags': self.status_flags,
+            'over_budget': self.over_budget,
+            'avg_callback_us': (self.total_callback_s / self.callbacks * 1e6) if self.callbacks else 0.0,
+            'max_callback_us': self.max_callback_s * 1e6,
+        }
+
+    def format(self):
+        s = self.snapshot()
+        return (f"   📊 salida   callbacks={s['callbacks']} underruns={s['underruns']} "
+                f"overruns={s['overruns']} media={s['avg_callback_us']:.0f}µs "
+                f"máx={s['max_callback_us']:.0f}µs fuera de presupuesto={s['over_budget']}")
+
+
+class PlaybackFeeder:
+    """Productor del anillo SPSC: segmentos de TTS → muestras para el callback"""
+
+    def __init__(self, segments, ring, stats, is_running, idle_sleep_s=0.01, tracker=None, stretch=None):
+        self.segments = segments
+        self.ring = ring
+        self.stats = stats
+        self._is_running = is_running
+        self.idle_sleep_s = idle_sleep_s
+        self.tracker = tracker
+        self.stretch = stretch
+        # (posición en el anillo, evento, texto, traza) para anunciar inicio/fin cuando el callback llegue ahí
+        self._marks = collections.deque()
+        self._current = None
+        self._offset = 0
+        self._blocked = False
+
+    def _next_segment(self):
+        try:
+            segment = self.segments.get(timeout=self.idle_sleep_s)
+        except queue.Empty:
+            return False
+        first = segment.get('first', True)
+        if self.stretch is not None:
+            backlog_s = self.backlog_s(segment) if first else 0.0
+            segment['audio'] = self.stretch.apply(segment['audio'], backlog_s, self.stats.sample_rate,
+                                                  first=first, last=segment.get('last', True))
+        if first:
+            if self.tracker is not None:
+                self.tracker.mark(segment.get('trace'), 'tts_ready', segment.get('created'))
+            self._marks.append((self.ring.write_pos, 'start', segment['text'], segment.get('trace')))
+            self.ring.active = True
+        self._current = segment
+        self._offset = 0
+        return True
+
+    def backlog_s(self, current=None):
+        """Segundos de audio pendientes: anillo + segmento actual + cola"""
+        samples = self.ring.available()
+        if current is not None:
+            samples += len(current['audio'])
+        with self.segments.mutex:
+            samples += sum(len(s['audio']) for s in self.segments.queue)
+        return samples / self.stats.sample_rate
+
+    def _announce(self):
+        read_pos = self.ring.read_pos
+        while self._marks and self._marks[0][0] <= read_pos:
+            _, event, text, trace = self._marks.popleft()
+            if self.tracker is not None:
+                self.tracker.mark(trace, 'playback_start' if event == 'start' else 'playback_end')
+            if event == 'start':
+                print(f"\n   ▶️  Reproduciendo: {text}")
+            else:
+                print(f"   ✅ Terminado | {self.segments.qsize()} en cola")
+
+    def _feed(self):
+        """Escribe del segmento actual lo que quepa. Devuelve False si hay que esperar."""
+        if self._current is None and not self._next_segment():
+            return False
+
+        audio = self._current['audio']
+        written = self.ring.write(audio[self._offset:])
+        self._offset += written
+
+        if self._offset < len(audio):
+            # Anillo lleno: se cuenta una vez por espera, no en cada reintento
+            if not self._blocked:
+                self.stats.overruns += 1
+                self._blocked = True
+            return False
+        self._blocked = False
+
+        if self._current.get('last', True):
+            self._marks.append((self.ring.write_pos, 'end', self._current['text'], self._current.get('trace')))
+            self.ring.active = False
+        self._current = None
+        return True
+
+    def run(self):
+        while self._is_running():
+            try:
+                progressed = self._feed()
+                self._announce()
+                if not progressed and self._current is not None:
+                    time.sleep(self.idle_sleep_s)
+            except Exception as e:
+                print(f"❌ Error reproducción: {e}")
+                self._current = None
@@ -0,0 +1,201 @@
+"""
+Modo offline (--input archivo.wav)
+==================================
+Sustituye a los streams de sounddevice por un reloj que lee un WAV y llama
+a input_callback/output_callback con el mismo tamaño de bloque que los
+streams reales, sin dispositivos de audio (sirve en un Linux sin cabeza).
+
+- Ritmo "realtime": un bloque cada BLOCK_SIZE/SAMPLE_RATE segundos.
+- Ritmo "fast": tan rápido como el pipeline acepte el audio. La entrada
+  espera a que haya hueco en la cola de captura en lugar de descartar, así
+  que la segmentación es determinista y se puede medir el factor de tiempo
+  real y comparar regresiones.
+
+La salida va a un sumidero nulo o a un WAV en lugar de a las bocinas.
+"""
+
+import time
+import wave
+
+import numpy as np
+
+from dsp import resample
+
+PACE_REALTIME = "realtime"
+PACE_FAST = "fast"
+
+
+def load_wav(path, sample_rate):
+    """Lee un WAV PCM y lo devuelve como float32 mono a `sample_rate`"""
+    with wave.open(path, 'rb') as wf:
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        width = wf.getsampwidth()
+        frames = wf.readframes(wf.getnframes())
+
+    if width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype=np.int32).astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"WAV de {width * 8} bits no soportado")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+
+    if rate != sample_rate:
+        audio = resample(audio, rate, sample_rate)
+
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+class NullSink:
+    """Descarta el audio de salida (solo cuenta muestras)"""
+
+    def __init__(self):
+        self.samples = 0
+
+    def write(self, block):
+        self.samples += len(block)
+
+    def close(self):
+        pass
+
+
+class WavSink(NullSink):
+    """Guarda el audio de salida en un WAV de 16 bits"""
+
+    def __init__(self, path, sample_rate, channels=2):
+        super().__init__()
+        self.path = path
+        self._wf = wave.open(path, 'wb')
+        self._wf.setnchannels(channels)
+        self._wf.setsampwidth(2)
+        self._wf.setframerate(sample_rate)
+
+    def write(self, block):
+        super().write(block)
+        self._wf.writeframes((np.clip(block, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+
+    def close(self):
+        self._wf.close()
+
+
+class ReplayClock:
+    """
+    Hace de InputStream + OutputStream: cada tick entrega un bloque del
+    archivo a `input_callback` y pide un bloque a `output_callback`.
+
+    - `can_feed()`: en ritmo fast, la entrada espera mientras devuelva False.
+    - `output_ready()`: en ritmo fast, solo se pide audio de salida cuando
+      hay algo que reproducir (el WAV queda sin los silencios entre frases).
+    - `is_idle()`: cuando se acaba el archivo, se sigue hasta que el pipeline
+      esté vacío (o hasta `drain_timeout_s`).
+    """
+
+    def __init__(self, audio, block_size, sample_rate, input_callback, output_callback,
+                 sink=None, output_channels=2, pace=PACE_FAST, tail_s=1.0,
+                 can_feed=None, output_ready=None, is_idle=None,
+                 idle_confirm_s=0.5, drain_timeout_s=120.0):
+        if pace not in (PACE_REALTIME, PACE_FAST):
+            raise ValueError(f"Ritmo desconocido: {pace}")
+        self.block_size = block_size
+        self.sample_rate = sample_rate
+        self.input_callback = input_callback
+        self.output_callback = output_callback
+        self.sink = sink or NullSink()
+        self.pace = pace
+        self.can_feed = can_feed or (lambda: True)
+        self.output_ready = output_ready or (lambda: True)
+        self.is_idle = is_idle or (lambda: True)
+        self.idle_confirm_s = idle_confirm_s
+        self.drain_timeout_s = drain_timeout_s
+
+        # Silencio final: deja que el VAD cierre la última frase
+        tail = np.zeros(int(tail_s * sample_rate), dtype=np.float32)
+        padded = np.concatenate((audio, tail))
+        padded = np.pad(padded, (0, -len(padded) % block_size))
+        self.audio_seconds = len(audio) / sample_rate
+        self._blocks = padded.reshape(-1, block_size, 1)
+        self._outdata = np.zeros((block_size, output_channels), dtype=np.float32)
+        self.blocks_fed = 0
+        self.wall_seconds = 0.0
+        self.drain_seconds = 0.0
+
+    @property
+    def block_seconds(self):
+        return self.block_size / self.sample_rate
+
+    def _pull_output(self):
+        if self.pace == PACE_FAST and not self.output_ready():
+            return False
+        self.output_callback(self._outdata, self.block_size, None, None)
+        self.sink.write(self._outdata)
+        return True
+
+    def _wait_tick(self, started, tick):
+        if self.pace == PACE_REALTIME:
+            delay = started + tick * self.block_seconds - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def run(self, is_running=None):
+        """Reproduce el archivo completo y espera a que el pipeline se vacíe"""
+        is_running = is_running or (lambda: True)
+        started = time.monotonic()
+        tick = 0
+
+        # 1. Entrada: los mismos bloques que daría sd.InputStream
+        for block in self._blocks:
+            if not is_running():
+                break
+            if self.pace == PACE_FAST:
+                while not self.can_feed() and is_running():
+                    self._pull_output()
+                    time.sleep(0.001)
+            self.input_callback(block, self.block_size, None, None)
+            self.blocks_fed += 1
+            self._pull_output()
+            tick += 1
+            self._wait_tick(started, tick)
+
+        # 2. Drenaje: seguir reproduciendo hasta que no quede nada en vuelo
+        input_done = time.monotonic()
+        idle_since = None
+        while is_running() and time.monotonic() - input_done < self.drain_timeout_s:
+            pulled = self._pull_output()
+            if self.is_idle():
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since >= self.idle_confirm_s:
+                    break
+            else:
+                idle_since = None
+            tick += 1
+            if self.pace == PACE_REALTIME:
+                self._wait_tick(started, tick)
+            elif not pulled:
+                time.sleep(0.001)
+
+        self.drain_seconds = time.monotonic() - input_done
+        self.wall_seconds = time.monotonic() - started
+        self.sink.close()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'pace': self.pace,
+            'audio_s': self.audio_seconds,
+            'wall_s': self.wall_seconds,
+            'drain_s': self.drain_seconds,
+            'rtf': self.wall_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+            'blocks': self.blocks_fed,
+            'output_s': self.sink.samples / self.sample_rate,
+        }
+
+    @staticmethod
+    def format(summary):
+        return (f"   📊 replay ({summary['pace']}) audio={summary['audio_s']:.1f}s "
+                f"pared={summary['wall_s']:.1f}s (drenaje {summary['drain_s']:.1f}s) "
+                f"RTF={summary['rtf']:.3f} salida={summary['output_s']:.1f}s")
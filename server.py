@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Servidor sin cabeza (WebSocket/HTTP)
+====================================
+El pipeline completo sin dispositivos de audio ni selección interactiva:
+cada conexión WebSocket es una sesión (un AudioTranslator con su VAD,
+colas, traducción, TTS e historial) y todas comparten UN modelo Whisper a
+través de BatchedASRScheduler, igual que multi_stream.py.
+
+Protocolo (ws://host:puerto/?source=en&target=es&voice=es-ES-ElviraNeural):
+(opcional &deadline_ms=N: espera máxima de la sesión en el lote de Whisper)
+
+- El servidor saluda con {"type": "ready", "session": N, "sample_rate": 16000}.
+- El cliente manda audio como mensajes binarios: PCM int16 mono a 16 kHz.
+- El servidor manda mensajes de texto JSON:
+    {"type": "partial", "text"}                    (solo con ASR_MODE = "streaming")
+    {"type": "final", "source", "target", "trace", "duration"}
+    {"type": "latency", "trace", "stages"}         (segundos por etapa, ver metrics.py)
+    {"type": "overflow", "dropped_s"}              (audio descartado por la contrapresión)
+    {"type": "done", ...}                          (respuesta a {"type": "end"})
+  y el audio sintetizado como mensajes binarios (PCM int16 mono a 16 kHz).
+- {"type": "end"} cierra la entrada: el servidor termina la última frase,
+  manda lo que quede y responde "done".
+
+Límites por sesión: mientras el pipeline no admite más audio el servidor
+deja de leer el socket (el cliente nota la contrapresión de TCP); si pasa
+SESSION_FEED_TIMEOUT_S se descarta el bloque. Los eventos pendientes de
+enviar están acotados (SESSION_EVENT_QUEUE) y las colas internas son las
+acotadas de siempre.
+
+HTTP: GET /health y GET /stats (JSON).
+
+Uso: python server.py [--host 0.0.0.0] [--port 8765] [--max-sessions 8] [--mt stub --tts stub]
+Requiere: pip install websockets (>= 13)
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import translator as tr
+from asr_scheduler import BatchedASRScheduler
+from startup import StartupProfiler
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+MAX_SESSIONS = 8
+MAX_MESSAGE_BYTES = 1 << 20     # Mensaje de audio más grande que se acepta (~32s de PCM)
+SESSION_FEED_TIMEOUT_S = 2.0    # Espera máxima de un bloque de entrada antes de descartarlo
+SESSION_EVENT_QUEUE = 256       # Eventos de texto pendientes de enviar por sesión
+OUTPUT_POLL_S = 0.02            # Cada cuánto se recoge el audio sintetizado
+DRAIN_TIMEOUT_S = 60            # Espera máxima para terminar tras {"type": "end"}
+
+
+def _to_int16(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+
+
+class Session:
+    """Una conexión: PCM de entrada → AudioTranslator → eventos y PCM de salida"""
+
+    def __init__(self, session_id, websocket, stream):
+        self.id = session_id
+        self.websocket = websocket
+        self.stream = stream
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue(SESSION_EVENT_QUEUE)
+        self.process_thread = None
+        self.started = time.monotonic()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._odd_byte = b""
+        self._out = np.zeros((tr.BLOCK_SIZE, 1), dtype=np.float32)
+        self.input_samples = 0
+        self.output_samples = 0
+        self.dropped_samples = 0
+        self.dropped_events = 0
+        self.finals = 0
+
+        stream.on_event = self._threadsafe_event
+        store_latencies = stream.metrics.on_finished
+
+        def on_finished(trace, stages):
+            store_latencies(trace, stages)
+            self._threadsafe_event({'type': 'latency', 'trace': trace, 'stages': stages})
+
+        stream.metrics.on_finished = on_finished
+
+    # --- Eventos (desde los hilos del pipeline) ---
+
+    def _threadsafe_event(self, event):
+        self.loop.call_soon_threadsafe(self._push_event, event)
+
+    def _push_event(self, event):
+        if event['type'] == 'final':
+            self.finals += 1
+        try:
+            self.events.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+
+    # --- Entrada ---
+
+    def _can_feed(self):
+        stream = self.stream
+        return (stream.audio_queue.qsize() < stream.audio_queue.maxsize - 1
+                and stream.asr_queue.qsize() < stream.asr_queue.maxsize)
+
+    async def _feed_block(self, block):
+        deadline = time.monotonic() + SESSION_FEED_TIMEOUT_S
+        while not self._can_feed():
+            if time.monotonic() >= deadline:
+                self.dropped_samples += len(block)
+                self._push_event({'type': 'overflow', 'dropped_s': self.dropped_samples / tr.SAMPLE_RATE})
+                return
+            await asyncio.sleep(0.005)
+        self.stream.input_callback(block.reshape(-1, 1), len(block), None, None)
+        self.input_samples += len(block)
+
+    async def feed_pcm(self, data):
+        data = self._odd_byte + data
+        usable = len(data) & ~1
+        self._odd_byte = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+        pending = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        full = len(pending) - len(pending) % tr.BLOCK_SIZE
+        for start in range(0, full, tr.BLOCK_SIZE):
+            await self._feed_block(pending[start:start + tr.BLOCK_SIZE])
+        self._pending = pending[full:]
+
+    async def finish_input(self):
+        """Silencio de cola para que el VAD cierre la última frase"""
+        tail_s = (tr.VAD_HANGOVER_MS + tr.SILENCE_TRIGGER_MS) / 1000.0 + 0.5
+        silence = np.zeros(int(tail_s * tr.SAMPLE_RATE) + tr.BLOCK_SIZE - len(self._pending), dtype=np.float32)
+        await self.feed_pcm(_to_int16(silence))
+
+    # --- Salida ---
+
+    def _take_output(self):
+        """Todo el audio sintetizado listo en el anillo, como PCM int16"""
+        ring = self.stream.playback_ring
+        chunks = []
+        while True:
+            available = ring.available()
+            if not (available >= tr.BLOCK_SIZE or (available > 0 and not ring.active)):
+                break
+            frames = min(available, tr.BLOCK_SIZE)
+            self.stream.output_callback(self._out, tr.BLOCK_SIZE, None, None)
+            chunks.append(_to_int16(self._out[:frames, 0]))
+            self.output_samples += frames
+        return b"".join(chunks)
+
+    async def pump(self):
+        """Único emisor del socket: audio sintetizado y eventos, en orden de llegada"""
+        last_collect = time.monotonic()
+        while True:
+            audio = self._take_output()
+            if audio:
+                await self.websocket.send(audio)
+            while not self.events.empty():
+                await self.websocket.send(json.dumps(self.events.get_nowait(), ensure_ascii=False))
+            if time.monotonic() - last_collect >= 0.5:
+                # Cierra las trazas terminadas → eventos "latency"
+                last_collect = time.monotonic()
+                self.stream.metrics.collect()
+            await asyncio.sleep(OUTPUT_POLL_S)
+
+    async def drain(self, pump):
+        """Espera a que el pipeline termine con todo lo recibido (como mucho DRAIN_TIMEOUT_S)"""
+        deadline = time.monotonic() + DRAIN_TIMEOUT_S
+        idle_since = None
+        while time.monotonic() < deadline:
+            if self.stream.pipeline_idle():
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since >= 0.5:
+                    break
+            else:
+                idle_since = None
+            await asyncio.sleep(0.05)
+        self.stream.metrics.collect()
+        # Deja que el emisor vacíe el audio y los eventos pendientes (si sigue vivo)
+        while ((self.stream.playback_ring.available() or not self.events.empty())
+               and not pump.done() and time.monotonic() < deadline):
+            await asyncio.sleep(OUTPUT_POLL_S)
+
+    def summary(self):
+        return {
+            'type': 'done',
+            'session': self.id,
+            'input_s': self.input_samples / tr.SAMPLE_RATE,
+            'output_s': self.output_samples / tr.SAMPLE_RATE,
+            'finals': self.finals,
+            'dropped_s': self.dropped_samples / tr.SAMPLE_RATE,
+            'dropped_events': self.dropped_events,
+            'wall_s': time.monotonic() - self.started,
+        }
+
+
+class TranslationServer:
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, max_sessions=MAX_SESSIONS,
+                 max_batch=8, deadline_ms=250, profiler=None):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_batch = max_batch
+        self.deadline_ms = deadline_ms
+        self.profiler = profiler or StartupProfiler()
+        self.model_loader = None
+        self.model = None
+        self.scheduler = None
+        self.sessions = {}
+        self._starting = 0    # Plazas reservadas por sesiones que aún crean su AudioTranslator
+        self._ids = itertools.count(1)
+        self.total_sessions = 0
+        self.rejected = 0
+
+    def _load_model(self):
+        print(f"🔄 Cargando modelo Whisper '{tr.WHISPER_MODEL}' (compartido por todas las sesiones)...")
+        self.model_loader = tr.create_model_loader(self.profiler)
+        self.model = self.model_loader.wait()
+        self.scheduler = BatchedASRScheduler(self.model, self.max_batch, self.deadline_ms,
+                                             cores=tr.ASR_CPU_CORES).start()
+        print("✅ Modelo cargado")
+
+    def _new_stream(self, session_id, params):
+        stream = tr.AudioTranslator(
+            self.profiler,
+            name=f"ws{session_id}",
+            source_lang=params.get('source', 'en'),
+            target_lang=params.get('target', 'es'),
+            voice=params.get('voice'),
+            model_loader=self.model_loader,
+            asr_scheduler=self.scheduler,
+            asr_deadline_ms=float(params['deadline_ms']) if 'deadline_ms' in params else None,
+        )
+        stream.model = self.model
+        return stream
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'total_sessions': self.total_sessions,
+            'rejected': self.rejected,
+            'asr': self.scheduler.stats() if self.scheduler is not None else None,
+            'active': [{k: v for k, v in s.summary().items() if k != 'type'} for s in self.sessions.values()],
+        }
+
+    def process_request(self, connection, request):
+        """Rutas HTTP simples; cualquier otra ruta sigue como WebSocket"""
+        path = urlparse(request.path).path
+        if path == "/health":
+            return connection.respond(HTTPStatus.OK, "ok\n")
+        if path == "/stats":
+            return connection.respond(HTTPStatus.OK, json.dumps(self.stats()) + "\n")
+        if len(self.sessions) + self._starting >= self.max_sessions:
+            self.rejected += 1
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Demasiadas sesiones\n")
+        return None
+
+    async def handler(self, websocket):
+        params = {k: v[0] for k, v in parse_qs(urlparse(websocket.request.path).query).items()}
+        # La plaza se reserva antes del primer await: varias conexiones que pasaron
+        # process_request a la vez no pueden superar max_sessions mientras arrancan
+        if len(self.sessions) + self._starting >= self.max_sessions:
+            self.rejected += 1
+            await websocket.close(1013, "Demasiadas sesiones")
+            return
+        self._starting += 1
+        session_id = next(self._ids)
+        loop = asyncio.get_running_loop()
+        try:
+            # Crear el AudioTranslator abre SQLite y arranca hilos: fuera del loop
+            stream = await loop.run_in_executor(None, self._new_stream, session_id, params)
+            session = Session(session_id, websocket, stream)
+            session.process_thread = stream._start_workers()
+            self.sessions[session_id] = session
+        finally:
+            self._starting -= 1
+        self.total_sessions += 1
+        print(f"🟢 Sesión {session_id}: {stream.source_lang} → {stream.target_lang} ({stream.voice})")
+
+        pump = asyncio.create_task(session.pump())
+        try:
+            await websocket.send(json.dumps({'type': 'ready', 'session': session_id, 'sample_rate': tr.SAMPLE_RATE}))
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    await session.feed_pcm(message)
+                    continue
+                try:
+                    command = json.loads(message)
+                except ValueError:
+                    continue
+                if command.get('type') == 'end':
+                    await session.finish_input()
+                    await session.drain(pump)
+                    await websocket.send(json.dumps(session.summary()))
+                    break
+        except Exception as e:
+            if type(e).__name__ not in ("ConnectionClosedOK", "ConnectionClosedError"):
+                print(f"❌ Error sesión {session_id}: {e}")
+        finally:
+            pump.cancel()
+            del self.sessions[session_id]
+            await loop.run_in_executor(None, stream._shutdown, session.process_thread)
+            s = session.summary()
+            print(f"🔴 Sesión {session_id}: {s['input_s']:.1f}s de audio, {s['finals']} frases, "
+                  f"{s['output_s']:.1f}s sintetizados, {s['dropped_s']:.1f}s descartados")
+            print(self.scheduler.format())
+
+    async def serve(self):
+        from websockets.asyncio.server import serve
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._load_model)
+        async with serve(self.handler, self.host, self.port, process_request=self.process_request,
+                         max_size=MAX_MESSAGE_BYTES) as server:
+            print(f"🟢 Escuchando en ws://{self.host}:{self.port} (máx {self.max_sessions} sesiones)")
+            print("   (Ctrl+C para detener)\n")
+            await server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--max-batch", type=int, default=8, help="Frases por pasada del encoder")
+    parser.add_argument("--deadline-ms", type=float, default=250,
+                        help="Espera máxima de una frase para formar lote")
+    parser.add_argument("--mt", choices=["google", "stub"], default=tr.TRANSLATOR_BACKEND)
+    parser.add_argument("--tts", choices=["edge", "stub"], default=tr.TTS_BACKEND)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    tr.TRANSLATOR_BACKEND = args.mt
+    tr.TTS_BACKEND = args.tts
+    # Sin consola interactiva: nada de parciales en pantalla ni archivos por sesión
+    tr.SHOW_PARTIALS = False
+    tr.SESSION_MARKDOWN = False
+    tr.METRICS_JSONL = None
+    tr.METRICS_PROM = None
+    if not tr.check_requirements(need_devices=False):
+        sys.exit(1)
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("❌ Faltan: websockets (pip install websockets)")
+        sys.exit(1)
+    server = TranslationServer(args.host, args.port, args.max_sessions, args.max_batch, args.deadline_ms)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("\n\n🛑 Deteniendo...")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Historial de sesiones en SQLite
+===============================
+Sustituye a abrir/escribir/cerrar el markdown en cada frase. record() solo
+encola (no hace I/O en el hilo del pipeline); un hilo escritor agrupa los
+registros y los guarda en una transacción cuando se juntan `batch_size` o
+pasan `flush_interval_s`, y al cerrar.
+
+Cada frase guarda hora, duración del audio, latencias por etapa (cuando la
+traza termina), texto origen y traducción. Un índice FTS5 permite buscar una
+frase en cientos de sesiones en milisegundos; el markdown de siempre pasa a
+ser una exportación opcional.
+
+Uso: python session_store.py search "texto a buscar"
+     python session_store.py export [id_sesión|last] [salida.md]
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+_STOP = object()
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    " id INTEGER PRIMARY KEY, started REAL NOT NULL, source_lang TEXT, target_lang TEXT)",
+    "CREATE TABLE IF NOT EXISTS utterances ("
+    " id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL REFERENCES sessions(id),"
+    " ts REAL NOT NULL, trace INTEGER, duration_s REAL, latencies TEXT,"
+    " source_text TEXT NOT NULL, target_text TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS utterances_session ON utterances(session_id, ts)",
+    "CREATE INDEX IF NOT EXISTS utterances_trace ON utterances(session_id, trace)",
+)
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts USING fts5("
+    " source_text, target_text, content='utterances', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS utterances_ai AFTER INSERT ON utterances BEGIN"
+    " INSERT INTO utterances_fts(rowid, source_text, target_text)"
+    " VALUES (new.id, new.source_text, new.target_text); END",
+)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    # WAL: las búsquedas/exportaciones leen mientras el escritor guarda
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _has_fts(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'utterances_fts'"
+    ).fetchone() is not None
+
+
+def init_db(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = _connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    try:
+        for statement in FTS_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        # SQLite sin FTS5: la búsqueda cae a LIKE
+        print(f"⚠️ Historial sin índice de texto completo ({e})")
+    conn.commit()
+    return conn
+
+
+class SessionStore:
+    """Escritor en segundo plano de las frases de UNA sesión"""
+
+    def __init__(self, db_path, source_lang='en', target_lang='es', batch_size=32, flush_interval_s=2.0):
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = flush_interval_s
+        self.started = time.time()
+        conn = init_db(db_path)
+        with conn:
+            self.session_id = conn.execute(
+                "INSERT INTO sessions (started, source_lang, target_lang) VALUES (?, ?, ?)",
+                (self.started, source_lang, target_lang),
+            ).lastrowid
+        conn.close()
+
+        self._queue = queue.Queue()
+        self.records = 0
+        self.flushes = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+
+    def record(self, source_text, target_text, duration_s=None, trace=None, ts=None):
+        """Encola una frase (no bloquea ni toca el disco)"""
+        self._queue.put(('insert', (
+            self.session_id, time.time() if ts is None else ts, trace, duration_s, None, source_text, target_text,
+        )))
+
+    def record_latencies(self, trace, stages):
+        """Completa la frase de la traza `trace` con las latencias por etapa (en segundos)"""
+        self._queue.put(('latencies', (json.dumps(stages), self.session_id, trace)))
+
+    def _run(self):
+        conn = _connect(self.db_path)
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(conn, batch)
+                break
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval_s
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(conn, batch)
+                batch = []
+                deadline = None
+        conn.close()
+
+    def _flush(self, conn, batch):
+        if not batch:
+            return
+        try:
+            with conn:
+                # En orden: una actualización de latencias nunca adelanta a su inserción
+                for kind, params in batch:
+                    if kind == 'insert':
+                        conn.execute(
+                            "INSERT INTO utterances (session_id, ts, trace, duration_s, latencies,"
+                            " source_text, target_text) VALUES (?, ?, ?, ?, ?, ?, ?)", params)
+                        self.records += 1
+                    else:
+                        conn.execute("UPDATE utterances SET latencies = ? WHERE session_id = ? AND trace = ?",
+                                     params)
+            self.flushes += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"❌ Error guardando historial: {e}")
+
+    def close(self):
+        """Vacía lo pendiente y espera al escritor"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+def search(db_path, phrase, limit=50):
+    """Frases de todas las sesiones que contienen `phrase` (origen o traducción)"""
+    conn = _connect(db_path)
+    try:
+        if _has_fts(conn):
+            query = '"' + phrase.replace('"', '""') + '"'
+            rows = conn.execute(
+                "SELECT u.session_id, u.ts, u.source_text, u.target_text FROM utterances_fts f"
+                " JOIN utterances u ON u.id = f.rowid WHERE utterances_fts MATCH ?"
+                " ORDER BY u.ts DESC LIMIT ?", (query, limit)).fetchall()
+        else:
+            pattern = f"%{phrase}%"
+            rows = conn.execute(
+                "SELECT session_id, ts, source_text, target_text FROM utterances"
+                " WHERE source_text LIKE ? OR target_text LIKE ? ORDER BY ts DESC LIMIT ?",
+                (pattern, pattern, limit)).fetchall()
+    finally:
+        conn.close()
+    return [{'session_id': s, 'ts': ts, 'source_text': src, 'target_text': tgt} for s, ts, src, tgt in rows]
+
+
+def last_session_id(db_path):
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT MAX(id) FROM sessions").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def export_markdown(db_path, session_id, path):
+    """Genera el historial en markdown (mismo formato que el log anterior)"""
+    conn = _connect(db_path)
+    try:
+        session = conn.execute("SELECT started, source_lang, target_lang FROM sessions WHERE id = ?",
+                               (session_id,)).fetchone()
+        if session is None:
+            raise ValueError(f"Sesión desconocida: {session_id}")
+        rows = conn.execute(
+            "SELECT ts, source_text, target_text FROM utterances WHERE session_id = ? ORDER BY ts",
+            (session_id,)).fetchall()
+    finally:
+        conn.close()
+
+    started, source_lang, target_lang = session
+    timestamp = datetime.fromtimestamp(started).strftime("%Y-%m-%d_%H-%M-%S")
+    source_header = f"Origen ({(source_lang or '?').upper()})"
+    target_header = f"Traducción ({(target_lang or '?').upper()})"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# 📝 Historial de Traducción - {timestamp}\n\n")
+        f.write(f"| Hora | {source_header} | {target_header} |\n")
+        f.write(f"|------|{'-' * (len(source_header) + 2)}|{'-' * (len(target_header) + 2)}|\n")
+        for ts, source_text, target_text in rows:
+            # Escapar pipes | para evitar romper la tabla markdown
+            clean_source = source_text.replace("|", "\\|").replace("\n", " ")
+            clean_target = target_text.replace("|", "\\|").replace("\n", " ")
+            f.write(f"| {datetime.fromtimestamp(ts).strftime('%H:%M:%S')} | {clean_source} | {clean_target} |\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join("transcriptions", "sessions.sqlite"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_search = sub.add_parser("search", help="Buscar una frase en todas las sesiones")
+    p_search.add_argument("phrase")
+    p_search.add_argument("--limit", type=int, default=50)
+    p_export = sub.add_parser("export", help="Exportar una sesión a markdown")
+    p_export.add_argument("session", nargs="?", default="last")
+    p_export.add_argument("output", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "search":
+        started = time.perf_counter()
+        results = search(args.db, args.phrase, args.limit)
+        for r in results:
+            when = datetime.fromtimestamp(r['ts']).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{r['session_id']:>4}] {when} | {r['source_text']} | {r['target_text']}")
+        print(f"🔎 {len(results)} resultado(s) en {(time.perf_counter() - started) * 1000:.1f} ms")
+    else:
+        session_id = last_session_id(args.db) if args.session == "last" else int(args.session)
+        output = args.output or os.path.join(os.path.dirname(args.db), f"session_{session_id}.md")
+        print(f"💾 Exportado a: {export_markdown(args.db, session_id, output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Traducción y síntesis especulativas
+===================================
+En streaming, las palabras confirmadas por LocalAgreement se acumulan hasta
+el fin de la oración antes de emitirse como 'final'; solo entonces empiezan
+MT y TTS, y sus idas y vueltas se suman al tiempo del ASR.
+
+Speculator adelanta ese trabajo: en cuanto el prefijo estable de la frase en
+curso cierra una cláusula (coma, punto y coma, dos puntos...) o acumula
+`max_words` palabras, la traduce en segundo plano y, opcionalmente, la
+sintetiza sin reproducirla. Cuando llega la frase final se concilia:
+
+- cada cláusula especulada que aparece tal cual (y en orden) en el texto
+  final se reutiliza: su traducción y su audio ya están hechos o en vuelo;
+- las que no aparecen se cancelan y cuentan como desperdicio;
+- solo los huecos entre cláusulas y la cola que no se especuló se traducen
+  y sintetizan de nuevo.
+
+La traducción va por cláusulas independientes: se gana latencia a cambio de
+algo de contexto en la MT.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stitching import tokenize
+
+CLAUSE_END = (',', ';', ':', '—', '–', ')')
+
+_WORD_RE = re.compile(r"\S+")
+
+
+class Speculation:
+    """Una cláusula especulada: traducción (Future) y, si se pidió, su audio (Future)"""
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = [token for token, _ in tokenize(source)]
+        self.translation = None
+        self.audio = None
+        self.cancelled = False
+        self.started = time.monotonic()
+
+    def cancel(self):
+        self.cancelled = True
+        if self.translation is not None:
+            self.translation.cancel()
+        if self.audio is not None:
+            self.audio.cancel()
+
+
+class Speculator:
+    """
+    Uso (hilo del segmentador):
+        speculator.observe(texto_estable)     # con cada parcial
+        handle = speculator.close()           # al emitir la frase final
+    y en la etapa MT:
+        resultados = speculator.resolve([texto_final], [handle], translate_batch)
+
+    `translate_fn(texto)` traduce una cláusula; `presynth_fn(texto)` (opcional)
+    lanza su síntesis y devuelve un concurrent.futures.Future con el PCM.
+    """
+
+    def __init__(self, translate_fn, presynth_fn=None, min_words=3, max_words=10, workers=2):
+        self.translate_fn = translate_fn
+        self.presynth_fn = presynth_fn
+        self.min_words = max(1, min_words)
+        self.max_words = max(self.min_words, max_words)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculative")
+        self._open = []          # Cláusulas de la frase en curso
+        self._stable = ""        # Prefijo estable ya repartido en cláusulas
+        self._lock = threading.Lock()
+        self.proposed = 0
+        self.reused = 0
+        self.reused_ready = 0    # Reutilizadas con la traducción ya terminada al llegar la final
+        self.discarded = 0
+        self.audio_reused = 0
+        self.audio_discarded = 0
+        self.final_words = 0
+        self.covered_words = 0
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _run(self, speculation):
+        text = self.translate_fn(speculation.source)
+        # El audio se pide antes de devolver: quien espere la traducción ya ve el Future del audio
+        if self.presynth_fn is not None and text and not speculation.cancelled:
+            speculation.audio = self.presynth_fn(text)
+        return text
+
+    def _launch(self, source):
+        speculation = Speculation(source)
+        if not speculation.tokens:
+            return
+        speculation.translation = self.executor.submit(self._run, speculation)
+        self._open.append(speculation)
+        self._count(proposed=1)
+
+    def observe(self, stable_text):
+        """Prefijo estable de la frase en curso: lanza las cláusulas nuevas que ya están cerradas"""
+        stable_text = stable_text.strip()
+        if not stable_text.startswith(self._stable):
+            # El prefijo cambió (no debería con palabras confirmadas): se especula de nuevo
+            self.abandon()
+        start = len(self._stable)
+        words = list(_WORD_RE.finditer(stable_text, start))
+        clause_start = start
+        count = 0
+        for i, match in enumerate(words):
+            count += 1
+            closes = match.group(0).endswith(CLAUSE_END) and count >= self.min_words
+            if closes or count >= self.max_words:
+                end = match.end()
+                self._launch(stable_text[clause_start:end].strip())
+                clause_start = end
+                count = 0
+        self._stable = stable_text[:clause_start]
+
+    def close(self):
+        """Fin de la frase en curso: devuelve sus cláusulas (para resolve) y empieza otra"""
+        speculations, self._open, self._stable = self._open, [], ""
+        return speculations
+
+    def abandon(self):
+        """La frase en curso se descartó: su trabajo especulativo se pierde"""
+        self._discard(self.close())
+
+    def _discard(self, speculations):
+        for speculation in speculations:
+            speculation.cancel()
+        self._count(discarded=len(speculations),
+                    audio_discarded=sum(1 for s in speculations if s.audio is not None))
+
+    def reconcile(self, text, speculations):
+        """
+        Reparte `text` en piezas [(fuente, Speculation o None)] en orden.
+        Las cláusulas que no aparecen en el texto final se cancelan.
+        """
+        tokens = tokenize(text)
+        words = [token for token, _ in tokens]
+        pieces = []
+        position = 0
+        missed = []
+
+        def char_at(index):
+            return tokens[index][1] if index < len(tokens) else len(text)
+
+        for speculation in speculations:
+            size = len(speculation.tokens)
+            found = next((i for i in range(position, len(words) - size + 1)
+                          if words[i:i + size] == speculation.tokens), None)
+            if found is None:
+                missed.append(speculation)
+                continue
+            gap = text[char_at(position):char_at(found)].strip()
+            if gap:
+                pieces.append((gap, None))
+            pieces.append((text[char_at(found):char_at(found + size)].strip(), speculation))
+            position = found + size
+        tail = text[char_at(position):].strip()
+        if tail:
+            pieces.append((tail, None))
+
+        self._discard(missed)
+        hits = len(speculations) - len(missed)
+        self._count(reused=hits, final_words=len(words),
+                    covered_words=sum(len(s.tokens) for _, s in pieces if s is not None))
+        return pieces
+
+    def resolve(self, texts, handles, translate_batch, timeout=None):
+        """
+        Traducción de cada texto final reutilizando lo especulado.
+        Devuelve [(traducción, partes)] con partes = [(traducción de la pieza, Future del audio o None)].
+        Los huecos y colas de todas las frases se traducen en una sola llamada.
+        """
+        plans = [self.reconcile(text, handle or []) for text, handle in zip(texts, handles)]
+        translated = {}
+        fresh = []
+        for plan in plans:
+            for index, (source, speculation) in enumerate(plan):
+                if speculation is not None:
+                    ready = speculation.translation.done()
+                    try:
+                        translated[id(speculation)] = speculation.translation.result(timeout=timeout)
+                        self._count(reused_ready=int(ready))
+                        continue
+                    except Exception:
+                        # Falló o se canceló: la pieza se traduce como las demás
+                        speculation.cancel()
+                fresh.append(source)
+        fresh_translations = dict(zip(fresh, translate_batch(fresh))) if fresh else {}
+
+        results = []
+        for plan in plans:
+            parts = []
+            for source, speculation in plan:
+                audio = None
+                if speculation is not None and id(speculation) in translated:
+                    target = translated[id(speculation)]
+                    audio = speculation.audio
+                else:
+                    target = fresh_translations.get(source, "")
+                if target:
+                    parts.append((target, audio))
+            self._count(audio_reused=sum(1 for _, audio in parts if audio is not None))
+            results.append((" ".join(target for target, _ in parts), parts))
+        return results
+
+    def stats(self):
+        with self._lock:
+            settled = self.reused + self.discarded
+            return {
+                'proposed': self.proposed,
+                'reused': self.reused,
+                'reused_ready': self.reused_ready,
+                'discarded': self.discarded,
+                'hit_rate': self.reused / settled if settled else 0.0,
+                'waste_rate': self.discarded / settled if settled else 0.0,
+                'audio_reused': self.audio_reused,
+                'audio_discarded': self.audio_discarded,
+                'coverage': self.covered_words / self.final_words if self.final_words else 0.0,
+            }
+
+    def format(self):
+        s = self.stats()
+        return (f"   📊 especulación: {s['proposed']} cláusulas | aciertos {s['hit_rate']:.0%} "
+                f"({s['reused']}, {s['reused_ready']} ya traducidas) | desperdicio {s['waste_rate']:.0%} "
+                f"({s['discarded']}) | audio {s['audio_reused']} reutilizados / {s['audio_discarded']} tirados "
+                f"| palabras cubiertas {s['coverage']:.0%}")
+
+    def shutdown(self):
+        self.abandon()
+        self.executor.shutdown(wait=False)
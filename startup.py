@@ -0,0 +1,107 @@
+"""
+Arranque rápido
+===============
+- ModelLoader: importa Whisper (y con él torch), carga el modelo (opcionalmente
+  cuantizado a int8, ver cpu_inference.py) y lo "calienta" con una
+  decodificación de prueba en un hilo aparte, mientras el usuario elige
+  dispositivos.
+- StartupProfiler: tiempos por fase para --profile-startup.
+"""
+
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+from cpu_inference import configure_threads, quantize_whisper
+
+
+class StartupProfiler:
+    """Registra la duración de cada fase del arranque (seguro entre hilos)"""
+
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases = []  # (nombre, inicio relativo, duración, hilo)
+
+    def record(self, name, started, ended):
+        with self._lock:
+            self.phases.append((name, started - self.t0, ended - started, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.t0
+        print("\n⏱️  PERFIL DE ARRANQUE")
+        print("-" * 70)
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+        for name, start, duration, thread in phases:
+            print(f"   {name:<28} +{start:7.3f}s  {duration * 1000:9.1f} ms  [{thread}]")
+        print(f"   {'listo (total)':<28}  {total:7.3f}s")
+        print("-" * 70)
+
+
+class ModelLoader:
+    """Carga y calienta el modelo Whisper en segundo plano"""
+
+    def __init__(self, model_name, profiler=None, warmup=True, sample_rate=16000,
+                 int8=False, intra_op_threads=None, inter_op_threads=None):
+        self.model_name = model_name
+        self.profiler = profiler or StartupProfiler()
+        self.warmup = warmup
+        self.sample_rate = sample_rate
+        self.int8 = int8
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.model = None
+        self.error = None
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _load(self):
+        try:
+            with self.profiler.phase("import whisper/torch"):
+                import whisper
+            if self.intra_op_threads or self.inter_op_threads:
+                # Antes de cualquier inferencia (inter-op no se puede cambiar después)
+                configure_threads(self.intra_op_threads, self.inter_op_threads)
+            with self.profiler.phase(f"load_model('{self.model_name}')"):
+                model = whisper.load_model(self.model_name, device="cpu" if self.int8 else None)
+            if self.int8:
+                with self.profiler.phase("cuantización int8"):
+                    model = quantize_whisper(model)
+            if self.warmup:
+                # La primera decodificación paga la inicialización de kernels y caches
+                with self.profiler.phase("warm-up (1s de silencio)"):
+                    model.transcribe(np.zeros(self.sample_rate, dtype=np.float32), language='en', fp16=False)
+            self.model = model
+        except Exception as e:
+            self.error = e
+        finally:
+            self._ready.set()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Espera a que el modelo esté listo; relanza el error de carga si lo hubo"""
+        if not self._ready.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.model
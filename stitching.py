@@ -0,0 +1,106 @@
+"""
+Costura de transcripciones
+==========================
+Sustituye a la comparación SequenceMatcher contra la última frase.
+
+Cuando un corte por tamaño máximo conserva audio de solapamiento
+(CUT_OVERLAP_MS), la frase siguiente empieza repitiendo palabras que ya se
+tradujeron. TranscriptStitcher alinea el principio del texto nuevo con el
+final de un historial acotado de tokens recientes (función de prefijos de
+KMP: tiempo lineal) y emite solo el sufijo nuevo. Si el audio no se solapaba,
+el texto pasa entero aunque repita una frase anterior: es habla nueva.
+"""
+
+import collections
+import re
+
+_TOKEN_RE = re.compile(r"[\w']+", re.UNICODE)
+
+
+def tokenize(text):
+    """[(token normalizado, posición en `text` donde empieza)]"""
+    return [(m.group(0).lower().strip("'"), m.start()) for m in _TOKEN_RE.finditer(text)]
+
+
+def longest_overlap(history, tokens):
+    """
+    Mayor k tal que tokens[:k] == history[-k:], en O(len(history) + len(tokens)).
+    Prefijos de KMP sobre tokens + separador + history.
+    """
+    if not history or not tokens:
+        return 0
+    sequence = list(tokens) + [None] + list(history)
+    prefix = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = prefix[i - 1]
+        while k and sequence[i] != sequence[k]:
+            k = prefix[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1]
+
+
+class TranscriptStitcher:
+    """
+    stitch(texto, overlap_s) → texto nuevo o None.
+
+    `overlap_s`: segundos de audio que la frase comparte con la anterior.
+    Solo en ese caso se recorta el principio repetido, como mucho unas
+    `words_per_s` palabras por segundo de solapamiento (más un margen).
+    """
+
+    def __init__(self, history_tokens=64, words_per_s=4.0, margin_tokens=2):
+        self.history = collections.deque(maxlen=history_tokens)
+        self.words_per_s = words_per_s
+        self.margin_tokens = margin_tokens
+        self._last_norm = None
+        self.chars_in = 0
+        self.chars_emitted = 0
+        self.stitched = 0       # Frases a las que se quitó un principio repetido
+        self.dropped = 0        # Frases completamente redundantes
+        self.repeats_passed = 0  # Frases idénticas a la anterior pero con audio nuevo
+
+    def stitch(self, text, overlap_s=0.0):
+        text = text.strip()
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        words = [t for t, _ in tokens]
+        self.chars_in += len(text)
+
+        skip = 0
+        if overlap_s > 0:
+            max_k = int(overlap_s * self.words_per_s) + self.margin_tokens
+            tail = list(self.history)[-max_k:]
+            skip = longest_overlap(tail, words[:max_k])
+        elif words == self._last_norm:
+            self.repeats_passed += 1
+
+        self.history.extend(words[skip:])
+        self._last_norm = words
+
+        if skip >= len(tokens):
+            self.dropped += 1
+            return None
+        if skip:
+            self.stitched += 1
+            text = text[tokens[skip][1]:]
+        self.chars_emitted += len(text)
+        return text
+
+    def stats(self):
+        return {
+            'chars_in': self.chars_in,
+            'chars_emitted': self.chars_emitted,
+            # Lo que no se tradujo ni se sintetizó
+            'chars_saved': self.chars_in - self.chars_emitted,
+            'stitched': self.stitched,
+            'dropped': self.dropped,
+            'repeats_passed': self.repeats_passed,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"   📊 costura  {s['chars_saved']} caracteres redundantes evitados en MT/TTS "
+                f"(recortadas {s['stitched']}, descartadas {s['dropped']}, repeticiones válidas {s['repeats_passed']})")
@@ -0,0 +1,229 @@
+"""
+ASR en streaming con Whisper
+============================
+En lugar de esperar una pausa y transcribir el chunk completo, se vuelve a
+decodificar una ventana deslizante cada pocos cientos de ms. Solo se
+"confirma" el prefijo en el que coinciden las últimas hipótesis
+(LocalAgreement); el audio ya confirmado se recorta de la ventana y el texto
+confirmado se pasa como `initial_prompt` para dar contexto.
+
+Eventos emitidos (dicts, igual que los segmentos de TTS):
+    {'type': 'partial', 'text': ..., 'stable': ...}  hipótesis en curso (puede cambiar); 'stable' es
+                                                     su prefijo ya confirmado, aún sin emitir como final
+    {'type': 'final', 'text': ..., 'start', 'end'}   texto estable, listo para traducir
+"""
+
+import collections
+import contextlib
+import re
+
+import numpy as np
+
+from audio_buffers import AudioRingBuffer
+
+SENTENCE_END = ('.', '?', '!', '…')
+
+
+def _normalize(word):
+    """Forma de comparación de una palabra (sin mayúsculas ni puntuación)"""
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class LocalAgreement:
+    """
+    LocalAgreement-n: confirma el prefijo común más largo de las últimas `n`
+    hipótesis. Las palabras son tuplas (inicio_s, fin_s, texto) en tiempo absoluto.
+    """
+
+    def __init__(self, n=2, tail_words=5):
+        self.n = max(2, n)
+        self.history = collections.deque(maxlen=self.n)
+        self.committed_tail = collections.deque(maxlen=tail_words)
+
+    def insert(self, words, committed_time):
+        """Añade una hipótesis nueva y devuelve las palabras recién confirmadas"""
+        # Ignorar lo que cae antes del último instante confirmado
+        words = [w for w in words if w[0] > committed_time - 0.1]
+
+        # Whisper suele repetir al inicio las últimas palabras confirmadas (por el prompt)
+        if words and abs(words[0][0] - committed_time) < 1.0:
+            tail = list(self.committed_tail)
+            for i in range(min(len(tail), len(words)), 0, -1):
+                if [_normalize(w[2]) for w in tail[-i:]] == [_normalize(w[2]) for w in words[:i]]:
+                    words = words[i:]
+                    break
+
+        self.history.append(words)
+        if len(self.history) < self.n:
+            return []
+
+        k = 0
+        shortest = min(len(h) for h in self.history)
+        while k < shortest and len({_normalize(h[k][2]) for h in self.history}) == 1:
+            k += 1
+
+        committed = self.history[-1][:k]
+        if k:
+            for i in range(len(self.history)):
+                self.history[i] = self.history[i][k:]
+            self.committed_tail.extend(committed)
+        return committed
+
+    def tentative(self):
+        """Palabras de la última hipótesis aún no confirmadas"""
+        return self.history[-1] if self.history else []
+
+    def flush(self):
+        """Confirma todo lo pendiente (fin de frase o ventana llena)"""
+        committed = list(self.tentative())
+        self.history.clear()
+        self.committed_tail.extend(committed)
+        return committed
+
+
+class StreamingTranscriber:
+    """
+    Transcriptor incremental sobre una ventana deslizante.
+
+    Uso:
+        st.insert_audio(bloque)
+        if st.ready(step_samples):
+            for event in st.process(): ...
+        ...
+        for event in st.flush(): ...      # en una pausa o al terminar
+    """
+
+    def __init__(self, model, language='en', sample_rate=16000, max_window_s=15.0,
+                 agreement=2, prompt_chars=200, max_final_words=30, force_commit_ratio=0.8, model_lock=None):
+        self.model = model
+        # Con el modelo compartido (BatchedASRScheduler.model_lock) cada decodificación va en exclusiva
+        self.model_lock = model_lock or contextlib.nullcontext()
+        self.language = language
+        self.sample_rate = sample_rate
+        self.prompt_chars = prompt_chars
+        self.max_final_words = max_final_words
+        self.buffer = AudioRingBuffer(int(max_window_s * sample_rate))
+        self.force_commit_samples = int(self.buffer.capacity * force_commit_ratio)
+        self.agreement = LocalAgreement(agreement)
+
+        self.buffer_offset = 0.0     # Tiempo absoluto (s) de la primera muestra de la ventana
+        self.committed_time = 0.0    # Fin de la última palabra confirmada
+        self.committed_text = ""     # Contexto para initial_prompt (acotado)
+        self.pending = []            # Palabras confirmadas aún no emitidas como 'final'
+        self.last_partial = ("", "")
+        self.samples_since_decode = 0
+        self.decode_count = 0
+
+    def insert_audio(self, samples):
+        samples = np.ravel(samples)
+        dropped_before = self.buffer.dropped_samples
+        self.buffer.append(samples)
+        self.samples_since_decode += len(samples)
+        # Si la ventana se desbordó, su inicio avanza con las muestras perdidas
+        dropped = self.buffer.dropped_samples - dropped_before
+        if dropped:
+            self.buffer_offset += dropped / self.sample_rate
+
+    def ready(self, step_samples):
+        return self.samples_since_decode >= step_samples
+
+    def has_audio(self):
+        return len(self.buffer) > 0
+
+    def _decode(self):
+        """Decodifica la ventana actual y devuelve palabras con tiempos absolutos"""
+        audio = self.buffer.view()  # Vista sin copia: se usa de forma síncrona
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        with self.model_lock:
+            result = self.model.transcribe(
+                audio,
+                language=self.language,
+                fp16=False,
+                initial_prompt=prompt,
+                word_timestamps=True,
+                condition_on_previous_text=False,
+            )
+        self.samples_since_decode = 0
+        self.decode_count += 1
+
+        words = []
+        for segment in result.get("segments", []):
+            for w in segment.get("words", []):
+                words.append((w["start"] + self.buffer_offset, w["end"] + self.buffer_offset, w["word"]))
+        return words
+
+    def _trim_to(self, t):
+        """Recorta de la ventana el audio anterior al instante absoluto `t`"""
+        samples = int((t - self.buffer_offset) * self.sample_rate)
+        samples = max(0, min(samples, len(self.buffer)))
+        if samples:
+            self.buffer.consume(len(self.buffer) - samples)
+            self.buffer_offset += samples / self.sample_rate
+
+    def _emit_final(self, events, words):
+        text = "".join(w[2] for w in words).strip()
+        if text:
+            events.append({'type': 'final', 'text': text, 'start': words[0][0], 'end': words[-1][1]})
+
+    def _commit(self, words, events):
+        if not words:
+            return
+        self.committed_time = words[-1][1]
+        self.committed_text = (self.committed_text + "".join(w[2] for w in words))[-self.prompt_chars:]
+
+        # Emitir 'final' por oraciones: traducir palabra a palabra daría basura
+        for w in words:
+            self.pending.append(w)
+            if w[2].strip().endswith(SENTENCE_END) or len(self.pending) >= self.max_final_words:
+                self._emit_final(events, self.pending)
+                self.pending = []
+
+    def _partial_event(self, events):
+        words = self.pending + list(self.agreement.tentative())
+        text = "".join(w[2] for w in words).strip()
+        stable = "".join(w[2] for w in self.pending).strip()
+        if (text, stable) != self.last_partial:
+            self.last_partial = (text, stable)
+            if text:
+                events.append({'type': 'partial', 'text': text, 'stable': stable})
+
+    def process(self):
+        """Re-decodifica la ventana y devuelve los eventos nuevos"""
+        events = []
+        if not self.has_audio():
+            return events
+
+        committed = self.agreement.insert(self._decode(), self.committed_time)
+        self._commit(committed, events)
+
+        if committed:
+            self._trim_to(self.committed_time)
+        elif len(self.buffer) >= self.force_commit_samples:
+            # Ventana casi llena sin acuerdo: confirmar la hipótesis actual para no perder audio
+            self._commit(self.agreement.flush(), events)
+            self._trim_to(self.committed_time)
+
+        self._partial_event(events)
+        return events
+
+    def flush(self, min_audio_s=0.3):
+        """Cierra la frase en curso (pausa o fin): decodifica una última vez y confirma todo"""
+        events = []
+        if len(self.buffer) >= min_audio_s * self.sample_rate:
+            self._commit(self.agreement.insert(self._decode(), self.committed_time), events)
+        self._commit(self.agreement.flush(), events)
+        if self.pending:
+            self._emit_final(events, self.pending)
+            self.pending = []
+
+        # Ventana vacía para la siguiente frase
+        self.discard_audio()
+        self.last_partial = ("", "")
+        return events
+
+    def discard_audio(self, keep_samples=0):
+        """Descarta el audio sin voz de la ventana conservando las últimas `keep_samples`"""
+        keep = max(0, min(int(keep_samples), len(self.buffer)))
+        self.buffer_offset += (len(self.buffer) - keep) / self.sample_rate
+        self.buffer.consume(keep)
+        self.samples_since_decode = 0
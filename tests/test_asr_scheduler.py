@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+
+from asr_scheduler import BatchedASRScheduler
+from streaming_asr import StreamingTranscriber
+
+
+def take(scheduler):
+    with scheduler._cond:
+        return scheduler._take_batch()
+
+
+def test_batch_is_capped_and_grouped_by_language():
+    scheduler = BatchedASRScheduler(model=None, max_batch=2, deadline_ms=0)
+    first = scheduler.submit(np.zeros(10), 'en')
+    scheduler.submit(np.zeros(10), 'fr')
+    scheduler.submit(np.zeros(10), 'en')
+    scheduler.submit(np.zeros(10), 'en')
+
+    batch = take(scheduler)
+    assert len(batch) == 2
+    assert {r.language for r in batch} == {'en'}
+    assert batch[0].future is first
+    assert len(scheduler._pending) == 2
+
+
+def test_batch_leaves_when_every_stream_is_waiting():
+    scheduler = BatchedASRScheduler(model=None, max_batch=8, deadline_ms=60_000)
+    scheduler.register_stream()
+    scheduler.register_stream()
+    scheduler.submit(np.zeros(10), 'en')
+    scheduler.submit(np.zeros(10), 'en')
+    assert len(take(scheduler)) == 2
+
+
+def test_per_request_deadline_overrides_default():
+    scheduler = BatchedASRScheduler(model=None, max_batch=8, deadline_ms=60_000)
+    scheduler.register_stream()
+    scheduler.register_stream()
+    scheduler.submit(np.zeros(10), 'en', deadline_ms=0)
+    assert len(take(scheduler)) == 1
+
+
+class LockCheckingModel:
+    """Modelo falso que comprueba que nadie más decodifica a la vez"""
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        assert self.lock.locked()
+        self.calls += 1
+        return {"segments": []}
+
+
+def test_streaming_decodes_hold_the_shared_model_lock():
+    scheduler = BatchedASRScheduler(model=None)
+    model = LockCheckingModel(scheduler.model_lock)
+    transcriber = StreamingTranscriber(model, model_lock=scheduler.model_lock)
+    transcriber.insert_audio(np.zeros(16000, dtype=np.float32))
+    transcriber.process()
+    assert model.calls == 1
+    assert not scheduler.model_lock.locked()
+
+
+def test_streaming_without_shared_model_needs_no_lock():
+    lock = threading.Lock()
+    lock.acquire()  # Si el transcriptor lo intentara tomar, se bloquearía
+    model = LockCheckingModel(lock)
+    transcriber = StreamingTranscriber(model)
+    transcriber.insert_audio(np.zeros(16000, dtype=np.float32))
+    transcriber.process()
+    assert model.calls == 1
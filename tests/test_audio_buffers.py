@@ -0,0 +1,112 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audio_buffers import AudioRingBuffer, SPSCSampleRing
+
+
+def ramp(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+def test_append_and_view_in_order():
+    buffer = AudioRingBuffer(8)
+    buffer.append(ramp(0, 3))
+    buffer.append(ramp(3, 2))
+    assert len(buffer) == 5
+    np.testing.assert_array_equal(buffer.view(), ramp(0, 5))
+
+
+def test_wraparound_keeps_chronological_order():
+    buffer = AudioRingBuffer(8)
+    buffer.append(ramp(0, 6))
+    buffer.consume(keep=2)
+    buffer.append(ramp(6, 5))          # Da la vuelta al final del buffer
+    np.testing.assert_array_equal(buffer.view(), ramp(4, 7))
+    np.testing.assert_array_equal(buffer.copy(), ramp(4, 7))
+
+
+def test_overflow_drops_oldest_and_counts_it():
+    buffer = AudioRingBuffer(4)
+    buffer.append(ramp(0, 3))
+    buffer.append(ramp(3, 3))
+    np.testing.assert_array_equal(buffer.view(), ramp(2, 4))
+    assert buffer.dropped_samples == 2
+
+    buffer.append(ramp(10, 9))         # Un bloque mayor que la capacidad
+    np.testing.assert_array_equal(buffer.view(), ramp(15, 4))
+    assert buffer.dropped_samples == 2 + 4 + 5
+
+
+def test_consume_keeps_overlap_tail():
+    buffer = AudioRingBuffer(10)
+    buffer.append(ramp(0, 7))
+    buffer.consume(keep=3)
+    np.testing.assert_array_equal(buffer.view(), ramp(4, 3))
+    buffer.consume(keep=100)           # No puede conservar más de lo que hay
+    assert len(buffer) == 3
+    buffer.consume()
+    assert len(buffer) == 0
+
+
+def test_copy_is_independent_of_later_writes():
+    buffer = AudioRingBuffer(4)
+    buffer.append(ramp(0, 4))
+    snapshot = buffer.copy()
+    buffer.append(ramp(4, 2))
+    np.testing.assert_array_equal(snapshot, ramp(0, 4))
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(0)
+
+
+def test_spsc_write_stops_at_capacity():
+    ring = SPSCSampleRing(4)
+    assert ring.write(ramp(0, 6)) == 4
+    assert ring.available() == 4
+    assert ring.free() == 0
+    assert ring.write(ramp(6, 1)) == 0
+
+
+def test_spsc_read_into_wraps_and_zero_fills():
+    ring = SPSCSampleRing(4)
+    ring.write(ramp(0, 3))
+    out = np.empty(2, np.float32)
+    assert ring.read_into(out) == 2
+    ring.write(ramp(3, 3))             # Da la vuelta al final del anillo
+    out = np.full(6, -1.0, np.float32)
+    assert ring.read_into(out) == 4
+    np.testing.assert_array_equal(out, [2, 3, 4, 5, 0, 0])
+    assert ring.available() == 0
+
+
+def test_spsc_concurrent_producer_and_consumer_keep_order():
+    ring = SPSCSampleRing(64)
+    total = 5000
+    received = []
+
+    def produce():
+        sent = 0
+        while sent < total:
+            written = ring.write(ramp(sent, min(37, total - sent)))
+            sent += written
+            if not written:
+                time.sleep(0)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    out = np.empty(50, np.float32)
+    while sum(len(r) for r in received) < total:
+        n = ring.read_into(out)
+        received.append(out[:n].copy())
+    producer.join()
+    np.testing.assert_array_equal(np.concatenate(received), ramp(0, total))
+
+
+def test_spsc_rejects_empty_capacity():
+    with pytest.raises(ValueError):
+        SPSCSampleRing(0)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from dsp import PolyphaseResampler, StretchController, WsolaStretcher, resample, wsola_stretch
+
+RATE = 16000
+
+
+def sine(freq, seconds, sample_rate=RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return np.sin(2 * np.pi * freq * t).astype(np.float32)
+
+
+def dominant_hz(signal, sample_rate=RATE):
+    spectrum = np.abs(np.fft.rfft(signal * np.hanning(len(signal))))
+    return np.fft.rfftfreq(len(signal), 1.0 / sample_rate)[np.argmax(spectrum)]
+
+
+def in_chunks(process, flush, signal, sizes):
+    parts, i = [], 0
+    for size in sizes:
+        parts.append(process(signal[i:i + size]))
+        i += size
+    parts.append(process(signal[i:]))
+    parts.append(flush())
+    return np.concatenate(parts)
+
+
+@pytest.mark.parametrize("orig, target", [(24000, 16000), (16000, 48000), (44100, 16000)])
+def test_resample_length_and_tone(orig, target):
+    audio = sine(440, 0.5, orig)
+    out = resample(audio, orig, target)
+    assert len(out) == -(-len(audio) * target // orig)
+    assert abs(dominant_hz(out, target) - 440) < 5
+
+
+def test_resampler_blocks_match_whole_signal():
+    audio = sine(300, 0.3, 24000) + 0.1 * np.random.default_rng(0).standard_normal(7200).astype(np.float32)
+    whole = resample(audio, 24000, 16000)
+    resampler = PolyphaseResampler(24000, 16000)
+    chunked = in_chunks(resampler.process, resampler.flush, audio, [1, 500, 77, 3000])
+    np.testing.assert_allclose(chunked, whole, atol=1e-5)
+
+
+def test_resampler_removes_content_above_nyquist():
+    audio = sine(10000, 0.5, 24000)              # Por encima de 8 kHz: debe desaparecer
+    out = resample(audio, 24000, 16000)
+    assert np.sqrt(np.mean(out[200:-200] ** 2)) < 0.01
+
+
+def test_wsola_keeps_pitch_and_shortens():
+    audio = sine(220, 1.0)
+    out = wsola_stretch(audio, 1.25)
+    assert len(out) == round(len(audio) / 1.25)
+    assert abs(dominant_hz(out) - 220) < 5
+
+
+def test_wsola_short_or_unit_rate_is_unchanged():
+    short = sine(220, 0.05)
+    np.testing.assert_array_equal(wsola_stretch(short, 1.5), short)
+    audio = sine(220, 0.5)
+    np.testing.assert_array_equal(wsola_stretch(audio, 1.0), audio)
+
+
+@pytest.mark.parametrize("sizes", [[3200] * 10, [100] * 50, [1, 1279, 640, 5000]])
+def test_wsola_chunks_match_whole_phrase(sizes):
+    # Trozos de ~0.2 s (y de menos de 80 ms) se estiran igual que la frase entera
+    audio = sine(180, 2.0) + 0.05 * np.random.default_rng(1).standard_normal(2 * RATE).astype(np.float32)
+    whole = wsola_stretch(audio, 1.3)
+    stretcher = WsolaStretcher(1.3, RATE)
+    chunked = in_chunks(stretcher.process, stretcher.flush, audio, sizes)
+    np.testing.assert_allclose(chunked, whole, atol=1e-5)
+
+
+def test_controller_rate_ramps_between_start_and_max_lag():
+    controller = StretchController(max_lag_s=8.0, start_s=3.0, max_rate=1.5)
+    assert controller.rate_for(2.0) == 1.0
+    assert controller.rate_for(5.5) == pytest.approx(1.25)
+    assert controller.rate_for(20.0) == 1.5
+
+
+def test_controller_stretches_a_phrase_as_one_signal():
+    controller = StretchController(max_lag_s=8.0, start_s=3.0, max_rate=1.5)
+    audio = sine(200, 1.0)
+    chunks = np.array_split(audio, 5)
+    out = [controller.apply(chunk, 20.0 if i == 0 else 0.0, RATE, first=i == 0, last=i == 4)
+           for i, chunk in enumerate(chunks)]
+    np.testing.assert_allclose(np.concatenate(out), wsola_stretch(audio, 1.5), atol=1e-5)
+    assert controller.stretched == 1
+    # La frase siguiente sin retraso suena tal cual
+    np.testing.assert_array_equal(controller.apply(audio, 0.0, RATE), audio)
@@ -0,0 +1,64 @@
+import dataclasses
+import sys
+import types
+
+import pytest
+
+from live_decoder import LOGPROB_THRESHOLD, LiveDecoder, is_no_speech, needs_fallback
+
+
+@dataclasses.dataclass(frozen=True)
+class FakeOptions:
+    task: str = "transcribe"
+    language: str = "en"
+    temperature: float = 0.0
+    sample_len: int = 128
+    without_timestamps: bool = True
+    fp16: bool = False
+
+
+def result(text="hello there", avg_logprob=-0.3, no_speech_prob=0.1, compression_ratio=1.2):
+    return types.SimpleNamespace(text=f" {text}", avg_logprob=avg_logprob,
+                                 no_speech_prob=no_speech_prob, compression_ratio=compression_ratio)
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(DecodingOptions=FakeOptions))
+    model = types.SimpleNamespace(dims=types.SimpleNamespace(n_mels=80))
+    return LiveDecoder(model)
+
+
+def transcribe(decoder, monkeypatch, decoded):
+    monkeypatch.setattr(decoder, "decode", lambda audio: decoded)
+    return decoder.transcribe(None)
+
+
+def test_confident_speech_is_kept(decoder, monkeypatch):
+    assert transcribe(decoder, monkeypatch, result()) == "hello there"
+    assert decoder.stats()['discarded_low_logprob'] == 0
+
+
+def test_silence_is_discarded_as_no_speech(decoder, monkeypatch):
+    assert transcribe(decoder, monkeypatch, result(no_speech_prob=0.9, avg_logprob=-1.5)) == ""
+    assert decoder.stats()['discarded_no_speech'] == 1
+
+
+def test_repetitive_output_is_discarded_as_hallucination(decoder, monkeypatch):
+    assert transcribe(decoder, monkeypatch, result(compression_ratio=3.0)) == ""
+    assert decoder.stats()['discarded_hallucination'] == 1
+
+
+def test_improbable_output_is_discarded_even_with_speech(decoder, monkeypatch):
+    # Probable voz (no_speech bajo) pero texto improbable tras los reintentos
+    assert transcribe(decoder, monkeypatch, result(avg_logprob=LOGPROB_THRESHOLD - 0.2)) == ""
+    stats = decoder.stats()
+    assert stats['discarded_low_logprob'] == 1
+    assert stats['discarded_no_speech'] == 0
+
+
+def test_no_speech_needs_both_silence_and_low_logprob():
+    assert not is_no_speech(result(no_speech_prob=0.9, avg_logprob=-0.5))
+    assert not is_no_speech(result(no_speech_prob=0.3, avg_logprob=-1.5))
+    assert needs_fallback(result(avg_logprob=-1.5))
+    assert not needs_fallback(result())
@@ -0,0 +1,39 @@
+from metrics import LatencyTracker
+
+
+def test_completed_trace_reports_stage_durations():
+    tracker = LatencyTracker()
+    trace = tracker.start(captured_at=10.0)
+    for event, t in (('cut', 10.5), ('asr_done', 11.0), ('mt_done', 11.25), ('tts_ready', 11.5),
+                     ('playback_start', 11.75), ('playback_end', 13.0)):
+        tracker.mark((trace,), event, t)
+    tracker.collect()
+    assert tracker.completed == 1
+    finished = tracker.pop_finished()
+    assert finished[0]['stages']['e2e'] == 1.75
+    assert finished[0]['stages']['asr'] == 0.5
+    assert tracker.percentiles()['vad']['count'] == 1
+
+
+def test_discarded_trace_is_closed_and_counted():
+    tracker = LatencyTracker()
+    trace = tracker.start()
+    tracker.mark((trace,), 'discarded')
+    tracker.collect()
+    assert (tracker.completed, tracker.discarded) == (0, 1)
+
+
+def test_pending_marks_are_bounded():
+    tracker = LatencyTracker(max_pending=4)
+    for trace in range(1, 7):
+        tracker.mark((trace,), 'captured')
+    assert len(tracker._events) == 4
+    assert tracker.events_dropped == 2
+    tracker.collect()
+    assert sorted(tracker._open) == [3, 4, 5, 6]
+
+
+def test_empty_trace_ids_are_ignored():
+    tracker = LatencyTracker()
+    tracker.mark((), 'discarded')
+    assert len(tracker._events) == 0
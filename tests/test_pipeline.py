@@ -0,0 +1,101 @@
+import queue
+import threading
+
+import pytest
+
+from pipeline import (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_MERGE,
+                      BoundedQueue)
+
+
+def item(text, trace):
+    return {'text': text, 'trace': (trace,)}
+
+
+def merge_text(previous, new):
+    if len(previous['trace']) + len(new['trace']) > 2:
+        return None
+    return {'text': f"{previous['text']} {new['text']}", 'trace': previous['trace'] + new['trace']}
+
+
+def drain(q):
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def test_block_rejects_new_item_on_timeout():
+    discarded = []
+    q = BoundedQueue("t", 1, OVERFLOW_BLOCK, on_discard=lambda i, kept: discarded.append((i, kept)))
+    assert q.put(item("a", 1))
+    assert not q.put_nowait(item("b", 2))
+    assert [i['text'] for i in drain(q)] == ["a"]
+    assert discarded == [(item("b", 2), None)]
+    assert q.snapshot()['dropped'] == 1
+
+
+def test_drop_oldest_reports_the_dropped_item():
+    discarded = []
+    q = BoundedQueue("t", 2, OVERFLOW_DROP_OLDEST, on_discard=lambda i, kept: discarded.append((i, kept)))
+    for n in range(4):
+        q.put(item(str(n), n))
+    assert [i['text'] for i in drain(q)] == ["2", "3"]
+    assert discarded == [(item("0", 0), None), (item("1", 1), None)]
+
+
+def test_merge_passes_the_merged_item_as_kept():
+    discarded = []
+    q = BoundedQueue("t", 1, OVERFLOW_MERGE, merge_fn=merge_text,
+                     on_discard=lambda i, kept: discarded.append((i, kept)))
+    q.put(item("a", 1))
+    q.put(item("b", 2))
+    merged = {'text': "a b", 'trace': (1, 2)}
+    assert drain(q) == [merged]
+    assert discarded == [(item("a", 1), merged), (item("b", 2), merged)]
+    assert q.snapshot()['merged'] == 1
+
+
+def test_merge_falls_back_to_dropping_the_oldest():
+    discarded = []
+    q = BoundedQueue("t", 1, OVERFLOW_MERGE, merge_fn=merge_text,
+                     on_discard=lambda i, kept: discarded.append((i, kept)))
+    q.put(item("a", 1))
+    q.put(item("b", 2))
+    q.put(item("c", 3))                # El fusionado ya lleva dos trazas: no admite más
+    assert drain(q) == [item("c", 3)]
+    assert discarded[-1] == ({'text': "a b", 'trace': (1, 2)}, None)
+    assert q.snapshot()['dropped'] == 1
+
+
+def test_closed_queue_rejects_puts_and_wakes_getters():
+    q = BoundedQueue("t", 1)
+    q.close()
+    assert not q.put(item("a", 1))
+    with pytest.raises(queue.Empty):
+        q.get(timeout=1)
+
+
+def test_unknown_policy_and_merge_without_fn_are_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueue("t", 1, "lifo")
+    with pytest.raises(ValueError):
+        BoundedQueue("t", 1, OVERFLOW_MERGE)
+
+
+def test_put_after_close_reports_the_lost_item():
+    discarded = []
+    q = BoundedQueue("t", 1, on_discard=lambda i, kept: discarded.append((i, kept)))
+    q.close()
+    q.put(item("a", 1))
+    assert discarded == [(item("a", 1), None)]
+
+
+def test_blocked_put_released_by_close_reports_the_item():
+    discarded = []
+    q = BoundedQueue("t", 1, OVERFLOW_BLOCK, on_discard=lambda i, kept: discarded.append((i, kept)))
+    q.put(item("a", 1))
+    threading.Timer(0.05, q.close).start()
+    assert not q.put(item("b", 2), timeout=5)
+    assert discarded == [(item("b", 2), None)]
@@ -0,0 +1,71 @@
+import queue
+
+import numpy as np
+
+from audio_buffers import SPSCSampleRing
+from dsp import StretchController, wsola_stretch
+from playback import PlaybackFeeder, PlaybackStats
+
+RATE = 16000
+
+
+def segments_of(audio, pieces, text="hola"):
+    chunks = np.array_split(audio, pieces)
+    return [{'audio': chunk, 'text': text, 'first': i == 0, 'last': i == len(chunks) - 1, 'trace': ()}
+            for i, chunk in enumerate(chunks)]
+
+
+def feed_all(feeder, ring):
+    out = []
+    buffer = np.empty(4096, np.float32)
+    while feeder._feed() or feeder._current is not None or not feeder.segments.empty():
+        n = ring.read_into(buffer)
+        out.append(buffer[:n].copy())
+    while ring.available():
+        n = ring.read_into(buffer)
+        out.append(buffer[:n].copy())
+    return np.concatenate(out)
+
+
+def test_feeder_marks_phrase_active_until_last_segment():
+    segments = queue.Queue()
+    ring = SPSCSampleRing(RATE)
+    feeder = PlaybackFeeder(segments, ring, PlaybackStats(RATE), lambda: True, idle_sleep_s=0.001)
+    for segment in segments_of(np.ones(3000, np.float32), 3):
+        segments.put(segment)
+    feeder._feed()
+    assert ring.active
+    feeder._feed()
+    feeder._feed()
+    assert not ring.active
+    assert ring.available() == 3000
+
+
+def test_feeder_stretches_streamed_phrase_as_a_whole():
+    t = np.arange(2 * RATE) / RATE
+    audio = np.sin(2 * np.pi * 200 * t).astype(np.float32)
+    segments = queue.Queue()
+    ring = SPSCSampleRing(4 * RATE)
+    stretch = StretchController(max_lag_s=1.0, start_s=0.5, max_rate=1.5)
+    feeder = PlaybackFeeder(segments, ring, PlaybackStats(RATE), lambda: True,
+                            idle_sleep_s=0.001, stretch=stretch)
+    # Trozos de ~0.2 s como los de ChunkedSegmentWriter
+    for segment in segments_of(audio, 10):
+        segments.put(segment)
+    played = feed_all(feeder, ring)
+    np.testing.assert_allclose(played, wsola_stretch(audio, 1.5), atol=1e-5)
+    assert stretch.stretched == 1
+
+
+def test_underrun_counted_once_per_gap_of_an_active_phrase():
+    stats = PlaybackStats(RATE)
+    stats.record_read(0, 800, active=False)      # Destino en reposo: no es un hueco
+    stats.record_read(0, 800, active=False)
+    assert stats.underruns == 0
+    stats.record_read(800, 800, active=True)
+    stats.record_read(300, 800, active=True)     # Se queda sin muestras a mitad de frase
+    stats.record_read(0, 800, active=True)
+    assert stats.underruns == 1
+    stats.record_read(800, 800, active=True)
+    stats.record_read(0, 800, active=True)
+    assert stats.underruns == 2
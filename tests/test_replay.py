@@ -0,0 +1,71 @@
+import wave
+
+import numpy as np
+import pytest
+
+import translator as tr
+from replay import ReplayClock
+
+DRAIN_TIMEOUT_S = 20.0
+
+
+class FakeWhisper:
+    """Modelo falso: la misma frase, con marcas por palabra dentro de la ventana"""
+
+    WORDS = ("hello", "there", "my", "friend.")
+
+    def transcribe(self, audio, **kwargs):
+        seconds = len(audio) / tr.SAMPLE_RATE
+        step = min(0.2, seconds / len(self.WORDS))
+        words = [{'start': i * step, 'end': (i + 1) * step, 'word': f" {w}"} for i, w in enumerate(self.WORDS)]
+        return {'text': " ".join(self.WORDS), 'segments': [{'words': words}]}
+
+
+class ReadyLoader:
+    def __init__(self, model):
+        self.model = model
+
+    def is_ready(self):
+        return True
+
+    def wait(self):
+        return self.model
+
+
+class ShortDrainClock(ReplayClock):
+    """Si el pipeline nunca parece vacío, el test falla en segundos y no en 120"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['drain_timeout_s'] = DRAIN_TIMEOUT_S
+        super().__init__(*args, **kwargs)
+
+
+def write_speech_wav(path):
+    t = np.arange(int(1.5 * tr.SAMPLE_RATE)) / tr.SAMPLE_RATE
+    speech = 0.3 * np.sin(2 * np.pi * 440 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    audio = np.concatenate((np.zeros(tr.SAMPLE_RATE // 2), speech, np.zeros(tr.SAMPLE_RATE)))
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(tr.SAMPLE_RATE)
+        wf.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+
+@pytest.mark.parametrize("mode", ["chunked", "streaming"])
+def test_replay_drains_as_soon_as_the_pipeline_is_idle(mode, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tr, "ASR_MODE", mode)
+    monkeypatch.setattr(tr, "ASR_DECODER", "transcribe")
+    monkeypatch.setattr(tr, "TRANSLATOR_BACKEND", "stub")
+    monkeypatch.setattr(tr, "TTS_BACKEND", "stub")
+    monkeypatch.setattr(tr, "STATS_INTERVAL_S", 0)
+    monkeypatch.setattr(tr, "ReplayClock", ShortDrainClock)
+    write_speech_wav(tmp_path / "in.wav")
+
+    translator = tr.AudioTranslator(model_loader=ReadyLoader(FakeWhisper()))
+    summary = translator.run_replay(str(tmp_path / "in.wav"))
+
+    assert summary['drain_s'] < DRAIN_TIMEOUT_S / 2
+    capture = translator.audio_queue.snapshot()
+    assert capture['processed'] + capture['dropped'] == capture['in'] > 0
+    assert translator.mt_queue.snapshot()['processed'] >= 1
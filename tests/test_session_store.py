@@ -0,0 +1,24 @@
+from session_store import SessionStore, export_markdown, search
+
+
+def test_export_uses_session_languages(tmp_path):
+    db = str(tmp_path / "sessions.sqlite")
+    store = SessionStore(db, source_lang='en', target_lang='fr', flush_interval_s=0.01)
+    store.record("hello | world", "bonjour le monde", ts=0.0)
+    store.close()
+
+    path = export_markdown(db, store.session_id, str(tmp_path / "out.md"))
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[2] == "| Hora | Origen (EN) | Traducción (FR) |"
+    assert lines[3] == "|------|-------------|-----------------|"
+    assert "hello \\| world | bonjour le monde |" in lines[4]
+
+
+def test_search_finds_recorded_phrase(tmp_path):
+    db = str(tmp_path / "sessions.sqlite")
+    store = SessionStore(db, source_lang='en', target_lang='es')
+    store.record("the quick brown fox", "el rápido zorro marrón")
+    store.close()
+    results = search(db, "zorro")
+    assert [r['source_text'] for r in results] == ["the quick brown fox"]
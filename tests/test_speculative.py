@@ -0,0 +1,77 @@
+import concurrent.futures
+
+import pytest
+
+from speculative import Speculator
+
+
+def translate(text):
+    return f"<{text}>"
+
+
+def translate_batch(texts):
+    return [f"[{t}]" for t in texts]
+
+
+@pytest.fixture
+def speculator():
+    s = Speculator(translate, min_words=2, max_words=4)
+    yield s
+    s.shutdown()
+
+
+def test_observe_launches_closed_clauses_only(speculator):
+    speculator.observe("well, I think")
+    speculator.observe("well, I think that we should, maybe")
+    sources = [s.source for s in speculator._open]
+    assert sources == ["well, I think that", "we should,"]
+    assert speculator._stable == "well, I think that we should,"
+
+
+def test_resolve_reuses_matching_clauses_and_translates_the_rest(speculator):
+    speculator.observe("we should go, said Ann")
+    handle = speculator.close()
+    [(text, parts)] = speculator.resolve(["We should go, said Ann today."], [handle], translate_batch, timeout=5)
+    assert text == "<we should go,> [said Ann today.]"
+    assert [audio for _, audio in parts] == [None, None]
+    stats = speculator.stats()
+    assert (stats['proposed'], stats['reused'], stats['discarded']) == (1, 1, 0)
+
+
+def test_clauses_missing_from_final_text_are_cancelled(speculator):
+    speculator.observe("we should go, said")
+    handle = speculator.close()
+    [(text, _)] = speculator.resolve(["They left early."], [handle], translate_batch, timeout=5)
+    assert text == "[They left early.]"
+    assert speculator.stats()['discarded'] == 1
+    assert handle[0].cancelled
+
+
+def test_abandon_discards_open_clauses(speculator):
+    speculator.observe("one two three four five")
+    speculator.abandon()
+    assert speculator._open == [] and speculator._stable == ""
+    assert speculator.stats()['discarded'] == 1
+
+
+def test_failed_speculation_is_translated_again():
+    def flaky(text):
+        raise RuntimeError("sin red")
+
+    speculator = Speculator(flaky, min_words=2, max_words=4)
+    speculator.observe("hello there, friend")
+    [(text, _)] = speculator.resolve(["hello there, friend"], [speculator.close()], translate_batch, timeout=5)
+    assert text == "[hello there,] [friend]"
+    speculator.shutdown()
+
+
+def test_presynthesized_audio_travels_with_its_part():
+    audio = concurrent.futures.Future()
+    audio.set_result(b"pcm")
+    speculator = Speculator(translate, presynth_fn=lambda text: audio, min_words=2, max_words=4)
+    speculator.observe("good morning, everyone")
+    [(_, parts)] = speculator.resolve(["good morning, everyone"], [speculator.close()], translate_batch, timeout=5)
+    assert parts[0] == ("<good morning,>", audio)
+    assert parts[1] == ("[everyone]", None)
+    assert speculator.stats()['audio_reused'] == 1
+    speculator.shutdown()
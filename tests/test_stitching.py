@@ -0,0 +1,56 @@
+import pytest
+
+from stitching import TranscriptStitcher, longest_overlap, tokenize
+
+
+def brute_overlap(history, tokens):
+    for k in range(min(len(history), len(tokens)), 0, -1):
+        if list(tokens[:k]) == list(history[-k:]):
+            return k
+    return 0
+
+
+def test_tokenize_normalizes_and_keeps_positions():
+    assert tokenize("Hello, 'World' it's") == [("hello", 0), ("world", 7), ("it's", 15)]
+
+
+@pytest.mark.parametrize("history, tokens", [
+    ("a b c", "b c d"),
+    ("a b c", "c b a"),
+    ("a a a", "a a b"),
+    ("x y x y", "x y x y z"),
+    ("", "a"),
+    ("a b", ""),
+    ("a b a b a", "a b a c"),
+])
+def test_longest_overlap_matches_brute_force(history, tokens):
+    history, tokens = history.split(), tokens.split()
+    assert longest_overlap(history, tokens) == brute_overlap(history, tokens)
+
+
+def test_overlapping_cut_drops_repeated_start():
+    stitcher = TranscriptStitcher()
+    assert stitcher.stitch("we went to the market") == "we went to the market"
+    assert stitcher.stitch("the market and then home", overlap_s=0.5) == "and then home"
+    assert stitcher.stats()['stitched'] == 1
+
+
+def test_fully_repeated_text_is_dropped():
+    stitcher = TranscriptStitcher()
+    stitcher.stitch("see you tomorrow")
+    assert stitcher.stitch("You tomorrow.", overlap_s=1.0) is None
+    assert stitcher.stats()['dropped'] == 1
+
+
+def test_repeat_without_overlap_is_new_speech():
+    stitcher = TranscriptStitcher()
+    stitcher.stitch("thank you")
+    assert stitcher.stitch("Thank you") == "Thank you"
+    assert stitcher.stats()['repeats_passed'] == 1
+
+
+def test_overlap_is_limited_by_audio_length():
+    stitcher = TranscriptStitcher(words_per_s=2.0, margin_tokens=0)
+    stitcher.stitch("one two three four")
+    # 0.5 s de solapamiento → como mucho una palabra recortada
+    assert stitcher.stitch("three four five", overlap_s=0.5) == "three four five"
@@ -0,0 +1,59 @@
+from streaming_asr import LocalAgreement
+
+
+def words(*texts, start=0.0, step=0.5):
+    return [(start + i * step, start + (i + 1) * step, text) for i, text in enumerate(texts)]
+
+
+def texts(committed):
+    return [w[2] for w in committed]
+
+
+def test_first_hypothesis_commits_nothing():
+    agreement = LocalAgreement(n=2)
+    assert agreement.insert(words("hello", "world"), 0.0) == []
+    assert texts(agreement.tentative()) == ["hello", "world"]
+
+
+def test_commits_longest_common_prefix():
+    agreement = LocalAgreement(n=2)
+    agreement.insert(words("hello", "word"), 0.0)
+    committed = agreement.insert(words("hello", "world", "again"), 0.0)
+    assert texts(committed) == ["hello"]
+    assert texts(agreement.tentative()) == ["world", "again"]
+
+
+def test_comparison_ignores_case_and_punctuation():
+    agreement = LocalAgreement(n=2)
+    agreement.insert(words("Hello,", "there"), 0.0)
+    assert texts(agreement.insert(words("hello", "there."), 0.0)) == ["hello", "there."]
+
+
+def test_n_three_needs_three_agreeing_hypotheses():
+    agreement = LocalAgreement(n=3)
+    assert agreement.insert(words("one", "two"), 0.0) == []
+    assert agreement.insert(words("one", "two"), 0.0) == []
+    assert texts(agreement.insert(words("one", "too"), 0.0)) == ["one"]
+
+
+def test_repeated_committed_words_are_skipped():
+    agreement = LocalAgreement(n=2)
+    agreement.insert(words("good", "morning"), 0.0)
+    agreement.insert(words("good", "morning"), 0.0)
+    # Whisper repite el final confirmado al principio de la ventana siguiente
+    repeated = words("morning", "everyone", start=1.0)
+    agreement.insert(repeated, 1.0)
+    assert texts(agreement.tentative()) == ["everyone"]
+
+
+def test_words_before_committed_time_are_ignored():
+    agreement = LocalAgreement(n=2)
+    agreement.insert(words("old", "new", start=0.0, step=1.0), 1.0)
+    assert texts(agreement.tentative()) == ["new"]
+
+
+def test_flush_commits_pending_words():
+    agreement = LocalAgreement(n=2)
+    agreement.insert(words("pending", "words"), 0.0)
+    assert texts(agreement.flush()) == ["pending", "words"]
+    assert agreement.tentative() == []
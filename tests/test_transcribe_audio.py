@@ -0,0 +1,78 @@
+import io
+import json
+import os
+
+import numpy as np
+
+import transcribe_audio as ta
+
+SECONDS = 20
+
+
+class FakeProcess:
+    """FFmpeg falso: entrega el PCM desde `start_s` y termina con `returncode`"""
+
+    def __init__(self, pcm, returncode=0, stderr=b""):
+        self.stdout = io.BytesIO(pcm)
+        self.stderr = io.BytesIO(stderr)
+        self.exit_code = returncode
+        self.returncode = None
+
+    def wait(self):
+        self.returncode = self.exit_code
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+class SecondsModel:
+    """Un segmento por segundo; el texto es el segundo absoluto codificado en el audio"""
+
+    def transcribe(self, audio, **kwargs):
+        segments = []
+        for k in range(len(audio) // ta.SAMPLE_RATE):
+            second = round(audio[k * ta.SAMPLE_RATE] * 32768 / 100)
+            segments.append({'start': float(k), 'end': float(k + 1), 'text': f" second {second}"})
+        return {'segments': segments}
+
+
+def seconds_pcm(start_s, end_s):
+    samples = np.repeat(np.arange(SECONDS, dtype=np.int16) * 100, ta.SAMPLE_RATE)
+    return samples[int(start_s * ta.SAMPLE_RATE):int(end_s * ta.SAMPLE_RATE)].tobytes()
+
+
+def script_seconds(path):
+    with open(path, encoding="utf-8") as f:
+        return [int(line.split("second ")[1]) for line in f if "second " in line]
+
+
+def run(audio_path, monkeypatch, fail_at_s=None):
+    def fake_stream(path, start_s=0.0, sample_rate=ta.SAMPLE_RATE):
+        if fail_at_s is None:
+            return FakeProcess(seconds_pcm(start_s, SECONDS))
+        return FakeProcess(seconds_pcm(start_s, fail_at_s), returncode=1, stderr=b"Invalid data found")
+
+    monkeypatch.setattr(ta, "pcm_stream", fake_stream)
+    return ta.transcribe_streaming(audio_path, window_s=6.0, overlap_s=1.0, model=SecondsModel())
+
+
+def test_failed_read_keeps_the_checkpoint_and_resume_completes_the_script(tmp_path, monkeypatch):
+    audio_path = str(tmp_path / "long.wav")
+    open(audio_path, "wb").close()
+    output_file = audio_path + "_guion.txt"
+
+    # FFmpeg muere a mitad de la tercera ventana: la lectura corta no es el final
+    assert run(audio_path, monkeypatch, fail_at_s=14) is None
+    with open(ta.checkpoint_path(output_file), encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert checkpoint['script_bytes'] == os.path.getsize(output_file)
+    assert script_seconds(output_file) == list(range(int(checkpoint['committed_s'])))
+
+    # Lo escrito tras el checkpoint (un corte a mitad de línea) se trunca al reanudar
+    with open(output_file, "a", encoding="utf-8") as f:
+        f.write("[00:00:99 - 00:01:00] second 99")
+
+    assert run(audio_path, monkeypatch) == output_file
+    assert script_seconds(output_file) == list(range(SECONDS))
+    assert not os.path.exists(ta.checkpoint_path(output_file))
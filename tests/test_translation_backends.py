@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from translation_backends import (CachedTranslator, StubBackend, TranslatorBackend,
+                                  create_translator, normalize_text)
+
+
+class ScriptedBackend(TranslatorBackend):
+    """Devuelve las respuestas indicadas por texto (None simula un fallo)"""
+
+    name = "scripted"
+
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = answers
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        return self.answers.get(text, f"<{text}>")
+
+
+class HangingBackend(TranslatorBackend):
+    """La primera llamada se cuelga hasta que se suelta `release`"""
+
+    name = "hanging"
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.hung = False
+
+    def translate(self, text):
+        if not self.hung:
+            self.hung = True
+            self.release.wait(5)
+        return text.upper()
+
+
+def test_backend_must_implement_translate():
+    with pytest.raises(TypeError):
+        TranslatorBackend()
+
+
+def test_cache_key_normalizes_spaces_and_case():
+    assert normalize_text("  Hello \n  World ") == normalize_text("hello world")
+    translator = CachedTranslator(StubBackend())
+    translator.translate_batch(["Hello  world", "hello world"])
+    assert translator.backend.calls == 1
+    assert translator.stats()['memory_hits'] == 0
+    translator.translate("HELLO WORLD")
+    assert translator.stats()['memory_hits'] == 1
+    translator.close()
+
+
+def test_disk_cache_is_shared_by_source_and_target(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    first = CachedTranslator(StubBackend(target='es'), db_path=db)
+    first.translate("good morning")
+    first.close()
+
+    same = CachedTranslator(StubBackend(target='es'), db_path=db)
+    assert same.translate("Good  morning") == "[es] good morning"
+    assert same.stats()['disk_hits'] == 1
+    same.close()
+
+    other = CachedTranslator(StubBackend(target='fr'), db_path=db)
+    assert other.translate("good morning") == "[fr] good morning"
+    assert other.stats()['disk_hits'] == 0
+    other.close()
+
+
+def test_failed_translations_are_not_cached(tmp_path):
+    backend = ScriptedBackend({"fails": None, "empty": ""})
+    translator = CachedTranslator(backend, db_path=str(tmp_path / "cache.sqlite"))
+    assert translator.translate_batch(["fails", "empty", "works"]) == [None, "", "<works>"]
+    # Ni la LRU ni SQLite guardaron los fallos: se vuelven a pedir
+    backend.calls.clear()
+    translator.translate_batch(["fails", "empty", "works"])
+    assert backend.calls == ["fails", "empty"]
+    translator.close()
+
+
+def test_timeout_replaces_the_hung_worker_pool():
+    backend = HangingBackend()
+    translator = CachedTranslator(backend, timeout=0.2, retries=0)
+    hung_pool = translator._executor
+    with pytest.raises(TimeoutError):
+        translator.translate("first")
+    assert translator._executor is not hung_pool
+    assert translator.translate("second") == "SECOND"
+    assert translator.stats()['timeouts'] == 1
+    backend.release.set()
+    translator.close()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_translator("nope")
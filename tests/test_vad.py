@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from vad import EnergyVAD, VoiceActivityDetector, create_vad
+
+SAMPLE_RATE = 16000
+BLOCK = 512
+
+
+def tone(seconds, amplitude, freq=440.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def blocks(signal):
+    return [signal[i:i + BLOCK] for i in range(0, len(signal) - BLOCK + 1, BLOCK)]
+
+
+def test_detector_without_detect_cannot_be_built():
+    with pytest.raises(TypeError):
+        VoiceActivityDetector()
+
+
+def test_energy_vad_detects_tone_and_holds_hangover():
+    vad = EnergyVAD(SAMPLE_RATE, hangover_ms=100)
+    silence = np.zeros(BLOCK, np.float32)
+    assert not any(vad.is_speech(silence) for _ in range(10))
+    assert any(vad.is_speech(b) for b in blocks(tone(0.3, 0.3)))
+    # El hangover mantiene la voz unos bloques tras el final
+    assert vad.is_speech(silence)
+    for _ in range(10):
+        last = vad.is_speech(silence)
+    assert not last
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_vad("nope")
@@ -1,13 +1,34 @@
-import whisper
+import argparse
+import glob
+import json
 import os
+import subprocess
 import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-def transcribe_audio(audio_path, model_name="base"):
+import numpy as np
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".wma", ".mp4", ".mkv", ".webm")
+DEFAULT_AUDIO = r"C:\Users\petra\Documents\TraductorX\audioPETRA.aac"
+
+def load_model(model_name, int8=False):
+    """whisper.load_model, opcionalmente con cuantización dinámica int8 (ver cpu_inference.py)"""
+    import whisper
+    if not int8:
+        return whisper.load_model(model_name)
+    from cpu_inference import quantize_whisper
+    return quantize_whisper(whisper.load_model(model_name, device="cpu"))
+
+def transcribe_audio(audio_path, model_name="base", int8=False):
     """
     Transcribe un archivo de audio usando OpenAI Whisper.
     Args:
         audio_path (str): Ruta al archivo de audio.
         model_name (str): Nombre del modelo Whisper a usar (tiny, base, small, medium, large).
+        int8 (bool): Cuantización dinámica int8 de las capas lineales (CPU).
     """
     if not os.path.exists(audio_path):
         print(f"❌ Error: El archivo no existe: {audio_path}")
@@ -15,7 +36,7 @@ def transcribe_audio(audio_path, model_name="base"):
 
     print(f"🔄 Cargando modelo Whisper '{model_name}'...")
     try:
-        model = whisper.load_model(model_name)
+        model = load_model(model_name, int8)
     except Exception as e:
         print(f"❌ Error cargando el modelo: {e}")
         return
@@ -23,42 +44,52 @@ def transcribe_audio(audio_path, model_name="base"):
     try:
         # Transcribir el audio
         result = model.transcribe(audio_path, fp16=False)
-        
+
         print("\n✅ Transcripción completada. Generando formato guión...")
-        print("=" * 60)
-
-        # Preparar contenido con formato de guión (segmentos)
-        script_lines = []
-        for segment in result["segments"]:
-            start_time = format_timestamp(segment["start"])
-            end_time = format_timestamp(segment["end"])
-            text = segment["text"].strip()
-            
-            # Formato: [MM:SS] Texto...
-            line = f"[{start_time} -> {end_time}] {text}"
-            script_lines.append(line)
-            
-            # Opcional: Imprimir en consola los primeros
-            if len(script_lines) < 10: 
-                print(line)
-        
-        if len(script_lines) >= 10:
-            print("... (resto del contenido en el archivo) ...")
-
-        print("=" * 60)
-
-        # Guardar en archivo de texto
-        output_file = audio_path + "_guion.txt"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(f"TRANSCRIPCIÓN TIPO GUIÓN - {os.path.basename(audio_path)}\n")
-            f.write("="*80 + "\n\n")
-            f.write("\n".join(script_lines))
-        
-        print(f"💾 Guión guardado en: {output_file}")
+        write_script(audio_path, result["segments"])
 
     except Exception as e:
         print(f"❌ Error durante la transcripción: {e}")
 
+def write_script(audio_path, segments):
+    """Imprime los primeros segmentos y guarda el guión junto al audio"""
+    print("=" * 60)
+
+    # Preparar contenido con formato de guión (segmentos)
+    script_lines = []
+    for segment in segments:
+        line = format_script_line(segment)
+        script_lines.append(line)
+
+        # Opcional: Imprimir en consola los primeros
+        if len(script_lines) < 10:
+            print(line)
+
+    if len(script_lines) >= 10:
+        print("... (resto del contenido en el archivo) ...")
+
+    print("=" * 60)
+
+    # Guardar en archivo de texto
+    output_file = audio_path + "_guion.txt"
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(script_header(audio_path))
+        f.write("\n".join(script_lines))
+
+    print(f"💾 Guión guardado en: {output_file}")
+    return output_file
+
+def script_header(audio_path):
+    return f"TRANSCRIPCIÓN TIPO GUIÓN - {os.path.basename(audio_path)}\n" + "="*80 + "\n\n"
+
+def format_script_line(segment):
+    start_time = format_timestamp(segment["start"])
+    end_time = format_timestamp(segment["end"])
+    text = segment["text"].strip()
+
+    # Formato: [MM:SS] Texto...
+    return f"[{start_time} -> {end_time}] {text}"
+
 def format_timestamp(seconds):
     """Convierte segundos a formato MM:SS"""
     minutes = int(seconds // 60)
@@ -66,10 +97,373 @@ def format_timestamp(seconds):
     return f"{minutes:02d}:{seconds:02d}"
 
 
+# ---------------------------------------------------------------------------
+# Modo lote: archivos largos repartidos entre varios procesos
+# ---------------------------------------------------------------------------
+
+def load_audio(path, sample_rate=SAMPLE_RATE):
+    """Decodifica con FFmpeg a float32 mono (como whisper.load_audio, pero sin importar torch)"""
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def find_split_points(audio, sample_rate=SAMPLE_RATE, chunk_s=120.0, search_s=10.0, frame_ms=30):
+    """
+    Puntos de corte para trozos de ~chunk_s segundos: alrededor de cada
+    múltiplo de chunk_s se busca el frame más silencioso en ±search_s,
+    para no partir palabras. Devuelve la lista de muestras [0, ..., len(audio)].
+    """
+    total = len(audio)
+    chunk = int(chunk_s * sample_rate)
+    if total <= chunk * 1.5:
+        return [0, total]
+
+    frame = int(sample_rate * frame_ms / 1000)
+    n_frames = total // frame
+    energy = np.square(audio[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+
+    # Repartir en trozos iguales: el último no queda mucho más corto que el resto
+    n_chunks = max(1, int(round(total / chunk)))
+    step = total / n_chunks
+    search = int(search_s * sample_rate) // frame
+
+    points = [0]
+    for k in range(1, n_chunks):
+        center = int(k * step) // frame
+        lo = max(center - search, points[-1] // frame + 1)
+        hi = min(center + search + 1, n_frames)
+        if lo >= hi:
+            continue
+        points.append((lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2)
+    points.append(total)
+    return points
+
+_worker_model = None
+_worker_options = {}
+
+def _init_worker(model_name, threads, options, int8=False, interop_threads=None):
+    """Una vez por proceso: hilos de torch y carga del modelo"""
+    global _worker_model, _worker_options
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from cpu_inference import configure_threads
+    configure_threads(threads, interop_threads)
+    _worker_model = load_model(model_name, int8)
+    _worker_options = options
+
+def _transcribe_chunk(job):
+    """Transcribe un trozo y devuelve sus segmentos en tiempo absoluto"""
+    file_index, chunk_index, offset_s, audio = job
+    result = _worker_model.transcribe(audio, fp16=False, **_worker_options)
+    segments = []
+    for segment in result["segments"]:
+        segments.append({
+            "start": segment["start"] + offset_s,
+            "end": segment["end"] + offset_s,
+            "text": segment["text"],
+        })
+    return file_index, chunk_index, segments
+
+def expand_inputs(inputs):
+    """Archivos, directorios (sus audios) y patrones glob → lista ordenada sin repetidos"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [os.path.join(item, name) for name in os.listdir(item)
+                       if name.lower().endswith(AUDIO_EXTENSIONS)]
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        for path in sorted(matches):
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def transcribe_batch(inputs, model_name="base", workers=None, threads=1, chunk_s=120.0, language=None,
+                     int8=False, interop_threads=None):
+    """
+    Transcribe uno o varios archivos largos con un ProcessPoolExecutor:
+    cada archivo se parte en silencios en trozos de ~chunk_s, los trozos se
+    reparten entre `workers` procesos (modelo cargado una vez por proceso,
+    `threads` hilos de torch cada uno) y los segmentos se vuelven a unir en
+    orden con sus tiempos absolutos.
+    """
+    paths = expand_inputs(inputs)
+    missing = [p for p in paths if not os.path.exists(p)]
+    for path in missing:
+        print(f"❌ Error: El archivo no existe: {path}")
+    paths = [p for p in paths if p not in missing]
+    if not paths:
+        return []
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    options = {"language": language} if language else {}
+    print(f"🔄 {len(paths)} archivo(s) | {workers} procesos x {threads} hilo(s) | modelo '{model_name}'"
+          f"{' (int8)' if int8 else ''}")
+
+    started = time.monotonic()
+    outputs = []
+    # "spawn": los workers no heredan el estado de hilos de OpenMP/torch del padre
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(model_name, threads, options, int8, interop_threads)) as pool:
+        pending = None
+        for file_index, path in enumerate(paths):
+            try:
+                audio = load_audio(path)
+            except Exception as e:
+                print(f"❌ Error decodificando {path}: {e}")
+                continue
+
+            points = find_split_points(audio, SAMPLE_RATE, chunk_s)
+            duration = len(audio) / SAMPLE_RATE
+            print(f"📼 {os.path.basename(path)}: {duration / 60:.1f} min en {len(points) - 1} trozos")
+            futures = [
+                pool.submit(_transcribe_chunk, (file_index, i, start / SAMPLE_RATE, audio[start:end]))
+                for i, (start, end) in enumerate(zip(points[:-1], points[1:]))
+            ]
+            # Mientras estos trozos se transcriben, se decodifica el siguiente archivo
+            if pending is not None:
+                outputs.append(_finish_file(*pending))
+            pending = (path, duration, futures)
+        if pending is not None:
+            outputs.append(_finish_file(*pending))
+
+    outputs = [o for o in outputs if o]
+    elapsed = time.monotonic() - started
+    total_audio = sum(duration for _, duration in outputs)
+    print(f"\n✅ {len(outputs)} archivo(s), {total_audio / 60:.1f} min de audio en {elapsed:.1f}s "
+          f"(x{total_audio / max(elapsed, 1e-9):.1f} tiempo real)")
+    return [path for path, _ in outputs]
+
+def _finish_file(path, duration, futures):
+    """Espera los trozos de un archivo, une sus segmentos en orden y escribe el guión"""
+    chunks = {}
+    try:
+        for future in futures:
+            _, chunk_index, segments = future.result()
+            chunks[chunk_index] = segments
+    except Exception as e:
+        print(f"❌ Error durante la transcripción de {path}: {e}")
+        return None
+    segments = [segment for i in sorted(chunks) for segment in chunks[i]]
+    print(f"\n✅ {os.path.basename(path)}: {len(segments)} segmentos")
+    return write_script(path, segments), duration
+
+# ---------------------------------------------------------------------------
+# Modo streaming: memoria acotada, guión incremental y reanudación
+# ---------------------------------------------------------------------------
+
+MAX_CARRY_S = 30.0  # Audio sin confirmar que se arrastra como máximo a la ventana siguiente
+
+def checkpoint_path(output_file):
+    return output_file + ".ckpt"
+
+def load_checkpoint(output_file):
+    """Punto de reanudación {'committed_s', 'script_bytes', 'prompt'} o None"""
+    try:
+        with open(checkpoint_path(output_file), "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(output_file) or os.path.getsize(output_file) < checkpoint.get("script_bytes", 0):
+        return None
+    return checkpoint
+
+def save_checkpoint(output_file, checkpoint):
+    # Escritura atómica: un corte a mitad nunca deja un checkpoint roto
+    tmp_path = checkpoint_path(output_file) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path(output_file))
+
+def pcm_stream(path, start_s=0.0, sample_rate=SAMPLE_RATE):
+    """Proceso FFmpeg de larga duración que entrega PCM s16le mono por stdout"""
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if start_s > 0:
+        cmd += ["-ss", f"{start_s:.3f}"]
+    cmd += ["-i", path, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"]
+    # Con -loglevel error stderr es corto: se lee al terminar sin riesgo de llenar el pipe
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+def read_samples(stream, buffer):
+    """Llena `buffer` (int16) desde el pipe; devuelve cuántas muestras se leyeron (< len al final)"""
+    view = memoryview(buffer).cast("B")
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled // 2
+
+def transcribe_streaming(audio_path, model_name="base", window_s=300.0, overlap_s=5.0, language=None, model=None,
+                         int8=False):
+    """
+    Transcribe un archivo de cualquier duración con memoria constante: lee
+    PCM de un FFmpeg en ventanas de `window_s`, confirma los segmentos que
+    terminan antes de los últimos `overlap_s` segundos (el resto se vuelve a
+    decodificar con la ventana siguiente), los añade al guión según se
+    confirman y guarda un checkpoint para reanudar tras un corte.
+
+    Si FFmpeg termina con error (archivo dañado, pipe roto...), lo leído tras
+    el último checkpoint no se confirma: el checkpoint se conserva para
+    reanudar y se devuelve None.
+    """
+    if not os.path.exists(audio_path):
+        print(f"❌ Error: El archivo no existe: {audio_path}")
+        return None
+
+    if model is None:
+        print(f"🔄 Cargando modelo Whisper '{model_name}'...")
+        model = load_model(model_name, int8)
+
+    output_file = audio_path + "_guion.txt"
+    checkpoint = load_checkpoint(output_file)
+    if checkpoint:
+        # Lo escrito después del último checkpoint se descarta y se vuelve a transcribir
+        with open(output_file, "r+b") as f:
+            f.truncate(checkpoint["script_bytes"])
+        committed_s = checkpoint["committed_s"]
+        prompt = checkpoint.get("prompt", "")
+        print(f"⏯️  Reanudando {os.path.basename(audio_path)} desde {format_timestamp(committed_s)}")
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(script_header(audio_path))
+        committed_s = 0.0
+        prompt = ""
+
+    window = int(window_s * SAMPLE_RATE)
+    max_carry = int(MAX_CARRY_S * SAMPLE_RATE)
+    options = {"language": language} if language else {}
+    # Buffers preasignados: el pico de memoria no depende de la duración del archivo
+    raw = np.empty(window, dtype=np.int16)
+    audio = np.empty(window + max_carry, dtype=np.float32)
+    carry = 0
+    buffer_start_s = committed_s
+    lines_written = 0
+    started = time.monotonic()
+
+    proc = pcm_stream(audio_path, committed_s)
+    error = None
+    try:
+        with open(output_file, "a", encoding="utf-8") as script:
+            while True:
+                n = read_samples(proc.stdout, raw)
+                final = n < window
+                if final and proc.wait() != 0:
+                    # Lectura corta por un fallo, no por el final del archivo
+                    stderr = proc.stderr.read().decode("utf-8", "replace").strip() if proc.stderr else ""
+                    error = f"FFmpeg terminó con código {proc.returncode}" + (f": {stderr}" if stderr else "")
+                    break
+                np.multiply(raw[:n], 1.0 / 32768.0, out=audio[carry:carry + n], casting="unsafe")
+                length = carry + n
+                if length == 0:
+                    break
+                buffer_end_s = buffer_start_s + length / SAMPLE_RATE
+
+                result = model.transcribe(audio[:length], fp16=False, initial_prompt=prompt or None, **options)
+
+                # Confirmar lo que no toca el solapamiento final (todo, si es la última ventana)
+                limit_s = buffer_end_s if final else buffer_end_s - overlap_s
+                lines = []
+                for segment in result["segments"]:
+                    start = buffer_start_s + segment["start"]
+                    end = min(buffer_start_s + segment["end"], buffer_end_s)
+                    if end > limit_s:
+                        break
+                    if start < committed_s - 0.5 or not segment["text"].strip():
+                        continue  # Ya confirmado en la ventana anterior
+                    lines.append(format_script_line({"start": start, "end": end, "text": segment["text"]}))
+                    committed_s = end
+                    prompt = (prompt + segment["text"])[-200:]
+
+                if lines:
+                    script.write("\n".join(lines) + "\n")
+                    script.flush()
+                    os.fsync(script.fileno())
+                    lines_written += len(lines)
+                    for line in lines:
+                        print(line)
+
+                if final:
+                    break
+
+                # Sin segmentos confirmados (silencio, música): avanzar igualmente
+                if committed_s < buffer_end_s - overlap_s - MAX_CARRY_S:
+                    committed_s = buffer_end_s - overlap_s
+                save_checkpoint(output_file, {
+                    "committed_s": committed_s,
+                    "script_bytes": script.tell(),
+                    "prompt": prompt,
+                })
+
+                # El audio aún sin confirmar pasa al principio del buffer
+                keep_from = min(max(int((committed_s - buffer_start_s) * SAMPLE_RATE), 0), length)
+                keep_from = max(keep_from, length - max_carry)
+                carry = length - keep_from
+                audio[:carry] = audio[keep_from:length]
+                buffer_start_s += keep_from / SAMPLE_RATE
+                print(f"   ⏱️  {format_timestamp(committed_s)} confirmado | {lines_written} líneas | "
+                      f"{(buffer_start_s + carry / SAMPLE_RATE) / max(time.monotonic() - started, 1e-9):.1f}s audio/s")
+    finally:
+        proc.kill()
+        proc.wait()
+
+    if error is not None:
+        print(f"❌ Error leyendo {audio_path} ({error}). "
+              f"Se reanudará desde {format_timestamp(committed_s)}")
+        return None
+    try:
+        os.remove(checkpoint_path(output_file))
+    except OSError:
+        pass
+    print(f"💾 Guión guardado en: {output_file}")
+    return output_file
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transcripción tipo guión con Whisper")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_AUDIO],
+                        help="Archivos, directorios o patrones glob (p.ej. 'grabaciones/*.mp3')")
+    # "base" es un buen equilibrio entre velocidad y precisión (ej. "small", "medium" para más precisión)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos en paralelo (por defecto: núcleos / hilos)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Hilos de torch por proceso (por defecto 1 en paralelo, todos con --serial/--stream)")
+    parser.add_argument("--interop-threads", type=int, default=None, help="Hilos de torch entre operaciones")
+    parser.add_argument("--int8", action="store_true",
+                        help="Cuantización dinámica int8 de las capas lineales (más rápido en CPU)")
+    parser.add_argument("--chunk-seconds", type=float, default=120.0,
+                        help="Duración aproximada de cada trozo (se corta en silencios)")
+    parser.add_argument("--language", default=None, help="Idioma fijo (p.ej. 'en'); por defecto se detecta")
+    parser.add_argument("--serial", action="store_true",
+                        help="Modo anterior: un solo proceso, archivo completo")
+    parser.add_argument("--stream", action="store_true",
+                        help="Memoria constante: ventanas desde un pipe de FFmpeg, guión incremental y reanudable")
+    parser.add_argument("--window-seconds", type=float, default=300.0, help="Ventana del modo --stream")
+    parser.add_argument("--overlap-seconds", type=float, default=5.0,
+                        help="Solapamiento entre ventanas del modo --stream")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    # Ruta del archivo especificada por el usuario
-    audio_file = r"C:\Users\petra\Documents\TraductorX\audioPETRA.aac"
-    
-    # Puedes cambiar el modelo aquí si deseas mayor precisión (ej. "small", "medium")
-    # "base" es un buen equilibrio entre velocidad y precisión.
-    transcribe_audio(audio_file, model_name="base")
+    args = parse_args()
+    if (args.serial or args.stream) and (args.threads or args.interop_threads):
+        from cpu_inference import configure_threads
+        configure_threads(args.threads, args.interop_threads)
+    if args.serial:
+        for audio_file in expand_inputs(args.inputs):
+            transcribe_audio(audio_file, model_name=args.model, int8=args.int8)
+    elif args.stream:
+        print(f"🔄 Cargando modelo Whisper '{args.model}'{' (int8)' if args.int8 else ''}...")
+        model = load_model(args.model, args.int8)
+        for audio_file in expand_inputs(args.inputs):
+            transcribe_streaming(audio_file, window_s=args.window_seconds, overlap_s=args.overlap_seconds,
+                                 language=args.language, model=model)
+    else:
+        transcribe_batch(args.inputs, model_name=args.model, workers=args.workers, threads=args.threads or 1,
+                         chunk_s=args.chunk_seconds, language=args.language, int8=args.int8,
+                         interop_threads=args.interop_threads)
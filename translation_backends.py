@@ -0,0 +1,299 @@
+"""
+Backends de traducción con caché
+================================
+- TranslatorBackend: interfaz mínima (translate / translate_batch).
+- GoogleBackend: deep-translator (red). El lote se envía como una sola
+  petición separando las frases por saltos de línea.
+- StubBackend: local y determinista, con latencia simulada opcional, para
+  medir aciertos de caché y latencia sin red.
+- CachedTranslator: envuelve cualquier backend con una caché LRU en memoria,
+  una caché SQLite persistente opcional, timeout por llamada y reintentos.
+"""
+
+import abc
+import collections
+import concurrent.futures
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalize_text(text):
+    """Clave de caché: espacios colapsados y sin distinguir mayúsculas"""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class TranslatorBackend(abc.ABC):
+    """Interfaz de un traductor. Las subclases implementan translate()."""
+
+    name = "base"
+
+    def __init__(self, source='en', target='es'):
+        self.source = source
+        self.target = target
+
+    @abc.abstractmethod
+    def translate(self, text):
+        """Traducción de una frase"""
+
+    def translate_batch(self, texts):
+        return [self.translate(t) for t in texts]
+
+
+class GoogleBackend(TranslatorBackend):
+    name = "google"
+    BATCH_SEPARATOR = "\n"
+    MAX_BATCH_CHARS = 4500  # Google limita cada petición a 5000 caracteres
+
+    def __init__(self, source='en', target='es'):
+        super().__init__(source, target)
+        from deep_translator import GoogleTranslator
+        self._translator = GoogleTranslator(source=source, target=target)
+
+    def translate(self, text):
+        return self._translator.translate(text)
+
+    def translate_batch(self, texts):
+        joined = self.BATCH_SEPARATOR.join(t.replace("\n", " ") for t in texts)
+        if len(texts) > 1 and len(joined) <= self.MAX_BATCH_CHARS:
+            parts = (self._translator.translate(joined) or "").split(self.BATCH_SEPARATOR)
+            if len(parts) == len(texts):
+                return [p.strip() for p in parts]
+        # El servicio fusionó o partió líneas: volver a una petición por frase
+        return [self.translate(t) for t in texts]
+
+
+class StubBackend(TranslatorBackend):
+    """Traductor falso: devuelve '[es] texto' tras `latency_ms` por llamada"""
+
+    name = "stub"
+
+    def __init__(self, source='en', target='es', latency_ms=0):
+        super().__init__(source, target)
+        self.latency_s = latency_ms / 1000.0
+        self.calls = 0
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def translate(self, text):
+        self._wait()
+        return f"[{self.target}] {text}"
+
+    def translate_batch(self, texts):
+        self._wait()
+        return [f"[{self.target}] {t}" for t in texts]
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+class SQLiteTranslationCache:
+    """
+    Caché persistente: (origen, destino, texto normalizado) → traducción.
+    No guarda el backend: una base de datos es de un solo backend real.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " source TEXT NOT NULL, target TEXT NOT NULL, key TEXT NOT NULL,"
+            " translation TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (source, target, key))"
+        )
+        self._conn.commit()
+
+    def get_many(self, source, target, keys):
+        if not keys:
+            return {}
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, translation FROM translations"
+                f" WHERE source = ? AND target = ? AND key IN ({placeholders})",
+                (source, target, *keys),
+            ).fetchall()
+        return dict(rows)
+
+    def put_many(self, source, target, items):
+        items = [(key, value) for key, value in items if value]
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                [(source, target, key, value, now) for key, value in items],
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedTranslator:
+    """
+    Traductor con caché de dos niveles (LRU en memoria → SQLite → backend).
+    Las frases que faltan en ambas cachés se envían en UNA llamada a
+    translate_batch del backend, con timeout y reintentos.
+    """
+
+    def __init__(self, backend, cache_size=1024, db_path=None, timeout=5.0, retries=1):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.retries = retries
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SQLiteTranslationCache(db_path) if db_path else None
+        # Hilos aparte para poder abandonar una llamada colgada sin bloquear la etapa
+        self._executor = self._new_executor()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.backend_calls = 0
+        self.backend_seconds = 0.0
+        self.timeouts = 0
+
+    @property
+    def source(self):
+        return self.backend.source
+
+    @property
+    def target(self):
+        return self.backend.target
+
+    def _memory_get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.cache_size:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _new_executor():
+        return concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="mt-call")
+
+    def _replace_executor(self, hung):
+        """Un hilo se quedó colgado: las llamadas siguientes van a un pool nuevo"""
+        with self._lock:
+            if self._executor is hung:
+                self._executor = self._new_executor()
+        # Las llamadas en curso del pool viejo terminan; sus hilos se liberan al acabar
+        hung.shutdown(wait=False)
+
+    def _call_backend(self, texts):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            started = time.monotonic()
+            with self._lock:
+                executor = self._executor
+                future = executor.submit(self.backend.translate_batch, texts)
+            try:
+                result = future.result(timeout=self.timeout)
+                self.backend_calls += 1
+                self.backend_seconds += time.monotonic() - started
+                return result
+            except concurrent.futures.TimeoutError:
+                self.timeouts += 1
+                if not future.cancel():
+                    self._replace_executor(executor)
+                last_error = TimeoutError(f"Traducción sin respuesta en {self.timeout}s")
+            except Exception as e:
+                last_error = e
+            if attempt < self.retries:
+                time.sleep(0.2 * (attempt + 1))
+        raise last_error
+
+    def translate(self, text):
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts):
+        results = [None] * len(texts)
+        keys = [normalize_text(t) for t in texts]
+
+        missing = {}
+        for i, key in enumerate(keys):
+            value = self._memory_get(key)
+            if value is not None:
+                self.memory_hits += 1
+                results[i] = value
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing and self._disk is not None:
+            found = self._disk.get_many(self.source, self.target, list(missing))
+            for key, value in found.items():
+                self.disk_hits += len(missing[key])
+                self._memory_put(key, value)
+                for i in missing.pop(key):
+                    results[i] = value
+
+        if missing:
+            pending_keys = list(missing)
+            self.misses += sum(len(v) for v in missing.values())
+            translated = self._call_backend([texts[missing[k][0]] for k in pending_keys])
+            for key, value in zip(pending_keys, translated):
+                # None o "" es un fallo del backend: no se cachea (la próxima vez se reintenta)
+                if value:
+                    self._memory_put(key, value)
+                for i in missing[key]:
+                    results[i] = value
+            if self._disk is not None:
+                self._disk.put_many(self.source, self.target, list(zip(pending_keys, translated)))
+
+        return results
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'lookups': lookups,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'backend_calls': self.backend_calls,
+            'avg_backend_ms': (self.backend_seconds / self.backend_calls * 1000.0) if self.backend_calls else 0.0,
+            'timeouts': self.timeouts,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._disk is not None:
+            self._disk.close()
+
+
+def create_translator(backend='google', source='en', target='es', cache_size=1024,
+                      db_path=None, timeout=5.0, retries=1, **backend_kwargs):
+    """Construye un CachedTranslator con el backend indicado por nombre"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de traducción desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return CachedTranslator(
+        BACKENDS[backend](source, target, **backend_kwargs),
+        cache_size=cache_size,
+        db_path=db_path,
+        timeout=timeout,
+        retries=retries,
+    )
@@ -5,191 +5,591 @@ Traductor de Audio en Tiempo Real - REPRODUCCIÓN SECUENCIAL SIN CORTES
 SOLUCIÓN: Las traducciones se reproducen UNA POR UNA, sin solaparse
 """
 
+import time
+_T0 = time.perf_counter()  # Referencia para --profile-startup
+
+import argparse
 import numpy as np
-import sounddevice as sd
-import whisper
-from deep_translator import GoogleTranslator
 import queue
 import threading
 import sys
 import os
-import pyttsx3
-import time
-from difflib import SequenceMatcher
 import wave
 import tempfile
 import asyncio
-import edge_tts
 import subprocess
+import importlib.util
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from audio_buffers import AudioRingBuffer, SPSCSampleRing
+from streaming_asr import StreamingTranscriber
+from vad import create_vad
+from translation_backends import create_translator
+from tts_cache import PCMCache
+from playback import PlaybackFeeder, PlaybackStats
+from dsp import StretchController, resample
+from tts_stream import AsyncTTSRunner, OrderedSynthesizer, mp3_streaming_available, stream_edge_tts, stream_stub_tts
+from pipeline import (BoundedQueue, PipelineStage, format_stats,
+                      OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_MERGE)
+from session_store import SessionStore, export_markdown
+from stitching import TranscriptStitcher
+from startup import ModelLoader, StartupProfiler
+from cpu_inference import describe as describe_inference, pin_current_thread
+from live_decoder import LiveDecoder
+from speculative import Speculator
+from metrics import LatencyTracker, MetricsExporter
+from replay import PACE_FAST, PACE_REALTIME, NullSink, ReplayClock, WavSink, load_wav
 
 # Configuración
+WHISPER_MODEL = "tiny"      # tiny, base, small, medium
+WHISPER_WARMUP = True       # Decodificación de prueba al cargar (la primera frase real ya no paga la inicialización)
+# Decodificación de cada frase: "live" (whisper.decode directo, ver live_decoder.py) o
+# "transcribe" (model.transcribe de siempre: bucle de 30s, marcas de tiempo, 5 temperaturas)
+ASR_DECODER = "live"
+LIVE_MAX_TOKENS = 128       # Tokens máximos por frase (corta bucles de alucinación)
+LIVE_MAX_FALLBACKS = 1      # Reintentos con temperatura si la salida es repetitiva o improbable
+# Inferencia en CPU (ver cpu_inference.py y bench_quantization.py)
+ASR_INT8 = False            # Cuantización dinámica int8 de las capas lineales de Whisper
+ASR_INTRA_OP_THREADS = None # Hilos de torch por operación (None = todos los núcleos; compiten con audio y TTS)
+ASR_INTER_OP_THREADS = None # Hilos de torch entre operaciones (None = por defecto)
+ASR_CPU_CORES = None        # Núcleos para el hilo de Whisper, p.ej. "2-5" (solo Linux; None = sin fijar)
 SAMPLE_RATE = 16000
 CHUNK_DURATION = 5          # Máximo tiempo antes de forzar corte (aumentado para permitir frases largas)
 CHUNK_SAMPLES = SAMPLE_RATE * CHUNK_DURATION
-SILENCE_THRESHOLD = 0.01    # Umbral de amplitud para considerar "silencio"
+BLOCK_SIZE = int(SAMPLE_RATE * 0.05)  # Muestras por bloque de los streams de entrada/salida (50ms)
+VAD_BACKEND = "energy"      # "energy" (NumPy, suelo de ruido adaptativo) u "onnx" (Silero VAD, requiere onnxruntime)
+VAD_MODEL_PATH = "silero_vad.onnx"
+VAD_HANGOVER_MS = 200       # Se sigue considerando voz este tiempo tras el último bloque con voz
+MIN_SPEECH_MS = 250         # Cortes con menos voz que esto no se mandan a Whisper
 SILENCE_TRIGGER_MS = 600    # Cuántos ms de silencio activan el corte inmediato
 MIN_AUDIO_MS = 500          # Mínimo de audio necesario para intentar procesar
+CUT_OVERLAP_MS = 300        # Audio que se conserva tras un corte por tamaño máximo (evita perder palabras partidas; la costura quita lo repetido)
+STITCH_HISTORY_TOKENS = 64  # Palabras recientes contra las que se alinea cada transcripción nueva
+
+# Modo ASR: "chunked" (corte por silencio, transcripción completa) o
+# "streaming" (re-decodifica una ventana deslizante y confirma el prefijo estable)
+ASR_MODE = "chunked"
+STREAMING_STEP_MS = 500     # Cada cuánto audio nuevo se vuelve a decodificar la ventana
+STREAMING_WINDOW_S = 15     # Ventana máxima de audio sin confirmar
+STREAMING_AGREEMENT = 2     # Hipótesis consecutivas que deben coincidir para confirmar
+SHOW_PARTIALS = True        # Mostrar hipótesis parciales en consola
+# Especulación (solo streaming): traducir, y sintetizar sin reproducir, las cláusulas
+# ya confirmadas antes de que llegue la frase final; al llegar se reutiliza lo que no cambió
+SPECULATIVE_MT = False
+SPECULATIVE_TTS = True      # Presintetizar también el audio de cada cláusula especulada
+SPECULATIVE_MIN_WORDS = 3   # Palabras mínimas para especular una cláusula cerrada por puntuación
+SPECULATIVE_MAX_WORDS = 10  # Sin puntuación, se especula cada tanto de palabras confirmadas
+
+# Traducción
+TRANSLATOR_BACKEND = "google"   # "google" o "stub" (local, sin red: para pruebas y benchmarks)
+TRANSLATION_CACHE_SIZE = 1024   # Entradas en la caché LRU en memoria
+TRANSLATION_CACHE_DB = os.path.join("transcriptions", "translation_cache.sqlite")  # None = sin caché persistente
+TRANSLATION_TIMEOUT_S = 5       # Timeout por llamada al backend
+MT_BATCH_MAX = 8                # Frases en cola que se traducen juntas en una sola llamada
+
+# Colas entre etapas (segmentación → ASR → traducción → TTS)
+# Políticas: "block", "drop_oldest" o "merge" (fusiona frases adyacentes)
+CAPTURE_QUEUE_SIZE = 200    # Bloques de 50ms pendientes de segmentar (10s)
+ASR_QUEUE_SIZE = 3
+ASR_QUEUE_POLICY = OVERFLOW_MERGE
+MT_QUEUE_SIZE = 5
+MT_QUEUE_POLICY = OVERFLOW_MERGE
+TTS_QUEUE_SIZE = 8
+TTS_QUEUE_POLICY = OVERFLOW_BLOCK
+MAX_MERGED_AUDIO_S = 25     # Whisper procesa ventanas de 30s: no fusionar por encima de esto
+STATS_INTERVAL_S = 30       # Cada cuánto imprimir contadores de las etapas (0 = nunca)
+
+# Latencia por frase (captura → VAD → ASR → MT → TTS → reproducción)
+METRICS_INTERVAL_S = 10     # Cada cuánto volcar p50/p95/p99
+METRICS_JSONL = os.path.join("transcriptions", "metrics.jsonl")  # None = no volcar
+METRICS_PROM = os.path.join("transcriptions", "metrics.prom")    # Textfile de Prometheus (None = no volcar)
+
+# Historial: SQLite con búsqueda de texto completo (python session_store.py search "...")
+SESSION_DB = os.path.join("transcriptions", "sessions.sqlite")
+SESSION_MARKDOWN = True     # Exportar también session_*.md al terminar
 
 ENABLE_VOICE = True
 VOICE_SPEED = 200
 VOICE_VOLUME = 1.0
+TTS_BACKEND = "edge"        # "edge" (Edge-TTS) o "stub" (tono local, sin red: para pruebas y --input)
+# Voz sugerida: es-ES-ElviraNeural (España, Mujer) o es-MX-DaliaNeural (México, Mujer)
+TTS_VOICE = "es-ES-ElviraNeural"
+# Voz por defecto de cada idioma de destino (los que no están usan TTS_VOICE)
+TTS_VOICES = {
+    'es': TTS_VOICE,
+    'en': "en-US-JennyNeural",
+    'fr': "fr-FR-DeniseNeural",
+    'de': "de-DE-KatjaNeural",
+    'it': "it-IT-ElsaNeural",
+    'pt': "pt-BR-FranciscaNeural",
+}
+# Idiomas de destino: una sola pasada de Whisper, y MT + TTS en paralelo para cada uno.
+# 'voice' (opcional, por defecto TTS_VOICES), 'channel' (canal de la salida; None = todos)
+# y 'device' (índice de otro dispositivo de salida; None = el elegido al arrancar)
+TARGETS = [
+    {'lang': 'es', 'voice': None, 'channel': None, 'device': None},
+]
+FLAGS = {'es': '🇪🇸', 'en': '🇺🇸', 'fr': '🇫🇷', 'de': '🇩🇪', 'it': '🇮🇹', 'pt': '🇧🇷'}
+TTS_RATE = "+0%"            # Velocidad de Edge-TTS (p.ej. "+10%")
+TTS_STREAMING = True        # Decodificar el MP3 en memoria mientras llega (requiere PyAV: pip install av)
+PLAYBACK_RING_S = 2         # Audio ya preparado para el callback de salida
+PLAYBACK_TIME_STRETCH = True   # Acelerar el audio pendiente (sin cambiar el tono) cuando la traducción se retrasa
+PLAYBACK_STRETCH_START_S = 3    # Retraso a partir del cual se empieza a acelerar
+PLAYBACK_MAX_LAG_S = 8          # Retraso al que se alcanza la aceleración máxima
+PLAYBACK_MAX_SPEEDUP = 1.5      # Factor máximo (1.5 = 50% más rápido)
+TTS_CONCURRENCY = 3         # Frases sintetizándose a la vez (se reproducen en orden)
+TTS_CACHE_DIR = os.path.join("transcriptions", "tts_cache")  # None = sin caché de audio
+TTS_CACHE_MAX_MB = 200      # Presupuesto en disco de la caché de audio (LRU)
 
-class AudioTranslator:
-    def __init__(self):
-        print("🔄 Cargando modelo Whisper...")
-        # fp16=False para compatibilidad asegurada, pero si tienes GPU potente Whisper usará CUDA internamente si está disponible
-        self.model = whisper.load_model("tiny")
-        self.translator = GoogleTranslator(source='en', target='es')
-        self.audio_queue = queue.Queue()
-        self.is_running = True
-        self.last_text = ""
+def create_model_loader(profiler=None):
+    """ModelLoader con la configuración de este módulo (también para multi_stream.py y server.py)"""
+    print(f"   ⚙️  Inferencia ASR: {describe_inference(ASR_INT8, ASR_INTRA_OP_THREADS, ASR_INTER_OP_THREADS, ASR_CPU_CORES)}")
+    return ModelLoader(WHISPER_MODEL, profiler, warmup=WHISPER_WARMUP, sample_rate=SAMPLE_RATE,
+                       int8=ASR_INT8, intra_op_threads=ASR_INTRA_OP_THREADS,
+                       inter_op_threads=ASR_INTER_OP_THREADS).start()
+
+def voice_for(lang):
+    """Voz por defecto para un idioma de destino"""
+    if lang not in TTS_VOICES:
+        print(f"⚠️ Sin voz por defecto para '{lang}': se usa {TTS_VOICE} (configura TTS_VOICES o 'voice')")
+    return TTS_VOICES.get(lang, TTS_VOICE)
+
+def parse_target(spec):
+    """"fr:fr-FR-DeniseNeural@1" → {'lang': 'fr', 'voice': 'fr-FR-DeniseNeural', 'channel': 1}"""
+    spec, _, channel = spec.partition("@")
+    lang, _, voice = spec.partition(":")
+    return {'lang': lang.strip(), 'voice': voice.strip() or None,
+            'channel': int(channel) if channel.strip() else None, 'device': None}
+
+class TargetChannel:
+    """
+    Un idioma de destino: traductor, voz, cola de TTS, anillo de reproducción
+    e historial propios. Todos los destinos de un AudioTranslator comparten la
+    misma pasada de Whisper; cada uno suena en su canal de la salida principal
+    (o en todos) o en su propio dispositivo.
+    """
+
+    def __init__(self, owner, lang, voice=None, channel=None, device=None, queue_name="tts",
+                 log_file=None, primary=True):
+        self.owner = owner
+        self.lang = lang
+        self.voice = voice or voice_for(lang)
+        self.channel = channel      # Canal del OutputStream (None = el mismo audio en todos)
+        self.device = device        # Dispositivo de salida propio (None = el principal)
+        # Solo el destino principal marca las trazas de latencia: cada traza termina una sola vez
+        self.primary = primary
+        # El stub no toca la caché persistente: sus "traducciones" envenenarían las de Google
+        self.translator = create_translator(
+            TRANSLATOR_BACKEND, source=owner.source_lang, target=lang,
+            cache_size=TRANSLATION_CACHE_SIZE,
+            db_path=TRANSLATION_CACHE_DB if TRANSLATOR_BACKEND != "stub" else None,
+            timeout=TRANSLATION_TIMEOUT_S,
+        )
+        self.speculator = None
+        if SPECULATIVE_MT and ASR_MODE == "streaming":
+            self.speculator = Speculator(
+                self.translator.translate,
+                self._presynthesize if ENABLE_VOICE and SPECULATIVE_TTS else None,
+                SPECULATIVE_MIN_WORDS, SPECULATIVE_MAX_WORDS,
+            )
         
         # Sistema de TTS SECUENCIAL
-        self.tts_text_queue = queue.Queue()  # Cola de TEXTOS a convertir
+        self.tts_text_queue = BoundedQueue(queue_name, TTS_QUEUE_SIZE, TTS_QUEUE_POLICY,
+                                           merge_fn=owner._merge_text, on_discard=owner._discard_item)  # Cola de TEXTOS a convertir
         self.tts_audio_segments = queue.Queue()  # Cola de AUDIOS completos
         
-        # Buffer de reproducción actual
-        self.playback_lock = threading.Lock()
-        self.current_segment = None
-        self.current_position = 0
-        
-        if ENABLE_VOICE:
-            # Worker que convierte texto → audio
-            self.tts_generator_thread = threading.Thread(target=self._tts_generator_worker, daemon=True)
-            self.tts_generator_thread.start()
-        
-        # Configuración de LOG (Historial)
-        self.log_dir = "transcriptions"
-        os.makedirs(self.log_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.log_file = os.path.join(self.log_dir, f"session_{timestamp}.md")
+        # Anillo SPSC entre la etapa de reproducción y el callback de salida
+        self.playback_ring = SPSCSampleRing(int(PLAYBACK_RING_S * SAMPLE_RATE))
+        self.playback_stats = PlaybackStats(SAMPLE_RATE)
+        # Bloque preasignado para mezclar varios destinos en el callback (con margen
+        # por si PortAudio pide más que BLOCK_SIZE: lo que no cabe sale en silencio)
+        self.mix_buffer = np.zeros(4 * BLOCK_SIZE, dtype=np.float32)
+        self.stretch = None
         
-        with open(self.log_file, "w", encoding="utf-8") as f:
-            f.write(f"# 📝 Historial de Traducción - {timestamp}\n\n")
-            f.write("| Hora | Origen (EN) | Traducción (ES) |\n")
-            f.write("|------|-------------|-----------------|\n")
-            
-        print(f"📂 Guardando historial en: {self.log_file}")
-        print("✅ Modelo cargado")
-        print("=" * 70)
-        
-    def save_log(self, text_en, text_es):
-        try:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            # Escapar pipes | para evitar romper la tabla markdown
-            clean_en = text_en.replace("|", "\|").replace("\n", " ")
-            clean_es = text_es.replace("|", "\|").replace("\n", " ")
-            
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(f"| {timestamp} | {clean_en} | {clean_es} |\n")
-        except Exception as e:
-            print(f"❌ Error guardando log: {e}")
+        self.log_file = log_file
+        self.session_store = SessionStore(SESSION_DB, source_lang=owner.source_lang, target_lang=lang)
+
+    def start(self):
+        """Arranca los workers de TTS y de reproducción"""
+        if not ENABLE_VOICE:
+            return self
+        # Worker que convierte texto → audio
+        self.tts_generator_thread = threading.Thread(target=self._tts_generator_worker, daemon=True)
+        self.tts_generator_thread.start()
         
-    def speak(self, text):
+        # Worker que pasa el audio al anillo del callback de salida
+        self.stretch = (StretchController(PLAYBACK_MAX_LAG_S, PLAYBACK_STRETCH_START_S, PLAYBACK_MAX_SPEEDUP)
+                        if PLAYBACK_TIME_STRETCH else None)
+        self.playback_feeder = PlaybackFeeder(
+            self.tts_audio_segments, self.playback_ring, self.playback_stats, lambda: self.owner.is_running,
+            tracker=self.owner.metrics, stretch=self.stretch,
+        )
+        self.playback_thread = threading.Thread(target=self.playback_feeder.run, daemon=True)
+        self.playback_thread.start()
+        return self
+
+    def translate(self, texts, speculations=None):
+        """[traducción], [partes presintetizadas o None] de cada frase"""
+        if self.speculator is not None and speculations and any(speculations):
+            # Se reutilizan las cláusulas especuladas; solo lo demás va al backend
+            resolved = self.speculator.resolve(texts, speculations, self.translator.translate_batch,
+                                               timeout=TRANSLATION_TIMEOUT_S)
+            return [text for text, _ in resolved], [parts for _, parts in resolved]
+        return self.translator.translate_batch(texts), [None] * len(texts)
+
+    def save_log(self, text_en, text, duration=None, trace=()):
+        # Solo encola: el hilo del historial agrupa y escribe
+        self.session_store.record(text_en, text, duration, trace[0] if trace else None)
+
+    def speak(self, text, trace=(), parts=None):
+        """parts: [(texto, Future del audio presintetizado o None)] que juntos forman `text`"""
+        if not self.primary:
+            trace = ()
         if not ENABLE_VOICE or not text:
+            # La traza termina aquí: no habrá audio que reproducir
+            self.owner.metrics.mark(trace, 'discarded')
             return
-        self.tts_text_queue.put(text)
-    
+        item = {'text': text, 'trace': trace}
+        if parts and any(audio is not None for _, audio in parts):
+            item['parts'] = parts
+        self.tts_text_queue.put(item)
+
+    def is_idle(self):
+        ring = self.playback_ring
+        return self.tts_audio_segments.empty() and not ring.active and ring.available() == 0
+
+    def output_ready(self, block_size):
+        ring = self.playback_ring
+        return ring.available() >= block_size or (ring.available() > 0 and not ring.active)
+
     def _tts_generator_worker(self):
         """Worker que convierte TEXTO a AUDIO usando Edge-TTS (Neural)"""
-        # Voz sugerida: es-ES-ElviraNeural (España, Mujer) o es-MX-DaliaNeural (México, Mujer)
-        # Puedes cambiarla aquí.
-        VOICE = "es-ES-ElviraNeural"  
+        stub = TTS_BACKEND == "stub"
+        streaming = TTS_STREAMING and mp3_streaming_available()
+        mode = 'stub local' if stub else 'streaming en memoria' if streaming else 'MP3 + FFmpeg'
+        print(f"   🗣️  TTS Neural Activo: {self.voice} [{self.lang}] ({mode}, {TTS_CONCURRENCY} en paralelo)")
         
-        print(f"   🗣️  TTS Neural Activo: {VOICE}")
+        # Todos los destinos comparten el loop; cada uno sintetiza hasta TTS_CONCURRENCY frases
+        synthesizer = OrderedSynthesizer(self.owner.tts_runner, self.tts_audio_segments, self._synthesize, SAMPLE_RATE,
+                                         concurrency=TTS_CONCURRENCY)
+        tts_cache = self.owner.tts_cache
         
-        while self.is_running:
+        while self.owner.is_running:
             try:
-                # Esperar por texto a convertir
-                try:
-                    text = self.tts_text_queue.get(timeout=1)
-                except queue.Empty:
-                    continue
-
-                mp3_filename = tempfile.mktemp(suffix=".mp3")
-                wav_filename = tempfile.mktemp(suffix=".wav")
-                
-                try:
-                    # 1. Generar Audio MP3 con Edge-TTS (Async)
-                    # Ejecutamos la corrutina de forma síncrona en este hilo
-                    asyncio.run(self._generate_edge_tts(text, VOICE, mp3_filename))
+                # 1. Admitir textos nuevos mientras haya hueco (sin esperar si hay trabajo en curso)
+                while synthesizer.has_capacity():
+                    try:
+                        item = self.tts_text_queue.get(timeout=0 if synthesizer.inflight else 1)
+                    except queue.Empty:
+                        break
                     
-                    # 2. Convertir a WAV compatible (16kHz, Mono) con FFmpeg
-                    # Esto asegura que numpy pueda leerlo sin problemas
-                    subprocess.run([
-                        "ffmpeg", "-y", "-i", mp3_filename,
-                        "-ar", str(SAMPLE_RATE),  # 16000
-                        "-ac", "1",               # Mono
-                        "-f", "wav", 
-                        wav_filename
-                    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    text = item['text']
+                    label = text[:50] + '...' if len(text) > 50 else text
+                    cached = tts_cache.get(self.voice, TTS_RATE, text) if tts_cache is not None else None
+                    if cached is not None:
+                        synthesizer.submit_ready(text, label, cached, trace=item['trace'])
+                    elif 'parts' in item:
+                        # Frase con cláusulas ya presintetizadas: solo se sintetiza lo que falta
+                        parts = item['parts']
+                        synthesizer.submit(text, label, trace=item['trace'],
+                                           synth_fn=lambda _, on_pcm, parts=parts: self._synthesize_parts(parts, on_pcm))
+                    else:
+                        synthesizer.submit(text, label, trace=item['trace'])
+                
+                # 2. Liberar audio en el orden original de las frases
+                for job in synthesizer.pump(timeout=0.05):
+                    self.tts_text_queue.stats.record_done(time.monotonic() - job.started, error=job.error is not None)
+                    if job.error is not None or not len(job.audio):
+                        self.owner.metrics.mark(job.trace, 'discarded')
+                        if job.error is not None:
+                            print(f"❌ Error TTS generación: {job.error}")
+                        continue
                     
-                    if os.path.exists(wav_filename) and os.path.getsize(wav_filename) > 0:
-                        with wave.open(wav_filename, 'rb') as wf:
-                            channels = wf.getnchannels()
-                            rate = wf.getframerate()
-                            frames = wf.readframes(wf.getnframes())
-                            
-                            dtype = np.int16
-                            if wf.getsampwidth() == 1:
-                                dtype = np.int8
-                            
-                            audio_int = np.frombuffer(frames, dtype=dtype)
-                            audio_float = audio_int.astype(np.float32) / 32768.0
-                            
-                            if channels > 1:
-                                audio_float = audio_float.reshape(-1, channels).mean(axis=1)
-
-                            # No debería ser necesario resamplear si ffmpeg lo hizo, pero por seguridad:
-                            if rate != SAMPLE_RATE:
-                                audio_float = self._resample_audio(audio_float, rate, SAMPLE_RATE)
-                            
-                            duration = len(audio_float) / SAMPLE_RATE
-                            
-                            self.tts_audio_segments.put({
-                                'audio': audio_float,
-                                'duration': duration,
-                                'text': text[:50] + '...' if len(text) > 50 else text
-                            })
-                            
-                            print(f"   🔊 TTS Neural: {duration:.1f}s | Cola: {self.tts_audio_segments.qsize()}")
-                            
-                except Exception as e:
-                    print(f"❌ Error TTS generación: {e}")
-                finally:
-                    # Limpieza
-                    if os.path.exists(mp3_filename):
-                        try: os.remove(mp3_filename)
-                        except: pass
-                    if os.path.exists(wav_filename):
-                        try: os.remove(wav_filename)
-                        except: pass
+                    duration = len(job.audio) / SAMPLE_RATE
+                    if job.from_cache:
+                        print(f"   💾 TTS caché: {duration:.1f}s | Cola: {self.tts_audio_segments.qsize()}")
+                    else:
+                        if tts_cache is not None:
+                            tts_cache.put(self.voice, TTS_RATE, job.text, job.audio)
+                        print(f"   🔊 TTS Neural: {duration:.1f}s | Cola: {self.tts_audio_segments.qsize()}")
                             
             except Exception as e:
                 print(f"❌ Error TTS worker: {e}")
 
-    async def _generate_edge_tts(self, text, voice, filename):
+    async def _synthesize(self, text, on_pcm):
+        """Sintetiza `text` con el backend configurado, entregando PCM a on_pcm a medida que llega"""
+        if TTS_BACKEND == "stub":
+            await stream_stub_tts(text, on_pcm, SAMPLE_RATE)
+        elif TTS_STREAMING and mp3_streaming_available():
+            await stream_edge_tts(text, self.voice, TTS_RATE, on_pcm, SAMPLE_RATE)
+        else:
+            audio = await self._synthesize_with_ffmpeg(text, self.voice)
+            if audio is not None:
+                on_pcm(audio)
+
+    async def _synthesize_parts(self, parts, on_pcm):
+        """Audio de una frase por piezas: el presintetizado se espera, el resto se sintetiza"""
+        for text, future in parts:
+            audio = None
+            if future is not None and not future.cancelled():
+                try:
+                    # shield: si se cancela esta tarea, el CancelledError no llega a la presíntesis
+                    audio = await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise  # Se canceló la síntesis de la frase, no la pieza
+                except Exception:
+                    audio = None  # Fallida: se sintetiza ahora
+            if audio is not None and len(audio):
+                on_pcm(audio)
+            else:
+                await self._synthesize(text, on_pcm)
+
+    async def _collect_pcm(self, text):
+        chunks = []
+        await self._synthesize(text, chunks.append)
+        return np.concatenate(chunks) if chunks else None
+
+    def _presynthesize(self, text):
+        """Síntesis especulativa (sin reproducir). Devuelve un Future con el PCM o None."""
+        if self.owner.tts_runner is None:
+            return None
+        # Fuera del semáforo: la frase final que la reutiliza ocupa un hueco mientras la espera
+        return self.owner.tts_runner.submit(self._collect_pcm(text), limit=False)
+
+    async def _synthesize_with_ffmpeg(self, text, voice):
+        """Ruta clásica: MP3 temporal + conversión con FFmpeg. Devuelve float32 mono o None"""
+        mp3_filename = tempfile.mktemp(suffix=".mp3")
+        
+        try:
+            # 1. Generar Audio MP3 con Edge-TTS en el loop persistente
+            await self._generate_edge_tts(text, voice, mp3_filename, TTS_RATE)
+            
+            # 2. La conversión con FFmpeg bloquea: fuera del loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._mp3_to_pcm, mp3_filename)
+        finally:
+            if os.path.exists(mp3_filename):
+                try: os.remove(mp3_filename)
+                except: pass
+
+    def _mp3_to_pcm(self, mp3_filename):
+        """Convierte un MP3 a float32 mono a SAMPLE_RATE con FFmpeg"""
+        wav_filename = tempfile.mktemp(suffix=".wav")
+        
+        try:
+            # Convertir a WAV compatible (16kHz, Mono) con FFmpeg
+            # Esto asegura que numpy pueda leerlo sin problemas
+            subprocess.run([
+                "ffmpeg", "-y", "-i", mp3_filename,
+                "-ar", str(SAMPLE_RATE),  # 16000
+                "-ac", "1",               # Mono
+                "-f", "wav", 
+                wav_filename
+            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            
+            if not (os.path.exists(wav_filename) and os.path.getsize(wav_filename) > 0):
+                return None
+            
+            with wave.open(wav_filename, 'rb') as wf:
+                channels = wf.getnchannels()
+                rate = wf.getframerate()
+                frames = wf.readframes(wf.getnframes())
+                
+                dtype = np.int16
+                if wf.getsampwidth() == 1:
+                    dtype = np.int8
+                
+                audio_int = np.frombuffer(frames, dtype=dtype)
+                audio_float = audio_int.astype(np.float32) / 32768.0
+                
+                if channels > 1:
+                    audio_float = audio_float.reshape(-1, channels).mean(axis=1)
+
+                # No debería ser necesario resamplear si ffmpeg lo hizo, pero por seguridad:
+                if rate != SAMPLE_RATE:
+                    audio_float = resample(audio_float, rate, SAMPLE_RATE)
+                
+                return audio_float
+        finally:
+            # Limpieza
+            if os.path.exists(wav_filename):
+                try: os.remove(wav_filename)
+                except: pass
+
+    async def _generate_edge_tts(self, text, voice, filename, rate="+0%"):
         """Generador async wrapper para edge-tts"""
-        communicate = edge_tts.Communicate(text, voice)
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, rate=rate)
         await communicate.save(filename)
-                
-    def _resample_audio(self, audio_data, original_rate, target_rate):
-        if original_rate == target_rate:
-            return audio_data
-        duration = len(audio_data) / original_rate
-        time_old = np.linspace(0, duration, len(audio_data))
-        new_length = int(duration * target_rate)
-        time_new = np.linspace(0, duration, new_length)
-        return np.interp(time_new, time_old, audio_data)
-    
-    def is_similar(self, text1, text2, threshold=0.7):
-        if not text1 or not text2:
-            return False
-        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio() > threshold
+
+    def format(self):
+        lines = [self.playback_stats.format()]
+        if self.stretch is not None:
+            lines.append(self.stretch.format())
+        if self.speculator is not None:
+            lines.append(self.speculator.format())
+        cache = self.translator.stats()
+        lines.append(f"   📊 caché MT: aciertos {cache['hit_rate']:.0%} "
+                     f"({cache['memory_hits']} memoria / {cache['disk_hits']} disco / {cache['misses']} fallos)")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.speculator is not None:
+            self.speculator.shutdown()
+        self.session_store.close()
+        if self.log_file:
+            export_markdown(SESSION_DB, self.session_store.session_id, self.log_file)
+            print(f"📂 Historial exportado a: {self.log_file}")
+        self.translator.close()
+
+class AudioTranslator:
+    def __init__(self, profiler=None, name=None, source_lang='en', target_lang='es', voice=None,
+                 model_loader=None, asr_scheduler=None, targets=None, asr_deadline_ms=None):
+        self.profiler = profiler or StartupProfiler()
+        # Con varios streams (multi_stream.py) cada uno tiene nombre, idiomas y voz propios
+        self.name = name
+        self.source_lang = source_lang
+        # targets: [{'lang', 'voice', 'channel', 'device'}] (ver TARGETS); sin ellos, solo target_lang con `voice`
+        targets = targets or [{'lang': target_lang, 'voice': voice}]
+        # fp16=False para compatibilidad asegurada, pero si tienes GPU potente Whisper usará CUDA internamente si está disponible
+        # El modelo (y torch) se cargan en otro hilo mientras se eligen los dispositivos
+        self.model = None
+        if model_loader is None:
+            print("🔄 Cargando modelo Whisper en segundo plano...")
+            model_loader = create_model_loader(self.profiler)
+        self.model_loader = model_loader
+        # Planificador compartido: las frases de todos los streams se decodifican por lotes
+        self.asr_scheduler = asr_scheduler
+        self.asr_deadline_ms = asr_deadline_ms  # Plazo de lote propio (None = el del planificador)
+        if asr_scheduler is not None:
+            asr_scheduler.register_stream()
+        self.is_running = True
+        self._asr_pinned = False
+        self.live_decoder = None    # Se crea con el modelo (ASR_DECODER = "live")
+        # on_event(dict) recibe parciales y frases finales (server.py las manda al cliente)
+        self.on_event = None
+        # Quita el principio repetido cuando la frase comparte audio con la anterior
+        self.stitcher = TranscriptStitcher(STITCH_HISTORY_TOKENS)
+        self.vad = create_vad(VAD_BACKEND, SAMPLE_RATE, model_path=VAD_MODEL_PATH, hangover_ms=VAD_HANGOVER_MS)
+        # Cada frase lleva un ID de traza de la captura a la reproducción
+        self.metrics = LatencyTracker()
+        
+        # Colas acotadas entre etapas: una etapa lenta ya no frena la captura
+        # La captura nunca bloquea (callback de PortAudio): descarta lo más antiguo
+        self.audio_queue = BoundedQueue("captura", CAPTURE_QUEUE_SIZE, OVERFLOW_DROP_OLDEST)
+        self.asr_queue = BoundedQueue("asr", ASR_QUEUE_SIZE, ASR_QUEUE_POLICY,
+                                      merge_fn=self._merge_audio, on_discard=self._discard_item)
+        self.mt_queue = BoundedQueue("mt", MT_QUEUE_SIZE, MT_QUEUE_POLICY,
+                                     merge_fn=self._merge_text, on_discard=self._discard_item)
+        
+        # Caché de PCM sintetizado: frases repetidas no vuelven a pasar por Edge-TTS/FFmpeg
+        use_cache = TTS_CACHE_DIR and TTS_BACKEND != "stub"
+        self.tts_cache = PCMCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024) if use_cache else None
+        # Un solo event loop de TTS para toda la sesión (antes: asyncio.run por frase), compartido por los destinos
+        self.tts_runner = AsyncTTSRunner(TTS_CONCURRENCY * len(targets)) if ENABLE_VOICE else None
+        
+        # Configuración de LOG (Historial): escritor en segundo plano, sin I/O en el pipeline
+        self.log_dir = "transcriptions"
+        os.makedirs(self.log_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        
+        # Un destino por idioma: la misma frase se traduce y se sintetiza para todos a la vez
+        self.targets = []
+        for i, config in enumerate(targets):
+            lang = config['lang']
+            suffix = "" if i == 0 else f"_{lang}"
+            log_file = (self._stream_path(os.path.join(self.log_dir, f"session_{timestamp}{suffix}.md"))
+                        if SESSION_MARKDOWN else None)
+            self.targets.append(TargetChannel(
+                self, lang, config.get('voice'), config.get('channel'), config.get('device'),
+                queue_name="tts" if len(targets) == 1 else f"tts-{lang}",
+                log_file=log_file, primary=i == 0,
+            ).start())
+        # Los destinos sin dispositivo propio suenan en la salida principal (output_callback)
+        self.output_targets = [t for t in self.targets if t.device is None]
+        # Más de un idioma: MT de los destinos extra en paralelo con la del principal
+        self.mt_executor = (ThreadPoolExecutor(max_workers=len(self.targets) - 1, thread_name_prefix="mt-fanout")
+                            if len(self.targets) > 1 else None)
         
+        # El destino principal conserva los nombres de antes (server.py, multi_stream.py)
+        primary = self.targets[0]
+        self.target_lang = primary.lang
+        self.voice = primary.voice
+        self.translator = primary.translator
+        self.tts_text_queue = primary.tts_text_queue
+        self.tts_audio_segments = primary.tts_audio_segments
+        self.playback_ring = primary.playback_ring
+        self.playback_stats = primary.playback_stats
+        self.session_store = primary.session_store
+        self.log_file = primary.log_file
+        # Las latencias llegan cuando la traza termina (tras la reproducción)
+        self.metrics.on_finished = lambda trace, stages: self.session_store.record_latencies(trace, stages)
+        
+        for target in self.targets:
+            channel = "todos los canales" if target.channel is None else f"canal {target.channel}"
+            device = "" if target.device is None else f", dispositivo {target.device}"
+            print(f"🎯 {self.source_lang} → {target.lang}: {target.voice} ({channel}{device})")
+        sessions = ", ".join(str(t.session_store.session_id) for t in self.targets)
+        print(f"📂 Guardando historial en: {SESSION_DB} (sesión {sessions})")
+        print("=" * 70)
+
+    def _stream_path(self, path):
+        """Con nombre de stream, cada uno escribe su propio archivo (metrics_sala1.prom...)"""
+        if not path or not self.name:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{self.name}{ext}"
+
+    def wait_for_model(self):
+        """Espera a que el hilo de carga termine (sustituye a la pausa fija de 3s)"""
+        if not self.model_loader.is_ready():
+            print("\n⏳ Esperando a que el modelo Whisper esté listo...")
+        with self.profiler.phase("espera del modelo"):
+            self.model = self.model_loader.wait()
+        print("✅ Modelo cargado")
+        
+    def save_log(self, text_en, text_es, duration=None, trace=()):
+        self.targets[0].save_log(text_en, text_es, duration, trace)
+        
+    def speak(self, text, trace=(), parts=None):
+        self.targets[0].speak(text, trace, parts)
+
+    def _discard_item(self, item, kept=None):
+        """Una cola tiró `item`: cierra sus trazas salvo las que sigan vivas en el fusionado"""
+        trace = item.get('trace', ())
+        if kept is not None:
+            trace = tuple(t for t in trace if t not in kept.get('trace', ()))
+        self.metrics.mark(tuple(trace), 'discarded')
+
+    @staticmethod
+    def _merge_audio(previous, new):
+        """Fusiona dos frases de audio pendientes si no exceden la ventana de Whisper"""
+        if len(previous['audio']) + len(new['audio']) > MAX_MERGED_AUDIO_S * SAMPLE_RATE:
+            return None
+        # El solapamiento de la segunda ya está al final de la primera: no duplicarlo
+        return {'audio': np.concatenate((previous['audio'], new['audio'][new.get('overlap', 0):])),
+                'trace': previous['trace'] + new['trace'],
+                'overlap': previous.get('overlap', 0)}
+
+    @staticmethod
+    def _merge_text(previous, new):
+        """Fusiona dos textos pendientes en uno solo (sin perder lo especulado de cada uno)"""
+        merged = {'text': f"{previous['text']} {new['text']}", 'trace': previous['trace'] + new['trace'],
+                  'duration': (previous.get('duration') or 0.0) + (new.get('duration') or 0.0)}
+        if 'speculation' in previous or 'speculation' in new:
+            # Una lista de cláusulas por destino
+            first, second = previous.get('speculation'), new.get('speculation')
+            merged['speculation'] = [a + b for a, b in zip(first, second)] if first and second else first or second
+        if 'parts' in previous or 'parts' in new:
+            merged['parts'] = (previous.get('parts', [(previous['text'], None)])
+                               + new.get('parts', [(new['text'], None)]))
+        return merged
+    
     def select_devices(self):
         """Seleccionar dispositivos"""
+        import sounddevice as sd
         devices = sd.query_devices()
         
         print("\n" + "=" * 70)
@@ -267,61 +667,62 @@ class AudioTranslator:
     def output_callback(self, outdata, frames, time_info, status):
         """
         Callback de SALIDA - REPRODUCCIÓN SECUENCIAL
-        Reproduce un segmento completo antes de pasar al siguiente
+        Corre en el hilo de PortAudio: sin locks, sin asignar buffers y sin I/O.
+        Solo copia de los anillos SPSC a outdata; PlaybackFeeder hace el resto.
         """
-        if status:
-            print(f"⚠️ {status}")
+        self._render(outdata, frames, status, self.output_targets)
+
+    def _device_callback(self, targets):
+        """Callback para el OutputStream propio de unos destinos"""
+        return lambda outdata, frames, time_info, status: self._render(outdata, frames, status, targets)
+
+    @staticmethod
+    def _render(outdata, frames, status, targets):
+        started = time.perf_counter()
         
-        try:
-            with self.playback_lock:
-                # Si no hay segmento actual, intentar obtener el siguiente
-                if self.current_segment is None:
-                    try:
-                        segment = self.tts_audio_segments.get_nowait()
-                        self.current_segment = segment['audio']
-                        self.current_position = 0
-                        print(f"\n   ▶️  Reproduciendo: {segment['text']}")
-                    except queue.Empty:
-                        # No hay nada que reproducir
-                        outdata.fill(0)
-                        return
+        if len(targets) == 1 and targets[0].channel is None:
+            target = targets[0]
+            stats = target.playback_stats
+            try:
+                if status:
+                    stats.status_flags += 1
                 
-                # Calcular cuánto audio tenemos disponible
-                available = len(self.current_segment) - self.current_position
+                read = target.playback_ring.read_into(outdata[:, 0])
                 
-                if available > 0:
-                    # Leer lo que necesitamos
-                    to_read = min(frames, available)
-                    audio_chunk = self.current_segment[
-                        self.current_position:self.current_position + to_read
-                    ]
-                    self.current_position += to_read
-                    
-                    # Si terminamos este segmento, marcarlo como None para cargar el siguiente
-                    if self.current_position >= len(self.current_segment):
-                        remaining_queue = self.tts_audio_segments.qsize()
-                        print(f"   ✅ Terminado | {remaining_queue} en cola")
-                        self.current_segment = None
-                        self.current_position = 0
-                    
-                    # Preparar salida
-                    output_buffer = np.zeros(frames, dtype=np.float32)
-                    output_buffer[:to_read] = audio_chunk
-                    
-                    # Convertir a stereo si es necesario
-                    if outdata.shape[1] > 1:
-                        output_stereo = np.tile(output_buffer.reshape(-1, 1), (1, outdata.shape[1]))
-                        outdata[:] = output_stereo
-                    else:
-                        outdata[:] = output_buffer.reshape(-1, 1)
-                else:
-                    outdata.fill(0)
-                    
-        except Exception as e:
-            print(f"❌ Error output: {e}")
-            import traceback
-            traceback.print_exc()
-            outdata.fill(0)
+                # Mono → resto de canales por broadcast, sin buffers intermedios
+                if outdata.shape[1] > 1:
+                    outdata[:, 1:] = outdata[:, :1]
+                
+                stats.record_read(read, frames, target.playback_ring.active)
+                        
+            except Exception:
+                outdata.fill(0)
+                stats.errors += 1
+            
+            stats.record_callback(time.perf_counter() - started, frames)
+            return
+        
+        # Varios idiomas: cada anillo se suma a su canal (o a todos si no tiene)
+        outdata.fill(0)
+        for target in targets:
+            stats = target.playback_stats
+            try:
+                if status:
+                    stats.status_flags += 1
+                n = min(frames, len(target.mix_buffer))
+                block = target.mix_buffer[:n]
+                read = target.playback_ring.read_into(block)
+                if target.channel is None:
+                    outdata[:n] += block[:, None]
+                elif target.channel < outdata.shape[1]:
+                    outdata[:n, target.channel] += block
+                stats.record_read(read, n, target.playback_ring.active)
+            except Exception:
+                stats.errors += 1
+        
+        elapsed = time.perf_counter() - started
+        for target in targets:
+            target.playback_stats.record_callback(elapsed, frames)
     
     def input_callback(self, indata, frames, time_info, status):
         """Callback de ENTRADA"""
@@ -334,95 +735,400 @@ class AudioTranslator:
             else:
                 mono_input = indata
             
-            self.audio_queue.put(mono_input.copy())
+            # Hora de llegada del bloque: inicio de la traza de la frase
+            self.audio_queue.put_nowait((time.monotonic(), mono_input.copy()))
             
         except Exception as e:
             print(f"❌ Error input: {e}")
         
     def process_audio(self):
         """
-        Procesa audio con DETECCIÓN DE SILENCIO (VAD simulado)
-        Corta y traduce en cuanto detecta una pausa, para mayor fluidez.
+        Procesa audio con DETECCIÓN DE ACTIVIDAD DE VOZ (VAD)
+        Corta en cuanto detecta una pausa y entrega la frase a la etapa ASR,
+        sin esperar a que termine la transcripción/traducción anterior.
+        Los cortes sin voz suficiente se descartan sin llamar a Whisper.
         """
-        audio_buffer = []
-        silence_counter = 0  # Contador de chunks de silencio consecutivos
+        # Buffer circular preasignado: sin listas ni concatenaciones por bloque
+        audio_buffer = AudioRingBuffer(CHUNK_SAMPLES)
+        silence_samples = 0  # Muestras de silencio consecutivas
+        speech_samples = 0   # Muestras con voz en el buffer actual
+        speech_started = None  # Llegada del primer bloque con voz de la frase
+        pending_overlap = 0    # Muestras que el buffer comparte con la frase anterior
         
-        # Cuántos chunks de silencio equivalen al tiempo de disparo
-        # Asumiendo que el callback nos da chunks de ~50ms (blocksize 0.05s)
-        blocks_per_second = 20 # 1 / 0.05
-        silence_blocks_trigger = int((SILENCE_TRIGGER_MS / 1000.0) * blocks_per_second)
+        # Umbrales en muestras: no dependen del tamaño de bloque del stream
+        silence_trigger_samples = int((SILENCE_TRIGGER_MS / 1000.0) * SAMPLE_RATE)
         min_audio_lenght_samples = int((MIN_AUDIO_MS / 1000.0) * SAMPLE_RATE)
+        min_speech_samples = int((MIN_SPEECH_MS / 1000.0) * SAMPLE_RATE)
+        overlap_samples = int((CUT_OVERLAP_MS / 1000.0) * SAMPLE_RATE)
 
-        print(f"🔧 Config VAD: Silencio Trigger = {SILENCE_TRIGGER_MS}ms ({silence_blocks_trigger} bloques)")
+        print(f"🔧 Config VAD ({self.vad.name}): Silencio Trigger = {SILENCE_TRIGGER_MS}ms "
+              f"({silence_trigger_samples // BLOCK_SIZE} bloques de {BLOCK_SIZE})")
         
         while self.is_running:
             try:
-                chunk = self.audio_queue.get(timeout=1)
-                
-                # Calcular volumen RMS del chunk actual
-                rms = np.sqrt(np.mean(chunk**2))
+                arrived, chunk = self.audio_queue.get(timeout=1)
+                block_started = time.monotonic()
                 
-                if rms < SILENCE_THRESHOLD:
-                    silence_counter += 1
+                if self.vad.is_speech(chunk):
+                    silence_samples = 0 # Reiniciar si hay voz
+                    speech_samples += len(chunk)
+                    if speech_started is None:
+                        speech_started = arrived
                 else:
-                    silence_counter = 0 # Reiniciar si hay ruido/voz
+                    silence_samples += len(chunk)
                 
-                audio_buffer.append(chunk.flatten())
+                audio_buffer.append(chunk)
                 
-                # Calcular longitud actual del buffer
-                current_samples = sum(len(a) for a in audio_buffer)
+                # Longitud actual del buffer (O(1))
+                current_samples = len(audio_buffer)
                 
                 should_process = False
+                keep_samples = 0
                 
                 # 1. Criterio de Silencio: Si hemos hablado suficiente Y hay silencio ahora
-                if current_samples > min_audio_lenght_samples and silence_counter >= silence_blocks_trigger:
+                if current_samples > min_audio_lenght_samples and silence_samples >= silence_trigger_samples:
                     should_process = True
                     # print("   ✂️  Corte por silencio")
                 
                 # 2. Criterio de Tamaño Máximo: Si el buffer se llenó demasiado (evitar overflow)
                 elif current_samples >= CHUNK_SAMPLES:
                     should_process = True
+                    # Conservar una cola de solapamiento: el corte pudo partir una palabra
+                    keep_samples = overlap_samples
                     # print("   ✂️  Corte por tamaño máximo")
                 
                 if should_process:
-                    audio_data = np.concatenate(audio_buffer)
-                    audio_buffer = [] # Limpiar buffer
-                    silence_counter = 0
+                    has_speech = speech_samples >= min_speech_samples
+                    self.vad.record_utterance(has_speech)
                     
-                    audio_float = audio_data.astype(np.float32)
-                    self.transcribe_and_translate(audio_float)
+                    if has_speech:
+                        # Una sola copia: el ASR corre en otro hilo y el buffer se reutiliza
+                        audio_float = audio_buffer.copy()
+                        trace = self.metrics.start(speech_started)
+                        self.metrics.mark((trace,), 'cut')
+                        # No bloquea la segmentación salvo con política "block"
+                        self.asr_queue.put({'audio': audio_float, 'trace': (trace,), 'overlap': pending_overlap})
+                    
+                    silence_samples = 0
+                    speech_samples = 0
+                    speech_started = None
+                    pending_overlap = keep_samples
+                    audio_buffer.consume(keep_samples)
+
+                self.audio_queue.stats.record_done(time.monotonic() - block_started)
                     
             except queue.Empty:
                 continue
             except Exception as e:
                 print(f"❌ Error proceso: {e}") 
                                 
-    def transcribe_and_translate(self, audio):
-        """Transcribe y traduce"""
-        try:
-            result = self.model.transcribe(audio, language='en', fp16=False)
+    def process_audio_streaming(self):
+        """
+        Segmentación + ASR en streaming: cada STREAMING_STEP_MS de audio nuevo
+        se re-decodifica la ventana y el texto estable pasa directo a la etapa MT.
+        Una pausa de SILENCE_TRIGGER_MS cierra la frase en curso.
+        """
+        transcriber = StreamingTranscriber(
+            self.model,
+            language=self.source_lang,
+            sample_rate=SAMPLE_RATE,
+            max_window_s=STREAMING_WINDOW_S,
+            agreement=STREAMING_AGREEMENT,
+            # Modelo compartido: las decodificaciones no pueden solaparse con los lotes del planificador
+            model_lock=self.asr_scheduler.model_lock if self.asr_scheduler is not None else None,
+        )
+        step_samples = int((STREAMING_STEP_MS / 1000.0) * SAMPLE_RATE)
+        silence_trigger_samples = int((SILENCE_TRIGGER_MS / 1000.0) * SAMPLE_RATE)
+        silence_samples = 0
+        speech_pending = False
+        speech_started = None
+
+        print(f"🔧 Config ASR streaming: paso = {STREAMING_STEP_MS}ms | ventana = {STREAMING_WINDOW_S}s")
+        self._pin_asr_thread()
+
+        while self.is_running:
+            try:
+                chunk = self.audio_queue.get(timeout=1)
+                block_started = time.monotonic()
+
+                # Tomar todo lo que se acumuló mientras se decodificaba
+                chunks = [chunk]
+                while True:
+                    try:
+                        chunks.append(self.audio_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for arrived, c in chunks:
+                    if self.vad.is_speech(c):
+                        silence_samples = 0
+                        speech_pending = True
+                        if speech_started is None:
+                            speech_started = arrived
+                    else:
+                        silence_samples += len(c)
+                    transcriber.insert_audio(c)
+
+                if speech_pending and silence_samples >= silence_trigger_samples:
+                    events = transcriber.flush()
+                    speech_pending = False
+                elif speech_pending and transcriber.ready(step_samples):
+                    events = transcriber.process()
+                else:
+                    events = []
+                    if not speech_pending:
+                        # Solo silencio: no acumularlo en la ventana (se deja un pre-roll)
+                        transcriber.discard_audio(keep_samples=step_samples)
+
+                if self._handle_stream_events(events, speech_started):
+                    speech_started = None
+                # Los bloques salen de la cola de captura: cuentan ahí (si no, el pipeline nunca parece vacío)
+                self.audio_queue.stats.record_done(time.monotonic() - block_started, count=len(chunks))
+
+            except queue.Empty:
+                continue
+            except Exception as e:
+                print(f"❌ Error ASR streaming: {e}")
+
+    def _handle_stream_events(self, events, speech_started=None):
+        """Manda las frases confirmadas a la etapa MT. Devuelve True si hubo alguna."""
+        finals = False
+        for event in events:
+            if event['type'] == 'final':
+                # En streaming el corte y el fin del ASR son el mismo instante
+                trace = (self.metrics.start(speech_started),)
+                self.metrics.mark(trace, 'cut')
+                self.metrics.mark(trace, 'asr_done')
+                item = {'text': event['text'], 'trace': trace, 'duration': event['end'] - event['start']}
+                if SPECULATIVE_MT and ASR_MODE == "streaming":
+                    item['speculation'] = [target.speculator.close() for target in self.targets]
+                self.mt_queue.put(item)
+                finals = True
+            else:
+                for target in self.targets:
+                    if target.speculator is not None:
+                        target.speculator.observe(event.get('stable', ""))
+                self._emit_event({'type': 'partial', 'text': event['text']})
+                if SHOW_PARTIALS:
+                    print(f"   💬 {event['text']}")
+        return finals
+
+    def _emit_event(self, event):
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def transcribe(self, audio, overlap_samples=0):
+        """Etapa ASR: devuelve el texto nuevo en inglés o None si no hay nada útil"""
+        if self.asr_scheduler is not None:
+            text_en = self.asr_scheduler.transcribe(audio, self.source_lang, self.asr_deadline_ms).strip()
+        elif ASR_DECODER == "live":
+            if self.live_decoder is None:
+                self.live_decoder = LiveDecoder(self.model, self.source_lang, LIVE_MAX_TOKENS, LIVE_MAX_FALLBACKS)
+            text_en = self.live_decoder.transcribe(audio)
+        else:
+            result = self.model.transcribe(audio, language=self.source_lang, fp16=False)
             text_en = result["text"].strip()
-            
-            if text_en and len(text_en) > 3:
-                if self.is_similar(text_en, self.last_text):
-                    return
-                
-                self.last_text = text_en
-                text_es = self.translator.translate(text_en)
-                
-                print(f"\n🇺🇸 EN: {text_en}")
-                print(f"🇪🇸 ES: {text_es}")
-                print("-" * 70)
-                
-                self.save_log(text_en, text_es)
-                self.speak(text_es)
-                
+        
+        if text_en and len(text_en) > 3:
+            # Solo el sufijo que no se tradujo ya (None si todo era solapamiento)
+            return self.stitcher.stitch(text_en, overlap_samples / SAMPLE_RATE)
+        return None
+
+    def _pin_asr_thread(self):
+        """La primera vez, fija el hilo que ejecuta Whisper a ASR_CPU_CORES"""
+        if ASR_CPU_CORES and not self._asr_pinned:
+            self._asr_pinned = True
+            pin_current_thread(ASR_CPU_CORES)
+
+    def _asr_stage(self, item):
+        """Handler de la etapa ASR: audio con traza → texto con traza"""
+        if self.asr_scheduler is None:
+            self._pin_asr_thread()
+        text_en = self.transcribe(item['audio'], item.get('overlap', 0))
+        if text_en is None:
+            self.metrics.mark(item['trace'], 'discarded')
+            return None
+        self.metrics.mark(item['trace'], 'asr_done')
+        return {'text': text_en, 'trace': item['trace'], 'duration': len(item['audio']) / SAMPLE_RATE}
+
+    def _mt_stage(self, items):
+        """Handler de la etapa MT (recibe un lote de frases)"""
+        self.translate_and_emit_batch([item['text'] for item in items], [item['trace'] for item in items],
+                                      [item.get('duration') for item in items],
+                                      [item.get('speculation') for item in items])
+
+    def _translate_target(self, index, texts_en, speculations):
+        """Traducciones de un destino (una lista de cláusulas especuladas por frase y destino)"""
+        own = [spec[index] if spec else None for spec in speculations] if speculations else None
+        try:
+            return self.targets[index].translate(texts_en, own)
         except Exception as e:
-            print(f"❌ Error transcripción: {e}")
+            if index == 0:
+                raise
+            # Un idioma extra que falla no tira la frase para los demás
+            print(f"❌ Error MT ({self.targets[index].lang}): {e}")
+            return [""] * len(texts_en), [None] * len(texts_en)
+
+    def translate_and_emit_batch(self, texts_en, traces=None, durations=None, speculations=None):
+        """Traduce varias frases acumuladas en una sola llamada por idioma (con caché)"""
+        # Los idiomas extra se traducen en paralelo con el principal
+        extra = [self.mt_executor.submit(self._translate_target, i, texts_en, speculations)
+                 for i in range(1, len(self.targets))]
+        results = [self._translate_target(0, texts_en, speculations)]
+        traces = traces or [()] * len(texts_en)
+        durations = durations or [None] * len(texts_en)
+        for trace in traces:
+            self.metrics.mark(trace, 'mt_done')
+        results.extend(future.result() for future in extra)
+        
+        for i, (text_en, trace, duration) in enumerate(zip(texts_en, traces, durations)):
+            tag = f"[{self.name}] " if self.name else ""
+            print(f"\n🇺🇸 {tag}{self.source_lang.upper()}: {text_en}")
+            for target, (texts, _) in zip(self.targets, results):
+                print(f"{FLAGS.get(target.lang, '🌐')} {tag}{target.lang.upper()}: {texts[i]}")
+            print("-" * 70)
+            
+            event = {'type': 'final', 'source': text_en, 'target': results[0][0][i],
+                     'trace': list(trace), 'duration': duration}
+            if len(self.targets) > 1:
+                event['targets'] = {target.lang: texts[i] for target, (texts, _) in zip(self.targets, results)}
+            self._emit_event(event)
+            for target, (texts, all_parts) in zip(self.targets, results):
+                if texts[i]:
+                    target.save_log(text_en, texts[i], duration, trace)
+                target.speak(texts[i], trace, all_parts[i])
+
+    def _start_stages(self):
+        """Arranca los workers ASR y MT conectados por colas acotadas"""
+        running = lambda: self.is_running
+        self.stages = [
+            PipelineStage("asr", self.asr_queue, self._asr_stage, self.mt_queue, running).start(),
+            PipelineStage("mt", self.mt_queue, self._mt_stage, None, running,
+                          max_batch=MT_BATCH_MAX).start(),
+        ]
+        self.metrics_exporter = None
+        if METRICS_JSONL or METRICS_PROM:
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, METRICS_INTERVAL_S, self._stream_path(METRICS_JSONL), self._stream_path(METRICS_PROM),
+                running
+            ).start()
+
+    def stage_queues(self):
+        return [self.audio_queue, self.asr_queue, self.mt_queue] + [t.tts_text_queue for t in self.targets]
+
+    def _stop_stages(self):
+        for q in self.stage_queues():
+            q.close()
+            
+    def _start_workers(self):
+        """Segmentador + etapas ASR/MT. Devuelve el hilo del segmentador."""
+        segmenter = self.process_audio_streaming if ASR_MODE == "streaming" else self.process_audio
+        process_thread = threading.Thread(target=segmenter, daemon=True)
+        process_thread.start()
+        self._start_stages()
+        return process_thread
+
+    def print_stats(self):
+        print(format_stats(self.stage_queues()))
+        print(self.vad.format())
+        if self.live_decoder is not None:
+            print(self.live_decoder.format())
+        print(self.stitcher.format())
+        latency = self.metrics.format()
+        if latency:
+            print(latency)
+        for target in self.targets:
+            if len(self.targets) > 1:
+                print(f"   ── {self.source_lang} → {target.lang} ──")
+            print(target.format())
+        if self.tts_cache is not None:
+            tts = self.tts_cache.stats()
+            print(f"   📊 caché TTS: aciertos {tts['hit_rate']:.0%} "
+                  f"({tts['hits']} aciertos / {tts['misses']} fallos, {tts['bytes'] / 1e6:.1f} MB)")
+
+    def _shutdown(self, process_thread):
+        self.is_running = False
+        self._stop_stages()
+        process_thread.join()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.export()
+        self.metrics.collect()
+        for target in self.targets:
+            target.close()
+        if self.mt_executor is not None:
+            self.mt_executor.shutdown(wait=False)
+        if self.tts_runner is not None:
+            self.tts_runner.stop()
+        if self.asr_scheduler is not None:
+            self.asr_scheduler.unregister_stream()
+        print("✅ Detenido")
+
+    def pipeline_idle(self):
+        """True si no queda nada en colas, en vuelo ni por sonar"""
+        for q in self.stage_queues():
+            s = q.snapshot()
+            if s['depth'] or s['processed'] + s['dropped'] < s['in']:
+                return False
+        return all(target.is_idle() for target in self.targets)
+
+    def output_ready(self):
+        """
+        Hay audio para un bloque de salida (o el final de una frase) en algún
+        destino y ninguno espera al TTS a mitad de frase (si no, el ritmo fast
+        le abriría huecos que en tiempo real no existen).
+        """
+        ready = [target.output_ready(BLOCK_SIZE) for target in self.output_targets]
+        return any(ready) and all(r or not target.playback_ring.active
+                                  for r, target in zip(ready, self.output_targets))
+
+    @staticmethod
+    def output_channels(targets):
+        """Canales que necesita la salida de estos destinos (al menos estéreo)"""
+        return max([2] + [target.channel + 1 for target in targets if target.channel is not None])
+            
+    def open_streams(self, input_device, output_device):
+        """Streams de sounddevice conectados a los callbacks (sin arrancar)"""
+        import sounddevice as sd
+        input_stream = sd.InputStream(
+            device=input_device,
+            channels=1,
+            samplerate=SAMPLE_RATE,
+            dtype=np.float32,
+            blocksize=BLOCK_SIZE,
+            callback=self.input_callback,
+        )
+        
+        output_stream = sd.OutputStream(
+            device=output_device,
+            channels=self.output_channels(self.output_targets),
+            samplerate=SAMPLE_RATE,
+            dtype=np.float32,
+            blocksize=BLOCK_SIZE,
+            callback=self.output_callback,
+        )
+        return input_stream, output_stream
+
+    def open_target_streams(self):
+        """Un OutputStream por cada dispositivo propio de los destinos (sin arrancar)"""
+        import sounddevice as sd
+        by_device = {}
+        for target in self.targets:
+            if target.device is not None:
+                by_device.setdefault(target.device, []).append(target)
+        return [sd.OutputStream(
+            device=device,
+            channels=self.output_channels(targets),
+            samplerate=SAMPLE_RATE,
+            dtype=np.float32,
+            blocksize=BLOCK_SIZE,
+            callback=self._device_callback(targets),
+        ) for device, targets in by_device.items()]
             
     def run(self):
         """Inicia el sistema"""
-        input_device, output_device = self.select_devices()
+        import sounddevice as sd
+        with self.profiler.phase("select_devices"):
+            input_device, output_device = self.select_devices()
         
         if input_device is None or output_device is None:
             print("❌ No configurado")
@@ -436,38 +1142,34 @@ class AudioTranslator:
         print("   • Las siguientes esperan en cola")
         print("   • Sin solapamientos ni cortes")
         print("=" * 70)
-        print("\n⏳ Iniciando en 3 segundos...")
         
-        time.sleep(3)
+        try:
+            self.wait_for_model()
+        except Exception as e:
+            print(f"❌ Error cargando el modelo: {e}")
+            return
         
-        process_thread = threading.Thread(target=self.process_audio, daemon=True)
-        process_thread.start()
+        process_thread = self._start_workers()
         
         try:
-            input_stream = sd.InputStream(
-                device=input_device,
-                channels=1,
-                samplerate=SAMPLE_RATE,
-                dtype=np.float32,
-                blocksize=int(SAMPLE_RATE * 0.05),
-                callback=self.input_callback,
-            )
+            streams_started = time.perf_counter()
+            input_stream, output_stream = self.open_streams(input_device, output_device)
             
-            output_stream = sd.OutputStream(
-                device=output_device,
-                channels=2,
-                samplerate=SAMPLE_RATE,
-                dtype=np.float32,
-                blocksize=int(SAMPLE_RATE * 0.05),
-                callback=self.output_callback,
-            )
-            
-            print("🟢 ACTIVO")
-            print("   (Ctrl+C para detener)\n")
-            
-            with input_stream, output_stream:
+            with input_stream, output_stream, contextlib.ExitStack() as target_streams:
+                # Destinos con dispositivo propio (TARGETS[...]['device'])
+                for stream in self.open_target_streams():
+                    target_streams.enter_context(stream)
+                self.profiler.record("abrir streams", streams_started, time.perf_counter())
+                print("🟢 ACTIVO")
+                print("   (Ctrl+C para detener)\n")
+                self.profiler.report()
+                
+                last_stats = time.monotonic()
                 while self.is_running:
                     sd.sleep(100)
+                    if STATS_INTERVAL_S and time.monotonic() - last_stats >= STATS_INTERVAL_S:
+                        last_stats = time.monotonic()
+                        self.print_stats()
                     
         except KeyboardInterrupt:
             print("\n\n🛑 Deteniendo...")
@@ -476,31 +1178,120 @@ class AudioTranslator:
             import traceback
             traceback.print_exc()
         finally:
-            self.is_running = False
-            process_thread.join()
-            print("✅ Detenido")
-
-def check_requirements():
-    try:
-        import whisper
-        import sounddevice
-        import deep_translator
-        import numpy
-        # import pyttsx3 # Ya no es crítico
-        import edge_tts
-        return True
-    except ImportError as e:
-        print("❌ Faltan:", e)
+            self._shutdown(process_thread)
+
+    def run_replay(self, input_path, pace=PACE_FAST, output_wav=None):
+        """
+        Modo offline: el WAV entra por input_callback con bloques de BLOCK_SIZE
+        y la salida va a un WAV o a un sumidero nulo. Sin dispositivos de audio.
+        """
+        audio = load_wav(input_path, SAMPLE_RATE)
+        print(f"\n📼 ENTRADA: {input_path} ({len(audio) / SAMPLE_RATE:.1f}s, ritmo {pace})")
+        print(f"🔊 SALIDA: {output_wav or 'sumidero nulo'}")
+        
+        try:
+            self.wait_for_model()
+        except Exception as e:
+            print(f"❌ Error cargando el modelo: {e}")
+            return None
+        
+        process_thread = self._start_workers()
+        # Sin dispositivos: todos los idiomas van al WAV, cada uno en su canal
+        self.output_targets = self.targets
+        channels = self.output_channels(self.targets)
+        sink = WavSink(output_wav, SAMPLE_RATE, channels) if output_wav else NullSink()
+        clock = ReplayClock(
+            audio, BLOCK_SIZE, SAMPLE_RATE, self.input_callback, self.output_callback,
+            sink=sink, output_channels=channels, pace=pace,
+            # Cola VAD + silencio de corte: la última frase también se cierra
+            tail_s=(VAD_HANGOVER_MS + SILENCE_TRIGGER_MS) / 1000.0 + 0.5,
+            # Contrapresión en lugar de descartes: la segmentación no depende de la carga
+            can_feed=lambda: (self.audio_queue.qsize() < self.audio_queue.maxsize - 1
+                              and self.asr_queue.qsize() < self.asr_queue.maxsize),
+            output_ready=self.output_ready,
+            is_idle=self.pipeline_idle,
+        )
+        
+        summary = None
+        try:
+            print("🟢 ACTIVO (offline)\n")
+            self.profiler.report()
+            summary = clock.run(lambda: self.is_running)
+            self.print_stats()
+            print(ReplayClock.format(summary))
+        except KeyboardInterrupt:
+            print("\n\n🛑 Deteniendo...")
+        finally:
+            self._shutdown(process_thread)
+        return summary
+
+def check_requirements(need_devices=True):
+    # find_spec no importa los módulos: comprobar whisper ya no arrastra torch
+    required = ["whisper", "numpy"]
+    if need_devices:
+        required.append("sounddevice")
+    if TRANSLATOR_BACKEND == "google":
+        required.append("deep_translator")
+    if TTS_BACKEND == "edge":
+        required.append("edge_tts")
+    missing = [name for name in required if importlib.util.find_spec(name) is None]
+    if missing:
+        print("❌ Faltan:", ", ".join(missing))
         return False
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Traductor de audio en tiempo real (EN → ES)")
+    parser.add_argument("--target", action="append", metavar="IDIOMA[:VOZ][@CANAL]",
+                        help="Idioma de destino (repetible; todos comparten la transcripción), "
+                             "p.ej. --target es@0 --target fr@1")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Mostrar el tiempo de cada fase del arranque")
+    parser.add_argument("--input", metavar="ARCHIVO.wav",
+                        help="Modo offline: procesar un WAV en lugar del dispositivo de entrada")
+    parser.add_argument("--pace", choices=[PACE_FAST, PACE_REALTIME], default=PACE_FAST,
+                        help="Ritmo del modo offline: tan rápido como se pueda o en tiempo real")
+    parser.add_argument("--output-wav", metavar="ARCHIVO.wav",
+                        help="Modo offline: guardar la salida en un WAV (por defecto se descarta)")
+    parser.add_argument("--mt", choices=["google", "stub"], default=TRANSLATOR_BACKEND,
+                        help="Backend de traducción")
+    parser.add_argument("--tts", choices=["edge", "stub"], default=TTS_BACKEND,
+                        help="Backend de TTS")
+    parser.add_argument("--int8", action="store_true", default=ASR_INT8,
+                        help="Whisper con cuantización dinámica int8 (CPU)")
+    parser.add_argument("--asr-threads", type=int, default=ASR_INTRA_OP_THREADS,
+                        help="Hilos de torch por operación")
+    parser.add_argument("--asr-interop-threads", type=int, default=ASR_INTER_OP_THREADS,
+                        help="Hilos de torch entre operaciones")
+    parser.add_argument("--asr-cores", default=ASR_CPU_CORES,
+                        help="Núcleos para el hilo de Whisper, p.ej. 2-5 (solo Linux)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    TRANSLATOR_BACKEND = args.mt
+    TTS_BACKEND = args.tts
+    ASR_INT8 = args.int8
+    ASR_INTRA_OP_THREADS = args.asr_threads
+    ASR_INTER_OP_THREADS = args.asr_interop_threads
+    ASR_CPU_CORES = args.asr_cores
+    if args.target:
+        TARGETS = [parse_target(spec) for spec in args.target]
+    profiler = StartupProfiler(enabled=args.profile_startup, t0=_T0)
+    profiler.record("imports", _T0, time.perf_counter())
+    
     print("=" * 70)
     print("   🌐 TRADUCTOR - REPRODUCCIÓN SECUENCIAL")
     print("=" * 70)
     print()
     
-    if not check_requirements():
-        sys.exit(1)
+    with profiler.phase("check_requirements"):
+        if not check_requirements(need_devices=args.input is None):
+            sys.exit(1)
     
-    translator = AudioTranslator()
-    translator.run()
\ No newline at end of file
+    with profiler.phase("AudioTranslator()"):
+        translator = AudioTranslator(profiler, targets=TARGETS)
+    if args.input:
+        translator.run_replay(args.input, pace=args.pace, output_wav=args.output_wav)
+    else:
+        translator.run()
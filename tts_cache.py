@@ -0,0 +1,116 @@
+"""
+Caché de audio TTS direccionada por contenido
+=============================================
+Guarda el PCM final (16 kHz, mono, float32) de cada frase sintetizada como
+`.npy`, con clave hash(voz, velocidad, texto). En un acierto el archivo se
+abre con memory-map y va directo a la cola de reproducción, sin Edge-TTS ni
+FFmpeg. Se expulsa por LRU cuando se supera el presupuesto de disco.
+"""
+
+import collections
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+
+def cache_key(voice, rate, text):
+    return hashlib.sha256(f"{voice}\x00{rate}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class PCMCache:
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # clave → bytes, de más antigua a más reciente
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _load_index(self):
+        """Reconstruye el orden LRU a partir de la fecha de modificación de los archivos"""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npy"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def get(self, voice, rate, text):
+        """Audio cacheado (memmap de solo lectura) o None"""
+        key = cache_key(voice, rate, text)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            audio = np.load(path, mmap_mode="r")
+            os.utime(path)  # Mantener el orden LRU entre sesiones
+        except (OSError, ValueError):
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, voice, rate, text, audio):
+        key = cache_key(voice, rate, text)
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(audio, dtype=np.float32))
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠️ Caché TTS: no se pudo guardar ({e})")
+            return
+
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                # En Windows un archivo con memmap abierto no se puede borrar; se reintenta en otra sesión
+                pass
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,289 @@
+"""
+Síntesis Edge-TTS en streaming
+==============================
+Consume `edge_tts.Communicate.stream()` y decodifica el MP3 por trozos en
+memoria con PyAV (dependencia opcional `av`): sin archivos temporales ni un
+proceso FFmpeg por frase. El PCM (16 kHz, mono, float32) se entrega en
+cuanto se decodifican los primeros frames, para que la reproducción empiece
+antes de que termine la síntesis. stream_stub_tts es un sustituto local
+(sin red) para pruebas y el modo offline.
+
+AsyncTTSRunner mantiene un único event loop vivo en su propio hilo y
+OrderedSynthesizer lanza hasta K síntesis concurrentes, liberando el audio
+a la cola de reproducción en el orden original de las frases.
+"""
+
+import asyncio
+import collections
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+def mp3_streaming_available():
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class StreamingMP3Decoder:
+    """Decodificador MP3 incremental: feed(bytes) → lista de bloques float32 mono"""
+
+    def __init__(self, sample_rate=16000):
+        import av
+        self._av = av
+        self._codec = av.CodecContext.create("mp3", "r")
+        self._resampler = av.AudioResampler(format="flt", layout="mono", rate=sample_rate)
+
+    def _frames_to_pcm(self, frames):
+        out = []
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                pcm = resampled.to_ndarray().reshape(-1)
+                if len(pcm):
+                    out.append(pcm)
+        return out
+
+    def _decode(self, packet):
+        try:
+            return self._codec.decode(packet)
+        except self._av.error.InvalidDataError:
+            # Cabeceras (ID3/Xing) o un frame corrupto: se salta sin cortar el stream
+            return []
+
+    def feed(self, data):
+        out = []
+        for packet in self._codec.parse(data):
+            out.extend(self._frames_to_pcm(self._decode(packet)))
+        return out
+
+    def flush(self):
+        """Vacía parser, decodificador y remuestreador al final del stream"""
+        out = []
+        for packet in self._codec.parse(None):
+            out.extend(self._frames_to_pcm(self._decode(packet)))
+        out.extend(self._frames_to_pcm(self._decode(None)))
+        for resampled in self._resampler.resample(None):
+            pcm = resampled.to_ndarray().reshape(-1)
+            if len(pcm):
+                out.append(pcm)
+        return out
+
+
+class ChunkedSegmentWriter:
+    """
+    Encola el PCM de UNA frase como varios segmentos consecutivos.
+    El primero sale en cuanto hay audio; los siguientes agrupan al menos
+    `min_chunk_s` para no saturar la cola. Un segmento vacío con last=True
+    marca el final de la frase.
+    """
+
+    def __init__(self, out_queue, label, sample_rate=16000, min_chunk_s=0.2, trace=()):
+        self.out_queue = out_queue
+        self.label = label
+        self.trace = trace
+        self.sample_rate = sample_rate
+        self.min_chunk = int(min_chunk_s * sample_rate)
+        self._pending = []
+        self._pending_len = 0
+        self._parts = []
+        self._sent_first = False
+
+    def _emit(self, audio, last=False):
+        self.out_queue.put({
+            'audio': audio,
+            'duration': len(audio) / self.sample_rate,
+            'text': self.label,
+            'first': not self._sent_first,
+            'last': last,
+            'trace': self.trace,
+            'created': time.monotonic(),
+        })
+        self._sent_first = True
+
+    def write(self, pcm):
+        self._parts.append(pcm)
+        self._pending.append(pcm)
+        self._pending_len += len(pcm)
+        if not self._sent_first or self._pending_len >= self.min_chunk:
+            self._emit(np.concatenate(self._pending) if len(self._pending) > 1 else self._pending[0])
+            self._pending = []
+            self._pending_len = 0
+
+    def close(self):
+        """Cierra la frase y devuelve su audio completo (para la caché)"""
+        tail = np.concatenate(self._pending) if self._pending else np.zeros(0, dtype=np.float32)
+        if self._sent_first or len(tail):
+            self._emit(tail, last=True)
+        self._pending = []
+        if not self._parts:
+            return np.zeros(0, dtype=np.float32)
+        if len(self._parts) == 1:
+            return self._parts[0]
+        return np.concatenate(self._parts)
+
+
+async def stream_edge_tts(text, voice, rate, on_pcm, sample_rate=16000):
+    """Sintetiza con Edge-TTS y llama a on_pcm(bloque) a medida que se decodifica"""
+    import edge_tts
+    communicate = edge_tts.Communicate(text, voice, rate=rate)
+    decoder = StreamingMP3Decoder(sample_rate)
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            for pcm in decoder.feed(chunk["data"]):
+                on_pcm(pcm)
+    for pcm in decoder.flush():
+        on_pcm(pcm)
+
+
+async def stream_stub_tts(text, on_pcm, sample_rate=16000, latency_s=0.05, seconds_per_char=0.06, speed=10.0):
+    """TTS local sin red (pruebas y modo offline): un tono suave con duración proporcional al texto"""
+    await asyncio.sleep(latency_s)
+    samples = max(int(len(text) * seconds_per_char * sample_rate), 1)
+    chunk = sample_rate // 5
+    t = np.arange(chunk, dtype=np.float32) / sample_rate
+    tone = (0.1 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+    for offset in range(0, samples, chunk):
+        on_pcm(tone[:min(chunk, samples - offset)].copy())
+        await asyncio.sleep(chunk / sample_rate / speed)
+
+
+class AsyncTTSRunner:
+    """Event loop persistente en un hilo propio, con límite de corrutinas concurrentes"""
+
+    def __init__(self, max_concurrency=3):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="tts-loop", daemon=True)
+        self.thread.start()
+        # El semáforo se crea dentro del loop (en Python < 3.10 se liga al loop al construirse)
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), self.loop).result()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    async def _guarded(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro, limit=True):
+        """
+        Programa la corrutina en el loop; devuelve un concurrent.futures.Future.
+        limit=False no ocupa hueco del semáforo (trabajo que otra corrutina
+        limitada puede estar esperando: si ocupara hueco podría bloquearse).
+        """
+        return asyncio.run_coroutine_threadsafe(self._guarded(coro) if limit else coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_JOB_DONE = object()
+
+
+class TTSJob:
+    """Una frase en síntesis: el PCM llega por `chunks` desde el hilo del loop"""
+
+    def __init__(self, text, writer, from_cache=False):
+        self.text = text
+        self.writer = writer
+        self.trace = writer.trace
+        self.from_cache = from_cache
+        self.chunks = queue.Queue()
+        self.future = None
+        self.started = time.monotonic()
+        self.audio = None
+        self.error = None
+
+
+class OrderedSynthesizer:
+    """
+    Hasta `concurrency` síntesis en paralelo sobre un AsyncTTSRunner.
+    Solo la frase más antigua vuelca audio a la cola de reproducción (en
+    streaming); las demás acumulan sus bloques hasta que les toca, de modo
+    que la reproducción sigue siendo secuencial y en orden.
+
+    `synth_fn(text, on_pcm)` es una corrutina que llama a on_pcm(bloque)
+    con PCM float32 mono a medida que lo produce.
+    """
+
+    def __init__(self, runner, out_queue, synth_fn, sample_rate=16000, concurrency=None):
+        self.runner = runner
+        self.out_queue = out_queue
+        self.synth_fn = synth_fn
+        self.sample_rate = sample_rate
+        self.concurrency = concurrency or runner.max_concurrency
+        self.inflight = collections.deque()
+
+    def has_capacity(self):
+        return len(self.inflight) < self.concurrency
+
+    def _new_job(self, text, label, from_cache=False, trace=()):
+        writer = ChunkedSegmentWriter(self.out_queue, label, self.sample_rate, trace=trace)
+        job = TTSJob(text, writer, from_cache=from_cache)
+        self.inflight.append(job)
+        return job
+
+    def submit(self, text, label, trace=(), synth_fn=None):
+        """synth_fn sustituye a la corrutina por defecto solo para esta frase"""
+        job = self._new_job(text, label, trace=trace)
+        # Guardar el future: el loop solo referencia débilmente a sus tareas
+        job.future = self.runner.submit(self._run_job(job, synth_fn or self.synth_fn))
+        return job
+
+    def submit_ready(self, text, label, audio, trace=()):
+        """Frase ya resuelta (p.ej. caché): respeta el orden sin pasar por el loop"""
+        job = self._new_job(text, label, from_cache=True, trace=trace)
+        job.chunks.put(audio)
+        job.chunks.put(_JOB_DONE)
+        return job
+
+    async def _run_job(self, job, synth_fn):
+        try:
+            await synth_fn(job.text, job.chunks.put)
+        except Exception as e:
+            job.chunks.put(e)
+        finally:
+            job.chunks.put(_JOB_DONE)
+
+    def pump(self, timeout=0.05):
+        """
+        Vuelca a reproducción el audio disponible de la frase más antigua.
+        Devuelve la lista de trabajos terminados (en orden).
+        """
+        finished = []
+        while self.inflight:
+            job = self.inflight[0]
+            try:
+                item = job.chunks.get(timeout=timeout if not finished else 0)
+            except queue.Empty:
+                break
+
+            done = False
+            while True:
+                if item is _JOB_DONE:
+                    done = True
+                    break
+                if isinstance(item, Exception):
+                    job.error = item
+                else:
+                    job.writer.write(item)
+                try:
+                    item = job.chunks.get_nowait()
+                except queue.Empty:
+                    break
+
+            if not done:
+                break
+            job.audio = job.writer.close()
+            self.inflight.popleft()
+            finished.append(job)
+        return finished
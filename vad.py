@@ -0,0 +1,202 @@
+"""
+Detección de actividad de voz (VAD)
+===================================
+Sustituye al umbral fijo de RMS. Dos backends con la misma interfaz:
+
+- EnergyVAD: características en NumPy por bloque (energía, tasa de cruces por
+  cero y proporción de energía en la banda de voz 300–3400 Hz), suelo de
+  ruido adaptativo, histéresis y "hangover" para no cortar entre palabras.
+- OnnxVAD: modelo Silero VAD (v5) en CPU con onnxruntime (opcional).
+
+Ambos cuentan cuánto audio rechazan para poder medir las llamadas a Whisper
+que se ahorran.
+"""
+
+import abc
+
+import numpy as np
+
+SPEECH_BAND_HZ = (300.0, 3400.0)
+
+
+def compute_features(blocks, sample_rate):
+    """
+    Características de voz de varios bloques a la vez.
+    `blocks`: array (n_bloques, muestras). Devuelve (energía_dB, zcr, ratio_banda).
+    """
+    blocks = np.atleast_2d(np.asarray(blocks, dtype=np.float32))
+    n = blocks.shape[1]
+
+    energy_db = 10.0 * np.log10(np.mean(blocks * blocks, axis=1) + 1e-10)
+
+    signs = np.signbit(blocks)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(n - 1, 1)
+
+    spectrum = np.abs(np.fft.rfft(blocks * np.hanning(n).astype(np.float32), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(n, 1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    band_ratio = spectrum[:, band].sum(axis=1) / (spectrum.sum(axis=1) + 1e-10)
+
+    return energy_db, zcr, band_ratio
+
+
+class VoiceActivityDetector(abc.ABC):
+    """Base: lleva la cuenta de audio total/aceptado y aplica el hangover"""
+
+    name = "base"
+
+    def __init__(self, sample_rate=16000, hangover_ms=200):
+        self.sample_rate = sample_rate
+        self.hangover_samples = int(hangover_ms / 1000.0 * sample_rate)
+        self._hangover_left = 0
+        self.in_speech = False
+        self.total_samples = 0
+        self.speech_samples = 0
+        self.utterances_total = 0
+        self.utterances_rejected = 0
+
+    @abc.abstractmethod
+    def _detect(self, block):
+        """Decisión instantánea del backend (sin hangover)"""
+
+    def is_speech(self, block):
+        block = np.ravel(block)
+        n = len(block)
+        if self._detect(block):
+            self._hangover_left = self.hangover_samples
+            speech = True
+        elif self._hangover_left > 0:
+            self._hangover_left -= n
+            speech = True
+        else:
+            speech = False
+
+        self.in_speech = speech
+        self.total_samples += n
+        if speech:
+            self.speech_samples += n
+        return speech
+
+    def record_utterance(self, accepted):
+        """Anota si un corte se mandó a Whisper o se descartó por no tener voz"""
+        self.utterances_total += 1
+        if not accepted:
+            self.utterances_rejected += 1
+
+    def rejected_fraction(self):
+        return 1.0 - self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'audio_s': self.total_samples / self.sample_rate,
+            'speech_s': self.speech_samples / self.sample_rate,
+            'rejected_fraction': self.rejected_fraction(),
+            'utterances': self.utterances_total,
+            'whisper_calls_saved': self.utterances_rejected,
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"   📊 VAD ({s['backend']}) rechazado {s['rejected_fraction']:.0%} del audio | "
+                f"llamadas a Whisper ahorradas: {s['whisper_calls_saved']}/{s['utterances']}")
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """VAD por energía con suelo de ruido adaptativo e histéresis"""
+
+    name = "energy"
+
+    def __init__(self, sample_rate=16000, hangover_ms=200, margin_on_db=9.0, margin_off_db=5.0,
+                 min_energy_db=-45.0, min_band_ratio=0.35, max_zcr=0.35, initial_floor_db=-55.0,
+                 floor_adapt_speech=0.005):
+        super().__init__(sample_rate, hangover_ms)
+        self.margin_on_db = margin_on_db
+        self.margin_off_db = margin_off_db
+        self.min_energy_db = min_energy_db
+        self.min_band_ratio = min_band_ratio
+        self.max_zcr = max_zcr
+        self.noise_floor_db = initial_floor_db
+        self.floor_adapt_speech = floor_adapt_speech
+        self._active = False
+
+    def _detect(self, block):
+        energy_db, zcr, band_ratio = compute_features(block[None, :], self.sample_rate)
+        energy_db, zcr, band_ratio = float(energy_db[0]), float(zcr[0]), float(band_ratio[0])
+
+        # Histéresis: cuesta más entrar en voz que mantenerse
+        margin = self.margin_off_db if self._active else self.margin_on_db
+        candidate = (
+            energy_db > self.min_energy_db
+            and energy_db > self.noise_floor_db + margin
+            and band_ratio > self.min_band_ratio
+            and zcr < self.max_zcr
+        )
+
+        # Suelo de ruido: baja rápido, sube despacio en silencio y muy despacio
+        # con "voz" continua (música/ruido estable acaba absorbido por el suelo)
+        if energy_db < self.noise_floor_db:
+            rate = 0.2
+        elif not candidate:
+            rate = 0.02
+        else:
+            rate = self.floor_adapt_speech
+        self.noise_floor_db += rate * (energy_db - self.noise_floor_db)
+
+        self._active = candidate
+        return candidate
+
+
+class OnnxVAD(VoiceActivityDetector):
+    """Silero VAD v5 (ONNX) en CPU. Requiere `pip install onnxruntime` y el archivo del modelo."""
+
+    name = "onnx"
+    WINDOW = 512     # Muestras por inferencia a 16 kHz
+    CONTEXT = 64     # Muestras de contexto que el modelo v5 espera delante de cada ventana
+
+    def __init__(self, model_path, sample_rate=16000, hangover_ms=200, threshold=0.5):
+        super().__init__(sample_rate, hangover_ms)
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, sess_options=options,
+                                                    providers=["CPUExecutionProvider"])
+        self.threshold = threshold
+        self.neg_threshold = max(threshold - 0.15, 0.01)
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context = np.zeros(self.CONTEXT, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        self._active = False
+        self.last_probability = 0.0
+
+    def _infer(self, window):
+        x = np.concatenate((self._context, window))[None, :]
+        out, self._state = self.session.run(None, {'input': x, 'state': self._state, 'sr': self._sr})
+        self._context = window[-self.CONTEXT:]
+        return float(out[0][0])
+
+    def _detect(self, block):
+        # Los bloques de captura (800 muestras) no coinciden con la ventana del modelo
+        self._pending = np.concatenate((self._pending, block.astype(np.float32, copy=False)))
+        while len(self._pending) >= self.WINDOW:
+            self.last_probability = self._infer(self._pending[:self.WINDOW])
+            self._pending = self._pending[self.WINDOW:]
+            if self.last_probability >= self.threshold:
+                self._active = True
+            elif self.last_probability < self.neg_threshold:
+                self._active = False
+        return self._active
+
+
+def create_vad(backend="energy", sample_rate=16000, model_path=None, **kwargs):
+    """Construye el VAD indicado; si el ONNX no está disponible vuelve a EnergyVAD"""
+    if backend == "onnx":
+        try:
+            return OnnxVAD(model_path, sample_rate, **kwargs)
+        except Exception as e:
+            print(f"⚠️ VAD ONNX no disponible ({e}), usando VAD por energía")
+    elif backend != "energy":
+        raise ValueError(f"Backend de VAD desconocido: {backend}")
+    return EnergyVAD(sample_rate, **kwargs)